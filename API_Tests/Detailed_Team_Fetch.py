@@ -1,59 +1,24 @@
 import os
-import requests
-import json
+import sys
+
+# The shared VRML client package lives at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from VRML_Client import get_client, find_exact_match
 
 class TeamFetcher:
-    def __init__(self):
-        # Ensure the directory for storing team data exists
-        self.directory = 'Team_By_ID'
-        if not os.path.exists(self.directory):
-            os.makedirs(self.directory)
+    def __init__(self, client=None):
+        # Reuse the process-wide client so every lookup shares one connection pool
+        self.client = client or get_client()
 
     # Function to fetch team data from VR Master League API (Search by name)
     def fetch_team_data(self, game, team_name):
-        try:
-            # Build the API URL dynamically based on the game and team
-            api_url = f'https://api.vrmasterleague.com/{game}/Teams/Search'
-            params = {"name": team_name}
-            
-            # Print the API URL before making the request
-            print(f"Fetching data from URL: {api_url}?name={team_name}")
-
-            response = requests.get(api_url, params=params)
-            response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
-            
-            return response.json()
-        except Exception as e:
-            print(f"Failed to fetch data for team '{team_name}' in game '{game}': {e}")
-            return None
+        return self.client.search_teams(game, team_name)
 
     # Function to fetch detailed data for a team using the team ID
     def fetch_team_details(self, game, team_id):
-        try:
-            # Build the API URL to get detailed information about the team
-            api_url = f'https://api.vrmasterleague.com/teams/{team_id}'  # Correct endpoint format
-            
-            # Print the API URL before making the request
-            print(f"Fetching detailed data from URL: {api_url}")
-
-            response = requests.get(api_url)
-            response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
-            
-            return response.json()
-        except Exception as e:
-            print(f"Failed to fetch details for team ID '{team_id}' in game '{game}': {e}")
-            return None
-
-    # Function to save the team data to a JSON file named after the team ID
-    def save_team_data(self, team_id, team_data):
-        file_path = os.path.join(self.directory, f'{team_id}.json')
-
-        try:
-            with open(file_path, 'w') as json_file:
-                json.dump(team_data, json_file, indent=4)
-            print(f"Team data for team ID '{team_id}' has been saved to '{file_path}'")
-        except Exception as e:
-            print(f"Failed to save team data for ID '{team_id}': {e}")
+        # Team IDs are unique across games, so the game is only kept for the callers' signature
+        return self.client.fetch_team_details(team_id)
 
     # Function to print the entire team data response
     def print_team_data(self, game, team_name):
@@ -63,7 +28,7 @@ class TeamFetcher:
             print(f"Team Data for {team_name} in {game}:")
             
             # Find a case-insensitive match for the team name
-            matched_team = next((team for team in team_data if team['name'].lower() == team_name.lower()), None)
+            matched_team = find_exact_match(team_data, team_name)
 
             if matched_team:
                 team_id = matched_team['id']
@@ -74,9 +39,10 @@ class TeamFetcher:
                 if team_details:
                     print(f"Detailed Team Data for '{matched_team['name']}':")
                     print(team_details)  # Print the detailed team data (as a dictionary)
-                    
-                    # Save the team details to a JSON file
-                    self.save_team_data(team_id, team_details)
+
+                    # The response is kept in the client's persistent cache, so reruns don't re-download it
+                    if self.client.disk_cache is not None:
+                        print(f"Team details for ID '{team_id}' are cached in '{self.client.disk_cache.path}'")
                 else:
                     print(f"Failed to fetch detailed information for team '{matched_team['name']}'")
             else:
@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+
+# The shared VRML client package lives at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from VRML_Client import get_client
+from VRML_Client.Standings import division_teams_from_schedule, team_row, format_table
+
+class DivisionTable:
+    def __init__(self, client=None):
+        # Reuse the process-wide client so every lookup shares one connection pool
+        self.client = client or get_client()
+
+    # Function to print the standings of a division, every team's details are fetched at once
+    def print_division_table(self, game, division, region=None, workers=10):
+        started = time.perf_counter()
+        teams = division_teams_from_schedule(self.client.fetch_matches(game, region), division)
+        if not teams:
+            print(f"No teams found for the {division} division in {game}.")
+            return None
+
+        rows = []
+        for team_id, data in self.client.iter_team_details(list(teams), workers):
+            rows.append(team_row(team_id, teams[team_id], data))
+            print(f"{len(rows)}/{len(teams)} {teams[team_id]}{'' if data else ' (no details)'}")
+
+        print(f"\n{division} - {game} ({time.perf_counter() - started:.1f}s)")
+        print(format_table(rows))
+        return rows
+
+# Example usage:
+if __name__ == "__main__":
+    game = input("Enter the game name (e.g., onward, breachers): ").strip()
+    division = input("Enter the division (e.g., Master, Diamond): ").strip()
+    region = input("Enter region (optional, e.g., NA, EU): ").strip() or None
+
+    division_table = DivisionTable()
+    division_table.print_division_table(game, division, region)
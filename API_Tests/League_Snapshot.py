@@ -0,0 +1,51 @@
+import logging
+import os
+import sys
+import time
+
+# The shared VRML client package lives at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from VRML_Client import get_client
+from VRML_Client.Snapshot import crawl, load_snapshot
+
+class LeagueSnapshotFetch:
+    def __init__(self, client=None):
+        # Reuse the process-wide client so every lookup shares one connection pool
+        self.client = client or get_client()
+
+    # Function to crawl every team and match of a game (and optional region) and save it as a snapshot
+    def save_snapshot(self, game, region=None, workers=8):
+        started = time.perf_counter()
+        builder = crawl(self.client, game, region, workers)
+        if builder is None:
+            print(f"No match data found for game '{game}'.")
+            return None
+
+        path = builder.save()
+        print(f"Saved {len(builder.teams)} teams and {len(builder.matches)} matches to {path} in {time.perf_counter() - started:.1f}s")
+        return path
+
+    # Function to load a saved snapshot and print a short summary of it
+    def print_snapshot(self, game, region=None):
+        started = time.perf_counter()
+        snapshot = load_snapshot(game, region)
+        if snapshot is None:
+            print(f"No snapshot saved for '{game}'.")
+            return
+        teams = snapshot.teams
+        print(f"Loaded {len(teams)} teams and {len(snapshot.matches)} matches in {(time.perf_counter() - started) * 1000:.1f}ms")
+        for position, division in enumerate(snapshot.divisions):
+            print(f"{division}: {int((teams['division'] == position).sum())} teams")
+
+# Example usage:
+if __name__ == "__main__":
+    # Show the crawl's progress (the client logs at INFO and above)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    game = input("Enter the game name (e.g., onward, breachers): ").strip()
+    region = input("Enter region (optional, e.g., NA, EU): ").strip() or None
+    workers = int(input("Enter how many teams to fetch at once (default is 8): ").strip() or 8)
+
+    league_snapshot = LeagueSnapshotFetch()
+    if league_snapshot.save_snapshot(game, region, workers):
+        league_snapshot.print_snapshot(game, region)
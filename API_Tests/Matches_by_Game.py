@@ -1,38 +1,22 @@
 import os
-import requests
+import sys
 import json
-from datetime import datetime
+from datetime import datetime, timezone
+
+# The shared VRML client package lives at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from VRML_Client import get_client
+from VRML_Client.Models import utc_epoch
 
 class MatchFetcher:
-    def __init__(self):
-        pass
+    def __init__(self, client=None):
+        # Reuse the process-wide client so every lookup shares one connection pool
+        self.client = client or get_client()
 
     # Function to fetch match data from the VR Master League API
     def fetch_match_data(self, game, region=None, filters=None, posMin=1):
-        try:
-            # Construct the base API URL
-            api_url = f'https://api.vrmasterleague.com/{game}/Matches'
-            
-            # Define query parameters
-            params = {}
-            if region:
-                params['region'] = region
-            if filters:
-                params['filters'] = filters
-            if posMin:
-                params['posMin'] = posMin
-
-            # Print the API URL before making the request
-            print(f"Fetching data from URL: {api_url} with params: {params}")
-
-            # Make the API request
-            response = requests.get(api_url, params=params)
-            response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
-            
-            return response.json()
-        except Exception as e:
-            print(f"Failed to fetch match data for game '{game}': {e}")
-            return None
+        return self.client.fetch_matches(game, region, filters, posMin)
 
     # Function to filter and return upcoming and unscheduled matches
     def filter_upcoming_unscheduled_matches(self, match_data):
@@ -55,6 +39,8 @@ class MatchFetcher:
                 "matchID": match.get("matchID"),
                 "week": match.get("week"),
                 "scheduledTime": self.format_scheduled_time(match.get("dateScheduledUTC")),
+                "scheduledEpoch": utc_epoch(match.get("dateScheduledUTC")),
+                "scheduledUserTimezone": match.get("dateScheduledUserTimezone"),
                 "homeTeam": {
                     "teamID": home_team.get("teamID"),
                     "name": home_team.get("teamName"),
@@ -84,12 +70,12 @@ class MatchFetcher:
         
         return cleaned_data
 
-    # Function to format the scheduled time to a readable format
+    # Function to format the scheduled time (dateScheduledUTC) as ISO 8601 with its UTC offset, so it can't be misread as local time
     def format_scheduled_time(self, scheduled_time):
-        try:
-            return datetime.strptime(scheduled_time, "%Y-%m-%d %H:%M").strftime("%Y-%m-%d %H:%M:%S")
-        except Exception as e:
+        epoch = utc_epoch(scheduled_time)
+        if epoch is None:
             return None
+        return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
 
     # Function to save filtered match data to a JSON file
     def save_filtered_match_data(self, game, upcoming_matches, unscheduled_matches):
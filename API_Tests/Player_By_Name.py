@@ -1,26 +1,19 @@
-import requests
+import os
+import sys
+
+# The shared VRML client package lives at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from VRML_Client import get_client
 
 class PlayerFetcher:
-    def __init__(self):
-        pass
+    def __init__(self, client=None):
+        # Reuse the process-wide client so every lookup shares one connection pool
+        self.client = client or get_client()
 
     # Function to fetch player data from VR Master League API
     def fetch_player_data(self, player_name):
-        try:
-            # Build the API URL dynamically based on the player's name
-            api_url = f'https://api.vrmasterleague.com/Players/Search'
-            params = {"name": player_name}
-            
-            # Print the API URL before making the request
-            print(f"Fetching data from URL: {api_url}?name={player_name}")
-
-            response = requests.get(api_url, params=params)
-            response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
-
-            return response.json()
-        except Exception as e:
-            print(f"Failed to fetch data for player '{player_name}': {e}")
-            return None
+        return self.client.search_players(player_name)
 
     # Function to print the entire player data response
     def print_player_data(self, player_name):
@@ -1,9 +1,17 @@
-import requests
 import json
 import os
+import sys
+
+# The shared VRML client package lives at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from VRML_Client import get_client
 
 class PlayerFetcher:
-    def __init__(self):
+    def __init__(self, client=None):
+        # Reuse the process-wide client so every lookup shares one connection pool
+        self.client = client or get_client()
+
         self.folder_path = "Player_By_ID"  # Folder to store player data
         # Ensure the folder exists
         if not os.path.exists(self.folder_path):
@@ -11,49 +19,11 @@ class PlayerFetcher:
 
     # Function to fetch player data from VR Master League API by player name
     def fetch_player_data_by_name(self, player_name):
-        try:
-            # Build the API URL dynamically based on the player's name
-            api_url = 'https://api.vrmasterleague.com/Players/Search'
-            params = {"name": player_name}
-            
-            # Print the API URL before making the request
-            print(f"Fetching data from URL: {api_url}?name={player_name}")
-
-            response = requests.get(api_url, params=params)
-            response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
-
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Failed to fetch data for player '{player_name}': {e}")
-            return None
+        return self.client.search_players(player_name)
 
     # Function to fetch player data from VR Master League API by playerID (not userID)
     def fetch_player_data_by_id(self, player_id):
-        try:
-            # Build the API URL dynamically based on the playerID
-            api_url = f'https://api.vrmasterleague.com/Players/{player_id}'
-            
-            # Print the API URL before making the request
-            print(f"Fetching data from URL: {api_url}")
-
-            response = requests.get(api_url)
-            response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
-
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Failed to fetch data for player ID '{player_id}': {e}")
-            return None
-
-    # Function to save player data to a file (Raw JSON)
-    def save_player_data_to_file(self, player_name, player_data_combined):
-        # Define the file path for saving the combined player data as JSON
-        file_path = os.path.join(self.folder_path, f"{player_name}.json")
-
-        # Save the combined player data to the file in JSON format
-        with open(file_path, "w") as json_file:
-            json.dump(player_data_combined, json_file, indent=4)
-        
-        print(f"Player data saved to {file_path}")
+        return self.client.fetch_player(player_id)
 
     # Function to save the formatted player data to a file (Formatted JSON)
     def save_formatted_player_data_to_file(self, player_name, player_data_combined):
@@ -117,23 +87,25 @@ class PlayerFetcher:
 
         if player_data:
             if isinstance(player_data, list) and len(player_data) > 0:
-                # List to store player data for exact matches
-                matching_player_data = []
-
                 # Loop through the players and check for an exact match (case-insensitive)
+                matching_ids = []
                 for player in player_data:
                     # Check the 'name' key for an exact match (case-insensitive)
                     if player.get("name", "").lower() == player_name.lower():
                         print(f"Found exact match for player '{player_name}' with ID: {player['id']}")
-                        player_details = self.fetch_player_data_by_id(player['id'])
-                        if player_details:
-                            matching_player_data.append(player_details)
-                
+                        matching_ids.append(player['id'])
+
+                # Fetch every matching ID at the same time instead of one after the other
+                player_details = self.client.fan_out([
+                    lambda player_id=player_id: self.fetch_player_data_by_id(player_id) for player_id in matching_ids
+                ])
+                # List to store player data for exact matches
+                matching_player_data = [details for details in player_details if details]
+
                 if not matching_player_data:
                     print(f"No exact match found for player '{player_name}'.")
                 else:
-                    # Save the combined data for all matching players in one file
-                    self.save_player_data_to_file(player_name, matching_player_data)
+                    # The raw responses are kept in the client's persistent cache, so only the formatted view is written
                     # Save the formatted data for all matching players in one file
                     self.save_formatted_player_data_to_file(player_name, matching_player_data)
             else:
@@ -1,48 +1,28 @@
 import os
-import requests
-import json
+import sys
+
+# The shared VRML client package lives at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from VRML_Client import get_client, find_exact_match
 
 class TeamFetcher:
-    def __init__(self):
-        # Ensure the directory for storing team data exists
-        self.directory = 'Team_By_ID'
-        if not os.path.exists(self.directory):
-            os.makedirs(self.directory)
+    def __init__(self, client=None):
+        # Reuse the process-wide client so every lookup shares one connection pool
+        self.client = client or get_client()
 
     # Function to fetch team data from VR Master League API (Search by name)
     def fetch_team_data(self, game, team_name):
-        try:
-            # Build the API URL dynamically based on the game and team
-            api_url = f'https://api.vrmasterleague.com/{game}/Teams/Search'
-            params = {"name": team_name}
-            
-            # Print the API URL before making the request
-            print(f"Fetching data from URL: {api_url}?name={team_name}")
-
-            response = requests.get(api_url, params=params)
-            response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
-            
-            return response.json()
-        except Exception as e:
-            print(f"Failed to fetch data for team '{team_name}' in game '{game}': {e}")
-            return None
+        return self.client.search_teams(game, team_name)
 
     # Function to fetch detailed data for a team using the team ID
     def fetch_team_details(self, game, team_id):
-        try:
-            # Build the API URL to get detailed information about the team
-            api_url = f'https://api.vrmasterleague.com/teams/{team_id}'  # Correct endpoint format
-            
-            # Print the API URL before making the request
-            print(f"Fetching detailed data from URL: {api_url}")
+        # Team IDs are unique across games, so the game is only kept for the callers' signature
+        return self.client.fetch_team_details(team_id)
 
-            response = requests.get(api_url)
-            response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
-            
-            return response.json()
-        except Exception as e:
-            print(f"Failed to fetch details for team ID '{team_id}' in game '{game}': {e}")
-            return None
+    # Function to fetch only the player names of a team, without loading the season history into memory
+    def fetch_player_names(self, team_id):
+        return self.client.stream_team_details(team_id, ["team.players[*].playerName"])["team.players[*].playerName"]
 
     # Function to print player names from the detailed team data
     def print_player_names(self, game, team_name):
@@ -52,20 +32,18 @@ class TeamFetcher:
             print(f"Team Data for {team_name} in {game}:")
             
             # Find a case-insensitive match for the team name
-            matched_team = next((team for team in team_data if team['name'].lower() == team_name.lower()), None)
+            matched_team = find_exact_match(team_data, team_name)
 
             if matched_team:
                 team_id = matched_team['id']
                 print(f"Found matching team '{matched_team['name']}' with ID: {team_id}")
                 
-                # Fetch detailed team information using the team ID
-                team_details = self.fetch_team_details(game, team_id)
-                if team_details and 'team' in team_details and 'players' in team_details['team']:
-                    players = team_details['team']['players']
-                    
+                # Only the player names are needed, so stream them out of the (large) team details response
+                player_names = self.fetch_player_names(team_id)
+                if player_names:
                     print(f"Player Names in Team '{matched_team['name']}':")
-                    for player in players:
-                        print(player['playerName'])  # Print the player's name
+                    for player_name in player_names:
+                        print(player_name)  # Print the player's name
                 else:
                     print(f"Failed to fetch player data for team '{matched_team['name']}'")
             else:
@@ -1,27 +1,20 @@
-import requests
+import os
+import sys
 import time
 
+# The shared VRML client package lives at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from VRML_Client import get_client, find_exact_match
+
 class TeamFetcher:
-    def __init__(self):
-        pass
+    def __init__(self, client=None):
+        # Reuse the process-wide client so every lookup shares one connection pool
+        self.client = client or get_client()
 
     # Function to fetch team data from VR Master League API
     def fetch_team_data(self, game, team_name):
-        try:
-            # Build the API URL dynamically based on the game and team
-            api_url = f'https://api.vrmasterleague.com/{game}/Teams/Search'
-            params = {"name": team_name}
-            
-            # Print the API URL before making the request
-            print(f"Fetching data from URL: {api_url}?name={team_name}")
-
-            response = requests.get(api_url, params=params)
-            response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
-            
-            return response.json()
-        except Exception as e:
-            print(f"Failed to fetch data for team '{team_name}' in game '{game}': {e}")
-            return None
+        return self.client.search_teams(game, team_name)
 
     # Function to print the entire team data response
     def print_team_data(self, game, team_name):
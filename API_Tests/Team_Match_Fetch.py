@@ -1,9 +1,17 @@
 import os
-import requests
+import sys
 import json
 
+# The shared VRML client package lives at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from VRML_Client import get_client, find_exact_match
+
 class MatchFetcher:
-    def __init__(self):
+    def __init__(self, client=None):
+        # Reuse the process-wide client so every lookup shares one connection pool
+        self.client = client or get_client()
+
         # Ensure the directory for storing match data exists
         self.directory = 'Match_By_Team'
         if not os.path.exists(self.directory):
@@ -11,41 +19,11 @@ class MatchFetcher:
 
     # Function to fetch team data from VR Master League API (Search by name)
     def fetch_team_data(self, game, team_name):
-        try:
-            # Build the API URL dynamically based on the game and team
-            api_url = f'https://api.vrmasterleague.com/{game}/Teams/Search'
-            params = {"name": team_name}
-            
-            # Print the API URL before making the request
-            print(f"Fetching data from URL: {api_url}?name={team_name}")
-
-            response = requests.get(api_url, params=params)
-            response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
-            
-            return response.json()
-        except Exception as e:
-            print(f"Failed to fetch data for team '{team_name}' in game '{game}': {e}")
-            return None
+        return self.client.search_teams(game, team_name)
 
-    # Function to recursively search for the upcomingMatches key in the data
-    def find_upcoming_matches(self, data):
-        matches = []
-
-        # If the data is a dictionary, check if the key is present
-        if isinstance(data, dict):
-            if "upcomingMatches" in data:
-                matches.extend(data["upcomingMatches"])
-            
-            # Recursively check nested dictionaries or lists
-            for key, value in data.items():
-                matches.extend(self.find_upcoming_matches(value))
-        
-        # If the data is a list, check each item
-        elif isinstance(data, list):
-            for item in data:
-                matches.extend(self.find_upcoming_matches(item))
-
-        return matches
+    # Function to fetch only the upcoming matches of a team, streamed out of the team details response
+    def fetch_upcoming_matches(self, team_id):
+        return self.client.stream_team_details(team_id, ["team.upcomingMatches"])["team.upcomingMatches"]
 
     # Function to save the upcoming matches response to a JSON file
     def save_upcoming_matches(self, team_name, upcoming_matches):
@@ -67,24 +45,19 @@ class MatchFetcher:
             print(f"Team Data for {team_name} in {game}:")
             
             # Find a case-insensitive match for the team name
-            matched_team = next((team for team in team_data if team['name'].lower() == team_name.lower()), None)
+            matched_team = find_exact_match(team_data, team_name)
 
             if matched_team:
                 team_id = matched_team['id']
                 print(f"Found matching team '{matched_team['name']}' with ID: {team_id}")
                 
-                # Fetch detailed team information using the team ID
-                team_details = self.fetch_team_details(game, team_id)
-                if team_details:
-                    # Find upcoming matches in the team details
-                    upcoming_matches = self.find_upcoming_matches(team_details)
-                    if upcoming_matches:
-                        # Save the entire upcoming matches response to a JSON file
-                        self.save_upcoming_matches(matched_team['name'], upcoming_matches)
-                    else:
-                        print(f"No upcoming matches found for team '{matched_team['name']}'")
+                # Pull team.upcomingMatches out of the team details without parsing the rest of the document
+                upcoming_matches = self.fetch_upcoming_matches(team_id)
+                if upcoming_matches:
+                    # Save the entire upcoming matches response to a JSON file
+                    self.save_upcoming_matches(matched_team['name'], upcoming_matches)
                 else:
-                    print(f"Failed to fetch detailed information for team '{matched_team['name']}'")
+                    print(f"No upcoming matches found for team '{matched_team['name']}'")
             else:
                 print(f"No exact match found for team '{team_name}' (case-insensitive).")
         else:
@@ -92,20 +65,8 @@ class MatchFetcher:
 
     # Function to fetch detailed data for a team using the team ID (removed storing team data)
     def fetch_team_details(self, game, team_id):
-        try:
-            # Build the API URL to get detailed information about the team
-            api_url = f'https://api.vrmasterleague.com/teams/{team_id}'  # Correct endpoint format
-            
-            # Print the API URL before making the request
-            print(f"Fetching detailed data from URL: {api_url}")
-
-            response = requests.get(api_url)
-            response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
-            
-            return response.json()
-        except Exception as e:
-            print(f"Failed to fetch details for team ID '{team_id}' in game '{game}': {e}")
-            return None
+        # Team IDs are unique across games, so the game is only kept for the callers' signature
+        return self.client.fetch_team_details(team_id)
 
 
 # Example usage:
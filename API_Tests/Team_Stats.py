@@ -1,57 +1,67 @@
-import requests
+import os
+import sys
 import time
 
+# The shared VRML client package lives at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from VRML_Client import get_client
+from VRML_Client.Name_Index import best_match
+from VRML_Client.Snapshot import load_snapshot, np
+
 class TeamFetcher:
-    def __init__(self):
-        pass
+    def __init__(self, client=None):
+        # Reuse the process-wide client so every lookup shares one connection pool
+        self.client = client or get_client()
 
     # Function to fetch team data from VR Master League API (Search by name)
     def fetch_team_data(self, game, team_name):
-        try:
-            # Build the API URL dynamically based on the game and team
-            api_url = f'https://api.vrmasterleague.com/{game}/Teams/Search'
-            params = {"name": team_name}
-            
-            # Print the API URL before making the request
-            print(f"Fetching data from URL: {api_url}?name={team_name}")
-
-            response = requests.get(api_url, params=params)
-            response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
-            
-            return response.json()
-        except Exception as e:
-            print(f"Failed to fetch data for team '{team_name}' in game '{game}': {e}")
-            return None
+        return self.client.search_teams(game, team_name)
 
     # Function to fetch statistics between two teams using their IDs
     def fetch_team_statistics(self, game, team_id1, team_id2):
-        try:
-            # Build the API URL to get the statistical information between two teams
-            api_url = f'https://api.vrmasterleague.com/Teams/{team_id1}/{team_id2}'
+        return self.client.fetch_team_statistics(team_id1, team_id2)
 
-            # Print the API URL before making the request
-            print(f"Fetching statistics from URL: {api_url}")
+    # Function to print the predicted result and head-to-head record from a saved league snapshot (League_Snapshot.py)
+    def print_prediction(self, game, team1, team2):
+        if np is None:
+            return
+        snapshot = load_snapshot(game)
+        if snapshot is None:
+            print(f"No snapshot saved for '{game}', run League_Snapshot.py for predictions.")
+            return
 
-            response = requests.get(api_url)
-            response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
-            
-            return response.json()
-        except Exception as e:
-            print(f"Failed to fetch statistics between teams '{team_id1}' and '{team_id2}' in game '{game}': {e}")
-            return None
+        from VRML_Client.Analytics import LeagueAnalytics
+        analytics = LeagueAnalytics(snapshot)
+        probability = analytics.predict(team1['id'], team2['id'])
+        if probability is None:
+            print("One or both teams aren't in the saved snapshot.")
+            return
+        print(f"Predicted: {team1['name']} {probability:.0%} - {1 - probability:.0%} {team2['name']}")
+        record = analytics.head_to_head(team1['id'], team2['id'])
+        if record and record[2]:
+            print(f"Head to head: {record[0]} wins, {record[1]} losses in {record[2]} matches")
 
     # Function to print the statistics between two teams
     def print_team_statistics(self, game, team_name1, team_name2):
-        # Fetch the team data for both teams
-        team_data1 = self.fetch_team_data(game, team_name1)
-        team_data2 = self.fetch_team_data(game, team_name2)
+        # Fetch the team data for both teams at the same time, they don't depend on each other
+        team_data1, team_data2 = self.client.fan_out([
+            lambda: self.fetch_team_data(game, team_name1),
+            lambda: self.fetch_team_data(game, team_name2),
+        ])
 
         if team_data1 and team_data2:
-            # Extract the team IDs from the fetched team data
-            team_id1 = team_data1[0]['id']  # Assuming the first match is the correct one
-            team_id2 = team_data2[0]['id']  # Assuming the first match is the correct one
-            
-            print(f"Team 1 ID: {team_id1}, Team 2 ID: {team_id2}")
+            # Pick the closest name in each search result instead of whichever team is listed first
+            team1 = best_match(team_data1, team_name1)
+            team2 = best_match(team_data2, team_name2)
+            if not team1 or not team2:
+                print(f"No close match found for one or both teams '{team_name1}' and '{team_name2}'.")
+                return
+            team_id1 = team1['id']
+            team_id2 = team2['id']
+
+            print(f"Team 1: {team1['name']} ({team_id1}), Team 2: {team2['name']} ({team_id2})")
+            self.print_prediction(game, team1, team2)
             
             # Fetch the statistical data between the two teams
             stats = self.fetch_team_statistics(game, team_id1, team_id2)
@@ -0,0 +1,62 @@
+import os
+import random
+import sys
+import time
+
+# The shared VRML client package lives at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from VRML_Client.Availability import AvailabilityStore
+from VRML_Client.Match_Scheduler import propose_schedule
+from VRML_Client.Models import Match
+
+WEEK_START = 1735516800  # Monday 2024-12-30 00:00 UTC
+HOUR = 60 * 60
+
+# Function to build a synthetic league: `teams_per_region` teams in each region, each playing `matches_per_team` unscheduled
+# matches this week, with a few evening windows of availability per team and some casters
+def synthetic_league(regions, teams_per_region, matches_per_team, casters, seed=1):
+    generator = random.Random(seed)
+    # Kept in memory, the benchmark shouldn't touch the bot's saved availability
+    availability = AvailabilityStore(":memory:")
+    matches = []
+
+    for region in range(regions):
+        # Regions play in different hours of the UTC day
+        evening = 17 + region * 6
+        team_ids = [f"team-{region}-{number}" for number in range(teams_per_region)]
+        for team_id in team_ids:
+            for day in generator.sample(range(7), 3):
+                start = WEEK_START + day * 24 * HOUR + (evening + generator.randint(-1, 2)) * HOUR
+                availability.add_team_window(team_id, start, start + generator.randint(2, 4) * HOUR)
+
+        for number, team_id in enumerate(team_ids):
+            for offset in range(1, matches_per_team + 1):
+                opponent = team_ids[(number + offset) % teams_per_region]
+                matches.append(Match.from_json({
+                    "matchID": f"match-{len(matches)}", "week": 1, "isScheduled": False,
+                    "homeTeam": {"teamID": team_id, "teamName": team_id, "regionName": f"Region {region}"},
+                    "awayTeam": {"teamID": opponent, "teamName": opponent, "regionName": f"Region {region}"},
+                }))
+
+    for caster in range(casters):
+        for day in range(7):
+            start = WEEK_START + day * 24 * HOUR + generator.randint(16, 30) * HOUR
+            availability.add_caster_window(f"caster-{caster}", f"Caster {caster}", start, start + 4 * HOUR)
+    return matches, availability
+
+# Function to time one solve and print what it placed
+def run(regions, teams_per_region, matches_per_team, casters):
+    matches, availability = synthetic_league(regions, teams_per_region, matches_per_team, casters)
+    started = time.perf_counter()
+    proposals, unplaced = propose_schedule(matches, availability, WEEK_START, WEEK_START + 8 * 24 * HOUR)
+    elapsed = time.perf_counter() - started
+
+    cast = sum(1 for proposal in proposals if proposal["caster_id"] is not None)
+    overlapping = sum(1 for proposal in proposals if proposal["overlaps"])
+    print(f"{len(matches):>5} matches ({regions} regions x {teams_per_region} teams, {casters} casters): "
+          f"{elapsed * 1000:8.1f}ms, {len(proposals)} placed, {len(unplaced)} unplaced, {cast} with a caster, {overlapping} overlapping")
+
+if __name__ == "__main__":
+    for regions, teams_per_region, matches_per_team, casters in ((1, 20, 1, 3), (3, 40, 1, 6), (3, 100, 2, 10), (4, 200, 2, 20)):
+        run(regions, teams_per_region, matches_per_team, casters)
@@ -0,0 +1,302 @@
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import types
+
+# The shared VRML client package lives at the repository root, the cogs import their helpers from the bot directory
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "API_Tests"))
+sys.path.insert(0, os.path.join(ROOT, "VRML Scheduler Bot"))
+
+from VRML_Client.Async_Client import AsyncVRMLClient
+from VRML_Client.Cache import ResponseCache
+from VRML_Client.Client import VRMLClient
+from VRML_Client.Models import Match, Team
+from VRML_Client.Name_Index import NameIndex
+from VRML_Client.Rate_Limit import CircuitBreaker, TokenBucket
+from VRML_Client.Schedule import MatchSchedule
+from VRML_Client.Transport import FixtureStore, ReplayTransport
+from Matches_by_Game import MatchFetcher
+
+SAMPLES = os.path.join(ROOT, "API_Tests")
+REGRESSION_THRESHOLD = 0.25  # A median this much slower than the baseline is reported as a regression
+WEEK_SECONDS = 7 * 24 * 60 * 60
+
+# Function to turn a game name from a response ("Echo Arena") into the name used in API paths ("echoarena")
+def game_slug(game_name):
+    return "".join(game_name.split()).lower()
+
+# Function to record the sample payloads kept in API_Tests as replayable responses, returns the seeded requests
+def seed_from_samples(store):
+    seeded = {"teams": [], "matches": []}
+    for path in sorted(glob.glob(os.path.join(SAMPLES, "Team_By_ID", "*.json"))):
+        with open(path, "r", encoding="utf-8") as sample_file:
+            data = json.load(sample_file)
+        team = data["team"]
+        store.put_json(f"teams/{team['teamID']}", {}, data)
+        # There are no saved search responses, build the one the team's own name would return
+        game = game_slug(team["gameName"])
+        store.put_json(f"{game}/Teams/Search", {"name": team["teamName"]},
+                       [{"id": team["teamID"], "name": team["teamName"], "image": team["teamLogo"]}])
+        seeded["teams"].append((game, team["teamName"], team["teamID"]))
+
+    for path in sorted(glob.glob(os.path.join(SAMPLES, "Player_By_ID", "*.json"))):
+        if os.path.basename(path).startswith("Formatted_"):
+            continue
+        with open(path, "r", encoding="utf-8") as sample_file:
+            for player in json.load(sample_file):
+                store.put_json(f"Players/{player['thisGame']['playerID']}", {}, player)
+
+    with open(os.path.join(SAMPLES, "Match_By_Game", "Matches_breachers.json"), "r", encoding="utf-8") as sample_file:
+        data = json.load(sample_file)
+    # The sample was saved in Matches_by_Game's filtered shape, put it back into the API's
+    store.put_json("breachers/Matches", {"posMin": 1},
+                   {"matchesScheduledUpcoming": data["upcomingMatches"], "matchesUnscheduled": data["unscheduledMatches"]})
+    seeded["matches"].append("breachers")
+    return seeded
+
+# Function to build a client that only ever talks to the fixture store, with its own caches and no rate limit
+def replay_client(client_class, transport):
+    return client_class(disk_cache=False, cache=ResponseCache(), rate_limiter=TokenBucket(1e9, 1e9), breaker=CircuitBreaker(), transport=transport)
+
+# Function to summarise timings (seconds) as milliseconds
+def summarise(timings):
+    timings = sorted(timings)
+    return {"median": timings[len(timings) // 2] * 1000, "p95": timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000,
+            "min": timings[0] * 1000, "runs": len(timings)}
+
+class BenchmarkRunner:
+    def __init__(self, repeat, baseline=None):
+        self.repeat = repeat
+        self.baseline = baseline or {}
+        self.results = {}
+        self.regressions = []
+
+    # Function to time a function `repeat` times (setup runs untimed before each call and its result is passed in)
+    def measure(self, name, function, setup=None):
+        timings = []
+        for _ in range(self.repeat):
+            argument = setup() if setup else None
+            started = time.perf_counter()
+            function(argument) if setup else function()
+            timings.append(time.perf_counter() - started)
+        self.report(name, summarise(timings))
+
+    # Function to time a coroutine function `repeat` times on the running event loop
+    async def measure_async(self, name, function, setup=None):
+        timings = []
+        for _ in range(self.repeat):
+            argument = setup() if setup else None
+            started = time.perf_counter()
+            await (function(argument) if setup else function())
+            timings.append(time.perf_counter() - started)
+        self.report(name, summarise(timings))
+
+    def report(self, name, stats):
+        self.results[name] = stats
+        line = f"{name:<44} median {stats['median']:9.3f}ms   p95 {stats['p95']:9.3f}ms   min {stats['min']:9.3f}ms"
+        previous = self.baseline.get(name)
+        if previous:
+            change = stats["median"] / previous["median"] - 1
+            line += f"   {change:+7.1%} vs baseline"
+            if change > REGRESSION_THRESHOLD:
+                line += "  REGRESSION"
+                self.regressions.append(name)
+        print(line)
+
+# Function to benchmark name lookups on the sample teams plus `extra` synthetic names
+def bench_name_resolution(runner, store, extra):
+    generator = random.Random(1)
+    words = ["Aesir", "Breach", "Echo", "Nova", "Vortex", "Titan", "Rogue", "Phantom", "Storm", "Zenith"]
+    index = NameIndex()
+    data = json.loads(store.get("breachers/Matches", {"posMin": 1})["body"])
+    for match in data["matchesScheduledUpcoming"] + data["matchesUnscheduled"]:
+        for side in ("homeTeam", "awayTeam"):
+            index.add(match[side]["teamID"], match[side]["teamName"])
+    for number in range(extra):
+        index.add(f"synthetic-{number}", f"{generator.choice(words)} {generator.choice(words)} {number}")
+
+    def build(fresh):
+        for entry_id, entry in index.entries.items():
+            fresh.add(entry_id, entry["name"])
+
+    names = [entry["name"] for entry in list(index.entries.values())[:50]]
+    runner.measure(f"names: build index ({len(index)} names)", build, setup=NameIndex)
+    runner.measure("names: 50 exact resolves", lambda: [index.resolve(name) for name in names])
+    runner.measure("names: 50 prefix searches", lambda: [index.search(name[:3]) for name in names])
+    runner.measure("names: 50 fuzzy resolves (typos)", lambda: [index.resolve(name[1:] + "x") for name in names])
+
+# Function to benchmark parsing the sample teams/{id} responses into Team models
+def bench_team_details(runner, store, seeded):
+    bodies = [store.get(f"teams/{team_id}", {})["body"] for _, _, team_id in seeded["teams"]]
+    runner.measure(f"teams: json.loads ({len(bodies)} responses)", lambda: [json.loads(body) for body in bodies])
+    documents = [json.loads(body) for body in bodies]
+    runner.measure(f"teams: Team.from_json ({len(bodies)} responses)", lambda: [Team.from_json(document) for document in documents])
+    teams = [Team.from_json(document) for document in documents]
+    runner.measure("teams: unpack season matches", lambda: [team.season_matches for team in teams])
+
+# Function to benchmark Matches_by_Game's clean_match_data on the sample schedule, scaled up `copies` times
+def bench_clean_match_data(runner, store, copies):
+    data = json.loads(store.get("breachers/Matches", {"posMin": 1})["body"])
+    matches = (data["matchesScheduledUpcoming"] + data["matchesUnscheduled"]) * copies
+    fetcher = MatchFetcher(client=object())
+    runner.measure(f"matches: clean_match_data ({len(matches)} matches)", lambda: fetcher.clean_match_data(matches))
+    runner.measure(f"matches: Match.from_json ({len(matches)} matches)", lambda: [Match.from_json(match) for match in matches])
+
+# Function to build a schedule payload of `weeks` copies of the sample, each copy shifted a week later with its own IDs
+def scaled_schedule(store, weeks):
+    data = json.loads(store.get("breachers/Matches", {"posMin": 1})["body"])
+    upcoming, unscheduled = [], []
+    for week in range(weeks):
+        for source, target in ((data["matchesScheduledUpcoming"], upcoming), (data["matchesUnscheduled"], unscheduled)):
+            for match in source:
+                copy = dict(match, matchID=f"{match['matchID']}-{week}")
+                epoch = Match.from_json(match).scheduled_epoch
+                if epoch is not None:
+                    copy["dateScheduledUTC"] = time.strftime("%Y-%m-%d %H:%M", time.gmtime(epoch + week * WEEK_SECONDS))
+                target.append(copy)
+    return {"matchesScheduledUpcoming": upcoming, "matchesUnscheduled": unscheduled}
+
+# Function to benchmark loading a schedule and the queries the bot answers from it
+def bench_schedule_queries(runner, store, weeks):
+    payload = scaled_schedule(store, weeks)
+    size = len(payload["matchesScheduledUpcoming"]) + len(payload["matchesUnscheduled"])
+    runner.measure(f"schedule: first load ({size} matches)", lambda schedule: schedule.update("breachers", None, payload), setup=MatchSchedule)
+
+    schedule = MatchSchedule()
+    schedule.update("breachers", None, payload)
+    runner.measure(f"schedule: unchanged poll ({size} matches)", lambda: schedule.update("breachers", None, payload))
+
+    now = min(match.scheduled_epoch for match in schedule.matches("breachers") if match.scheduled_epoch)
+    teams = sorted({match.home.name for match in schedule.matches("breachers") if match.home})[:20]
+    divisions = sorted({match.home.division for match in schedule.matches("breachers") if match.home and match.home.division})
+    runner.measure("schedule: next 10 matches", lambda: schedule.upcoming("breachers", now=now))
+    runner.measure(f"schedule: next matches of {len(teams)} teams", lambda: [schedule.upcoming("breachers", team_name=team, now=now) for team in teams])
+    runner.measure(f"schedule: {len(divisions)} divisions, next 24h", lambda: [schedule.upcoming("breachers", division=division, hours=24, now=now) for division in divisions])
+
+# Function to benchmark the sync client path (cache miss -> transport -> JSON) on replayed responses
+def bench_client(runner, transport, seeded):
+    client = replay_client(VRMLClient, transport)
+
+    # A fresh memory cache every run, so each one goes through the transport
+    def cold_lookup(cache):
+        client.cache = cache
+        for game, team_name, _ in seeded["teams"]:
+            found = client.search_teams(game, team_name)
+            Team.from_json(client.fetch_team_details(found[0]["id"]))
+
+    runner.measure(f"client: search + details, cold ({len(seeded['teams'])} teams)", cold_lookup, setup=ResponseCache)
+    runner.measure(f"client: search + details, cached ({len(seeded['teams'])} teams)", lambda: [client.search_teams(game, name) for game, name, _ in seeded["teams"]])
+    client.close()
+
+# Function to benchmark /team-by-name end to end: the cog, the work queue, the async client and the replayed API
+async def bench_command(runner, transport, seeded):
+    try:
+        from Work_Queue import WorkQueue
+        from VRML_Client.Name_Index import NameDirectory
+        from commands.Team_By_Name_Command import TeamByNameCog
+        from Cards import CardCache
+    except ImportError as e:
+        print(f"Skipping the command benchmarks: {e}")
+        return
+
+    bot = types.SimpleNamespace(config={}, names=NameDirectory(), vrml=replay_client(AsyncVRMLClient, transport), work_queue=WorkQueue())
+    # Cards hotlink their logos here, compositing would download them from VRML
+    bot.cards = CardCache(bot, composite=False)
+    await bot.work_queue.start()
+    cog = TeamByNameCog.__new__(TeamByNameCog)
+    cog.bot = bot
+
+    # Just enough of a discord.Interaction for run_deferred and the cog
+    class Response:
+        async def defer(self, **kwargs):
+            pass
+
+        async def send_message(self, **kwargs):
+            pass
+
+    class Interaction:
+        client = bot
+        guild_id = 1
+
+        def __init__(self):
+            self.response = Response()
+            self.edits = []
+
+        async def edit_original_response(self, **kwargs):
+            self.edits.append(kwargs)
+
+    # Commands that answered with an error message instead of the team (expected with --error-rate)
+    unanswered = []
+
+    async def run_command(cache):
+        bot.vrml.cache = cache
+        bot.names = NameDirectory()
+        for game, team_name, _ in seeded["teams"]:
+            interaction = Interaction()
+            await cog.teambyname.callback(cog, interaction, game, team_name)
+            if not interaction.edits or "embed" not in interaction.edits[-1]:
+                unanswered.append(team_name)
+
+    await runner.measure_async(f"command: /team-by-name, cold ({len(seeded['teams'])} teams)", run_command, setup=ResponseCache)
+    await runner.measure_async(f"command: /team-by-name, cached ({len(seeded['teams'])} teams)",
+                               lambda: asyncio.gather(*[cog.teambyname.callback(cog, Interaction(), game, name) for game, name, _ in seeded["teams"]]))
+    if unanswered:
+        print(f"{len(unanswered)} /team-by-name runs didn't answer with the team")
+    await bot.work_queue.close()
+    await bot.vrml.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the VRML data path, replayed from recorded responses")
+    parser.add_argument("--fixtures", help="Replay this FixtureStore directory (e.g. Cache/Fixtures) instead of the API_Tests samples")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every replayed request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra seconds per replayed request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of replayed requests that fail like a dropped connection")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per benchmark")
+    parser.add_argument("--save", help="Write the results to this JSON file to use as a baseline")
+    parser.add_argument("--compare", help="Compare against a baseline saved with --save, exits with 1 on a regression")
+    args = parser.parse_args()
+    # Injected failures would log a warning per request and drown the results
+    logging.basicConfig(level=logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = FixtureStore(directory)
+        seeded = seed_from_samples(store)
+        if args.fixtures:
+            # Recorded responses take over, the samples still fill in anything that wasn't recorded
+            for name in os.listdir(args.fixtures):
+                if name.endswith(".json"):
+                    with open(os.path.join(args.fixtures, name), "r", encoding="utf-8") as fixture_file:
+                        fixture = json.load(fixture_file)
+                    store.put(fixture["path"], fixture["params"], fixture["status"], fixture["headers"], fixture["body"])
+
+        baseline = None
+        if args.compare:
+            with open(args.compare, "r", encoding="utf-8") as baseline_file:
+                baseline = json.load(baseline_file)
+        runner = BenchmarkRunner(args.repeat, baseline)
+        transport = ReplayTransport(store, args.latency, args.jitter, args.error_rate, seed=1)
+
+        bench_name_resolution(runner, store, 5000)
+        bench_team_details(runner, store, seeded)
+        bench_clean_match_data(runner, store, 25)
+        bench_schedule_queries(runner, store, 50)
+        bench_client(runner, transport, seeded)
+        asyncio.run(bench_command(runner, transport, seeded))
+        print(f"{transport.requests} replayed requests, {transport.misses} without a fixture")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as results_file:
+            json.dump(runner.results, results_file, indent=4)
+        print(f"Results saved to {args.save}")
+    if runner.regressions:
+        print(f"{len(runner.regressions)} regression(s) over {REGRESSION_THRESHOLD:.0%}: {', '.join(runner.regressions)}")
+        sys.exit(1)
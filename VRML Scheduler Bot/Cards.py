@@ -0,0 +1,324 @@
+import discord
+import aiohttp
+import asyncio
+import collections
+import hashlib
+import io
+import json
+import logging
+import os
+import time
+from urllib.parse import parse_qs, urlsplit
+from VRML_Client.Disk_Cache import DEFAULT_PATH as CACHE_PATH
+from VRML_Client.Models import TBD_NAME
+from VRML_Client.Single_Flight import SingleFlight
+
+# Pillow is optional, without it cards hotlink the logos from VRML instead of showing one composited image
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+SITE_URL = "https://vrmasterleague.com"
+CARD_DIR = os.path.join(os.path.dirname(CACHE_PATH), "Cards")
+LOGO_DIR = os.path.join(os.path.dirname(CACHE_PATH), "Logos")
+MAX_CARDS = 512  # Built cards kept in memory, least recently shown are dropped first
+LOGO_SIZE = 256  # Each team logo is fitted into a square this big
+BADGE_SIZE = 80  # The division logo drawn in the corner of a team's logo
+LOGO_GAP = 48  # Space between the two logos of a match card
+# Discord's attachment URLs are signed and expire, upload the image again a little before they do
+UPLOAD_MARGIN = 3600
+
+# Function to hash the data a card shows, the card is rebuilt whenever it changes
+def payload_hash(payload):
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+# Function to turn a VRML image path ("/images/logos/teams/....png") into its URL
+def logo_url(path):
+    return f"{SITE_URL}{path}" if path else None
+
+# Function to read when a Discord attachment URL expires (its hex "ex" parameter), None if it doesn't say
+def url_expiry(url):
+    try:
+        return int(parse_qs(urlsplit(url).query)["ex"][0], 16)
+    except (KeyError, ValueError):
+        return None
+
+# Function to pick the fields of a team (a TeamRef or a name index entry) that its cards show, None is a team that
+# isn't decided yet (e.g. a playoff slot)
+def team_payload(team):
+    if team is None:
+        return {"id": None, "name": TBD_NAME, "logo": None, "division": None, "division_logo": None}
+    if isinstance(team, dict):
+        return {"id": team.get("id"), "name": team.get("name"), "logo": team.get("logo"),
+                "division": team.get("division"), "division_logo": team.get("division_logo")}
+    return {"id": team.team_id, "name": team.name, "logo": team.logo, "division": team.division, "division_logo": team.division_logo}
+
+def read_file(path):
+    try:
+        with open(path, "rb") as file:
+            return file.read()
+    except OSError:
+        return None
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "wb") as file:
+        file.write(data)
+    os.replace(path + ".tmp", path)
+
+# Function to draw logos side by side (and a division badge in the corner of the last one) into one PNG
+def render_logos(path, logos, badge=None):
+    canvas = Image.new("RGBA", (LOGO_SIZE * len(logos) + LOGO_GAP * (len(logos) - 1), LOGO_SIZE), (0, 0, 0, 0))
+    for position, data in enumerate(logos):
+        logo = Image.open(io.BytesIO(data)).convert("RGBA")
+        logo.thumbnail((LOGO_SIZE, LOGO_SIZE))
+        canvas.alpha_composite(logo, (position * (LOGO_SIZE + LOGO_GAP) + (LOGO_SIZE - logo.width) // 2, (LOGO_SIZE - logo.height) // 2))
+    if badge is not None:
+        badge = Image.open(io.BytesIO(badge)).convert("RGBA")
+        badge.thumbnail((BADGE_SIZE, BADGE_SIZE))
+        canvas.alpha_composite(badge, (canvas.width - badge.width, canvas.height - badge.height))
+    output = io.BytesIO()
+    canvas.save(output, "PNG")
+    write_file(path, output.getvalue())
+
+# Function to show both teams' logos on an embed that has no composited image: home as the author icon, away in the footer
+def versus_logos(embed, home, away, path):
+    if path is None:
+        embed.set_author(name=home["name"], icon_url=logo_url(home["logo"]))
+        embed.set_footer(text=away["name"], icon_url=logo_url(away["logo"]))
+    return embed
+
+# A built card: its embed and, when the logos were composited, the local PNG the embed shows
+class Card:
+    __slots__ = ("key", "embed", "path")
+
+    def __init__(self, key, embed, path=None):
+        self.key = key
+        self.embed = embed
+        self.path = path
+
+    @property
+    def filename(self):
+        return os.path.basename(self.path) if self.path else None
+
+# Team, match and head-to-head cards built once per version of their data. A card is keyed by its kind, subject
+# (team or match ID) and a hash of what it shows, so a repeat view is a dict lookup and the next version simply
+# replaces the last one. Building a card never waits: until its logos are composited (in the background, into
+# Cache/Cards) it hotlinks them from VRML, then the composited card takes its place. Each composited image is
+# uploaded to Discord once, later views point at the uploaded copy
+class CardCache:
+    def __init__(self, bot, directory=CARD_DIR, logo_directory=LOGO_DIR, max_cards=MAX_CARDS, composite=True):
+        self.bot = bot
+        # composite=False always hotlinks the logos
+        self.composite_logos = composite and Image is not None
+        self.directory = directory
+        self.logo_directory = logo_directory
+        self.max_cards = max_cards
+        self.cards = collections.OrderedDict()  # (kind, subject, hash) -> Card, least recently shown first
+        self.latest = {}  # (kind, subject) -> key of the version built last
+        self.uploaded = {}  # PNG file name -> (Discord URL, expiry epoch or None)
+        self.hits = {}  # kind -> cards served without building
+        self.builds = {}  # kind -> cards built
+        # Cards waiting on the same logos share one download and render
+        self.flight = SingleFlight()
+        self.tasks = set()
+
+    # Function to get a card, build(payload, image path or None) only runs for a version that hasn't been built yet.
+    # logos (and the badge) are composited into the card's image when Pillow is installed
+    def get(self, kind, subject, payload, build, logos, badge=None):
+        key = (kind, subject, payload_hash(payload))
+        card = self.cards.get(key)
+        if card is not None:
+            self.cards.move_to_end(key)
+            self.hits[kind] = self.hits.get(kind, 0) + 1
+            return card
+
+        path = self.composite_path(logos, badge)
+        ready = path is not None and os.path.exists(path)
+        card = self.store(Card(key, build(payload, path if ready else None), path if ready else None))
+        if path is not None and not ready:
+            task = asyncio.ensure_future(self.upgrade(card, payload, build, logos, badge))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+        return card
+
+    def store(self, card):
+        key = card.key
+        self.builds[key[0]] = self.builds.get(key[0], 0) + 1
+        previous = self.latest.get(key[:2])
+        if previous is not None and previous != key:
+            self.cards.pop(previous, None)
+        self.latest[key[:2]] = key
+        self.cards[key] = card
+        while len(self.cards) > self.max_cards:
+            dropped, _ = self.cards.popitem(last=False)
+            if self.latest.get(dropped[:2]) == dropped:
+                del self.latest[dropped[:2]]
+        return card
+
+    # Function to composite a card's logos and swap in the card showing them, unless a newer version replaced it meanwhile
+    async def upgrade(self, card, payload, build, logos, badge):
+        path = await self.flight.run("logos", self.composite_path(logos, badge), lambda: self.composite(logos, badge))
+        if path is not None and self.cards.get(card.key) is card:
+            self.cards[card.key] = Card(card.key, build(payload, path), path)
+
+    # Function to get the card of a team (a name index entry or a TeamRef)
+    def team_card(self, team):
+        payload = team_payload(team)
+        return self.get("team", payload["id"], payload, self.build_team, [payload["logo"]], payload["division_logo"])
+
+    @staticmethod
+    def build_team(team, path):
+        embed = discord.Embed(
+            title=f"{team['name']}",
+            description=team["division"],
+            color=discord.Color.green(),
+        )
+        if path is None:
+            embed.set_image(url=logo_url(team["logo"]))
+            if team["division_logo"]:
+                embed.set_thumbnail(url=logo_url(team["division_logo"]))
+        return embed
+
+    # Function to get the card of a match from the schedule
+    def match_card(self, match):
+        payload = {"id": match.match_id, "week": match.week, "scheduled": match.scheduled_epoch,
+                   "home": team_payload(match.home), "away": team_payload(match.away)}
+        logos = [team["logo"] for team in (payload["home"], payload["away"]) if team["logo"]]
+        return self.get("match", match.match_id, payload, self.build_match, logos)
+
+    @staticmethod
+    def build_match(match, path):
+        home, away = match["home"], match["away"]
+        when = f"<t:{match['scheduled']}:F>" if match["scheduled"] else "Not scheduled yet"
+        embed = discord.Embed(
+            title=f"{home['name']} vs {away['name']}",
+            description=f"{when} - Week {match['week']} ({home['division'] or away['division'] or 'no division'})",
+            color=discord.Color.green(),
+        )
+        return versus_logos(embed, home, away, path)
+
+    # Function to get the head-to-head card of two teams: record is (wins, losses, games) of home against away,
+    # probability home's chance to win (or None) and match their next meeting (or None)
+    def head_to_head_card(self, home, away, record, probability, match=None):
+        payload = {"home": team_payload(home), "away": team_payload(away), "record": list(record) if record else None,
+                   "probability": round(probability, 3) if probability is not None else None,
+                   "next": [match.match_id, match.scheduled_epoch] if match else None}
+        subject = f"{payload['home']['id']}:{payload['away']['id']}"
+        return self.get("head-to-head", subject, payload, self.build_head_to_head, [payload["home"]["logo"], payload["away"]["logo"]])
+
+    @staticmethod
+    def build_head_to_head(data, path):
+        home, away = data["home"], data["away"]
+        embed = discord.Embed(
+            title=f"{home['name']} vs {away['name']} - head to head",
+            color=discord.Color.green(),
+        )
+        if data["record"] is None:
+            embed.add_field(name="Record", value="Not in the league snapshot", inline=False)
+        elif data["record"][2]:
+            wins, losses, games = data["record"]
+            embed.add_field(name="Record", value=f"{home['name']} {wins}-{losses} {away['name']} ({games} played)", inline=False)
+        else:
+            embed.add_field(name="Record", value="They haven't played each other", inline=False)
+        if data["probability"] is not None:
+            embed.add_field(name="Prediction", value=f"{home['name']} {data['probability']:.0%} - {1 - data['probability']:.0%} {away['name']}", inline=False)
+        if data["next"]:
+            embed.add_field(name="Next match", value=f"<t:{data['next'][1]}:F>" if data["next"][1] else "Not scheduled yet", inline=False)
+        return versus_logos(embed, home, away, path)
+
+    # Function to get where the PNG of these logos is kept, or None when they can't be composited. The file is named
+    # after the logos, so every card showing them shares it
+    def composite_path(self, logos, badge=None):
+        if not self.composite_logos or not logos or not all(logos):
+            return None
+        return os.path.join(self.directory, f"logos_{payload_hash([logos, badge])}.png")
+
+    # Function to download and render the PNG of these logos, returns its path or None if a logo couldn't be used
+    async def composite(self, logos, badge=None):
+        path = self.composite_path(logos, badge)
+        images = await asyncio.gather(*(self.logo(logo) for logo in logos + [badge] if logo))
+        if not all(images):
+            return None
+        try:
+            await asyncio.to_thread(render_logos, path, images[:len(logos)], images[len(logos)] if badge else None)
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to composite logos %s: %s", logos, e)
+            return None
+        return path
+
+    # Function to get a logo's bytes, downloaded once into Cache/Logos
+    async def logo(self, image_path):
+        file_path = os.path.join(self.logo_directory, image_path.strip("/").replace("/", "_"))
+        data = await asyncio.to_thread(read_file, file_path)
+        if data is not None:
+            return data
+        session = self.bot.vrml.session
+        if session is None or session.closed:
+            return None
+        try:
+            async with session.get(logo_url(image_path)) as response:
+                if response.status != 200:
+                    logger.warning("Failed to download logo %s: %s", image_path, response.status)
+                    return None
+                data = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning("Failed to download logo %s: %s", image_path, e)
+            return None
+        await asyncio.to_thread(write_file, file_path, data)
+        return data
+
+    # Function to get the URL of an already uploaded image, None if it was never uploaded or is about to expire
+    def uploaded_url(self, filename):
+        uploaded = self.uploaded.get(filename)
+        if uploaded is None:
+            return None
+        url, expires = uploaded
+        if expires is not None and expires - UPLOAD_MARGIN < time.time():
+            del self.uploaded[filename]
+            return None
+        return url
+
+    # Function to send a card as the reply to an interaction (edit=True for a deferred one), its image is only
+    # attached the first time
+    async def send(self, interaction, card, edit=False):
+        embed = card.embed
+        files = []
+        if card.path is not None:
+            embed = embed.copy()
+            url = self.uploaded_url(card.filename)
+            if url is None:
+                embed.set_image(url=f"attachment://{card.filename}")
+                files = [discord.File(card.path, filename=card.filename)]
+            else:
+                embed.set_image(url=url)
+
+        if edit:
+            message = await interaction.edit_original_response(content=None, embed=embed, attachments=files)
+        elif files:
+            await interaction.response.send_message(embed=embed, files=files)
+            message = await interaction.original_response()
+        else:
+            await interaction.response.send_message(embed=embed)
+            return
+        if files:
+            self.remember_upload(card.filename, message)
+
+    # Function to keep the Discord URL of an image once a message has uploaded it
+    def remember_upload(self, filename, message):
+        for attachment in message.attachments:
+            if attachment.filename == filename:
+                self.uploaded[filename] = (attachment.url, url_expiry(attachment.url))
+                return
+        for embed in message.embeds:
+            if embed.image and embed.image.url and filename in embed.image.url:
+                self.uploaded[filename] = (embed.image.url, url_expiry(embed.image.url))
+                return
+
+    # Function to count cards served from the cache and built, by kind
+    def stats(self):
+        kinds = {kind: {"hits": self.hits.get(kind, 0), "builds": self.builds.get(kind, 0)} for kind in set(self.hits) | set(self.builds)}
+        return {"cards": len(self.cards), "uploaded": len(self.uploaded), "kinds": kinds}
@@ -0,0 +1,339 @@
+import asyncio
+import collections
+import logging
+import logging.handlers
+import math
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from aiohttp import web
+from discord import app_commands
+from discord.ext import commands
+from VRML_Client.Metrics import LatencyHistogram
+
+LOG_FORMAT = "%(asctime)s %(levelname)-8s %(name)s: %(message)s"
+DEFAULT_METRICS_HOST = "127.0.0.1"  # Only reachable from the machine itself unless bot.json says otherwise
+DEFAULT_METRICS_PORT = 9108
+LAG_INTERVAL = 0.5  # Seconds between event loop lag samples
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+BLOCK_THRESHOLD = 0.25  # Seconds the loop can go without running anything else before it counts as blocked
+HEARTBEAT_INTERVAL = 0.05  # How often the loop proves it's alive to the watchdog thread
+BLOCK_HISTORY = 50  # Recent blocks kept for /debug-loop
+STACK_DEPTH = 15  # Innermost frames kept of a blocked stack
+# Where the event loop calls into a callback, frames above it are the loop's own
+LOOP_RUN_FILE = os.path.join("asyncio", "events.py")
+
+logger = logging.getLogger(__name__)
+
+# Function to send every log record through a queue to a background thread, so logging from the event loop never
+# waits on stdout. Returns the listener, stop it on shutdown to flush what's left
+def setup_logging(level="INFO"):
+    records = queue.SimpleQueue()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(records)]
+    root.setLevel(level)
+    listener.start()
+    return listener
+
+# Function to get the (cog, command) labels of an app command
+def command_labels(command):
+    cog = getattr(command, "binding", None)
+    return (cog.qualified_name if cog is not None else "none"), command.qualified_name
+
+class CommandMetrics:
+    def __init__(self):
+        # Only touched from the event loop, so no lock
+        self.histograms = {}  # (cog, command) -> LatencyHistogram of how long the command took to answer
+        self.errors = {}  # (cog, command) -> commands that raised
+
+    # Function to record one finished command
+    def record(self, command, seconds, ok):
+        labels = command_labels(command)
+        histogram = self.histograms.get(labels)
+        if histogram is None:
+            histogram = self.histograms[labels] = LatencyHistogram()
+        histogram.observe(seconds)
+        if not ok:
+            self.errors[labels] = self.errors.get(labels, 0) + 1
+
+# Command tree that stamps every interaction when it arrives, so the bot can time commands and count their errors
+class InstrumentedTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction):
+        interaction.extras["started_at"] = time.perf_counter()
+        return True
+
+    async def on_error(self, interaction, error):
+        command = interaction.command
+        started_at = interaction.extras.get("started_at")
+        if command is not None and started_at is not None:
+            self.client.command_metrics.record(command, time.perf_counter() - started_at, False)
+        await super().on_error(interaction, error)
+
+# Samples how late a short sleep wakes up: anything past the interval is time the loop spent on other callbacks
+class LoopLagMonitor:
+    def __init__(self, interval=LAG_INTERVAL):
+        self.interval = interval
+        self.histogram = LatencyHistogram(LAG_BUCKETS)
+        self.last = 0.0
+        self.max = 0.0
+        self.task = None
+
+    async def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, time.perf_counter() - expected))
+
+    # Function to record one lag sample in seconds
+    def record(self, lag):
+        self.last = lag
+        self.max = max(self.max, lag)
+        self.histogram.observe(lag)
+
+# Function to work out which command a blocked stack belongs to: the command of an `interaction` local if a frame
+# has one, otherwise the cog method the stack is in (e.g. a job running on the work queue), otherwise ("none", "none")
+def command_from_stack(frame):
+    cog_method = None
+    while frame is not None:
+        frame_locals = frame.f_locals
+        command = getattr(frame_locals.get("interaction"), "command", None)
+        if command is not None:
+            return command_labels(command)
+        if cog_method is None and isinstance(frame_locals.get("self"), commands.Cog):
+            cog_method = (type(frame_locals["self"]).__name__, frame.f_code.co_name)
+        frame = frame.f_back
+    return cog_method or ("none", "none")
+
+# Watches the event loop from its own thread. The loop bumps a heartbeat every HEARTBEAT_INTERVAL, when the heartbeat
+# is older than the threshold a callback is hogging the loop, so the thread samples the loop thread's stack until it
+# lets go. Each block is logged with the stack seen most often and the command it came from, and kept for /debug-loop
+class LoopWatchdog:
+    def __init__(self, threshold=BLOCK_THRESHOLD, interval=HEARTBEAT_INTERVAL, history=BLOCK_HISTORY):
+        self.threshold = threshold
+        self.interval = interval
+        self.heartbeat = time.monotonic()
+        self.blocks = collections.deque(maxlen=history)  # Recent block reports, newest last
+        self.counts = {}  # (cog, command) -> blocks since start
+        self.current = None  # The block being sampled right now
+        self.loop_thread = None
+        self.task = None
+        self.thread = None
+        self.stopping = threading.Event()
+
+    async def start(self):
+        self.loop_thread = threading.get_ident()
+        self.heartbeat = time.monotonic()
+        self.task = asyncio.create_task(self.beat())
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.watch, name="loop-watchdog", daemon=True)
+        self.thread.start()
+
+    async def close(self):
+        self.stopping.set()
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        if self.thread is not None:
+            await asyncio.to_thread(self.thread.join)
+            self.thread = None
+
+    async def beat(self):
+        while True:
+            self.heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    # Runs on the watchdog thread
+    def watch(self):
+        while not self.stopping.wait(self.interval):
+            stalled = time.monotonic() - self.heartbeat
+            if stalled < self.threshold + self.interval:
+                if self.current is not None:
+                    self.finish()
+                continue
+            frame = sys._current_frames().get(self.loop_thread)
+            if frame is not None:
+                self.sample(frame, stalled)
+
+    # Function to record one sample of the blocked loop thread's stack
+    def sample(self, frame, stalled):
+        if self.current is None:
+            self.current = {"started_at": time.time() - stalled, "heartbeat": self.heartbeat, "stacks": {}, "samples": 0,
+                            "cog": "none", "command": "none"}
+        stack = traceback.extract_stack(frame)
+        # Only the callback's own frames, starting below the loop's Handle._run
+        for index in range(len(stack) - 1, -1, -1):
+            if stack[index].filename.endswith(LOOP_RUN_FILE):
+                stack = stack[index + 1:]
+                break
+        stack = stack[-STACK_DEPTH:]
+        key = tuple((entry.filename, entry.lineno, entry.name) for entry in stack)
+        count, _ = self.current["stacks"].get(key, (0, stack))
+        self.current["stacks"][key] = (count + 1, stack)
+        self.current["samples"] += 1
+        cog, command = command_from_stack(frame)
+        if command != "none":
+            self.current["cog"], self.current["command"] = cog, command
+
+    # Function to close the current block once the loop has moved on, and report it
+    def finish(self):
+        block = self.current
+        self.current = None
+        # The heartbeat that ended the block came just after the blocking callback returned
+        duration = self.heartbeat - block["heartbeat"] - self.interval
+        _, stack = max(block["stacks"].values(), key=lambda entry: entry[0])
+        report = {"started_at": block["started_at"], "duration": max(duration, self.threshold), "cog": block["cog"],
+                  "command": block["command"], "samples": block["samples"], "stack": "".join(traceback.format_list(stack))}
+        self.blocks.append(report)
+        labels = (report["cog"], report["command"])
+        self.counts[labels] = self.counts.get(labels, 0) + 1
+        logger.warning("Event loop blocked for %.2fs in /%s (%s), most sampled stack:\n%s",
+                       report["duration"], report["command"], report["cog"], report["stack"])
+
+# Builds the Prometheus text format (version 0.0.4, which OpenMetrics scrapers also read)
+class Exposition:
+    def __init__(self):
+        self.lines = []
+
+    # Function to escape a label value (backslashes, quotes and newlines)
+    @staticmethod
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def format_labels(self, labels):
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{key}="{self.escape(value)}"' for key, value in labels.items()) + "}"
+
+    def family(self, name, kind, help_text):
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name, value, **labels):
+        # Counts stay integers, everything else is written as a float
+        self.lines.append(f"{name}{self.format_labels(labels)} {value if isinstance(value, int) else float(value)!r}")
+
+    def histogram(self, name, histogram, **labels):
+        for bound, count in histogram.cumulative():
+            self.sample(f"{name}_bucket", count, **labels, le="+Inf" if bound == float("inf") else repr(bound))
+        self.sample(f"{name}_sum", histogram.sum, **labels)
+        self.sample(f"{name}_count", histogram.count, **labels)
+
+    def text(self):
+        return "\n".join(self.lines) + "\n"
+
+# Function to render every metric of the bot: VRML requests and caches, commands, the work queue and the event loop
+def render_metrics(bot):
+    output = Exposition()
+    histograms, in_flight = bot.vrml.metrics.latency()
+    requests = bot.vrml.metrics.snapshot()
+    cache = bot.vrml.cache.stats()
+
+    output.family("vrml_request_duration_seconds", "histogram", "VRML API requests by endpoint, including retries")
+    for endpoint, histogram in sorted(histograms.items()):
+        output.histogram("vrml_request_duration_seconds", histogram, endpoint=endpoint)
+    output.family("vrml_request_failures_total", "counter", "VRML API requests that failed after their retries")
+    for endpoint, stats in sorted(requests.items()):
+        output.sample("vrml_request_failures_total", stats["failures"], endpoint=endpoint)
+    output.family("vrml_request_retries_total", "counter", "Retried VRML API attempts")
+    for endpoint, stats in sorted(requests.items()):
+        output.sample("vrml_request_retries_total", stats["retries"], endpoint=endpoint)
+    output.family("vrml_requests_in_flight", "gauge", "VRML API requests waiting on the network")
+    for endpoint, count in sorted(in_flight.items()):
+        output.sample("vrml_requests_in_flight", count, endpoint=endpoint)
+
+    output.family("vrml_cache_hits_total", "counter", "Responses served from the in-memory cache")
+    for endpoint, stats in sorted(cache["endpoints"].items()):
+        output.sample("vrml_cache_hits_total", stats["hits"], endpoint=endpoint)
+    output.family("vrml_cache_misses_total", "counter", "Lookups the in-memory cache couldn't answer")
+    for endpoint, stats in sorted(cache["endpoints"].items()):
+        output.sample("vrml_cache_misses_total", stats["misses"], endpoint=endpoint)
+    output.family("vrml_cache_hit_ratio", "gauge", "Share of lookups answered by the in-memory cache")
+    for endpoint, stats in sorted(cache["endpoints"].items()):
+        output.sample("vrml_cache_hit_ratio", stats["hit_ratio"], endpoint=endpoint)
+    output.family("vrml_cache_entries", "gauge", "Responses held in the in-memory cache")
+    output.sample("vrml_cache_entries", cache["entries"])
+
+    output.family("bot_command_duration_seconds", "histogram", "Time from an interaction arriving to its command returning")
+    for (cog, command), histogram in sorted(bot.command_metrics.histograms.items()):
+        output.histogram("bot_command_duration_seconds", histogram, cog=cog, command=command)
+    output.family("bot_command_errors_total", "counter", "Commands that raised an error")
+    for (cog, command), count in sorted(bot.command_metrics.errors.items()):
+        output.sample("bot_command_errors_total", count, cog=cog, command=command)
+
+    queue_stats = bot.work_queue.snapshot()
+    output.family("bot_work_queue_depth", "gauge", "Jobs waiting in the work queue")
+    output.sample("bot_work_queue_depth", queue_stats["depth"])
+    output.family("bot_work_queue_jobs_total", "counter", "Work queue jobs by outcome")
+    for outcome in ("completed", "failed", "rejected"):
+        output.sample("bot_work_queue_jobs_total", queue_stats[outcome], outcome=outcome)
+    output.family("bot_work_queue_wait_seconds", "summary", "Recent time jobs waited for a worker")
+    output.sample("bot_work_queue_wait_seconds", queue_stats["p50_wait"], quantile="0.5")
+    output.sample("bot_work_queue_wait_seconds", queue_stats["p95_wait"], quantile="0.95")
+
+    card_stats = bot.cards.stats()
+    output.family("bot_cards_total", "counter", "Team, match and head-to-head cards served, from the cache or built")
+    for kind, stats in sorted(card_stats["kinds"].items()):
+        output.sample("bot_cards_total", stats["hits"], kind=kind, result="hit")
+        output.sample("bot_cards_total", stats["builds"], kind=kind, result="build")
+    output.family("bot_cards_cached", "gauge", "Built cards held in memory")
+    output.sample("bot_cards_cached", card_stats["cards"])
+
+    output.family("bot_event_loop_lag_seconds", "histogram", "How late the event loop woke a sleeping task")
+    output.histogram("bot_event_loop_lag_seconds", bot.loop_lag.histogram)
+    output.family("bot_event_loop_lag_max_seconds", "gauge", "Worst event loop lag since start")
+    output.sample("bot_event_loop_lag_max_seconds", bot.loop_lag.max)
+    output.family("bot_event_loop_blocks_total", "counter", "Times a callback held the event loop past the watchdog threshold")
+    for (cog, command), count in sorted(bot.watchdog.counts.items()):
+        output.sample("bot_event_loop_blocks_total", count, cog=cog, command=command)
+    output.family("bot_gateway_latency_seconds", "gauge", "Discord heartbeat latency")
+    # latency is nan/inf until the first heartbeat
+    output.sample("bot_gateway_latency_seconds", bot.latency if math.isfinite(bot.latency) else 0.0)
+    output.family("bot_guilds", "gauge", "Guilds this process serves")
+    output.sample("bot_guilds", len(bot.guilds))
+    return output.text()
+
+# Local HTTP endpoint serving /metrics for Prometheus (or anything that scrapes its text format)
+class MetricsServer:
+    def __init__(self, bot, host=DEFAULT_METRICS_HOST, port=DEFAULT_METRICS_PORT):
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.runner = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        try:
+            await web.TCPSite(self.runner, self.host, self.port).start()
+        except OSError as e:
+            # The bot is still useful without metrics, e.g. when another process already has the port
+            logger.warning("Couldn't serve metrics on %s:%s: %s", self.host, self.port, e)
+            await self.close()
+            return
+        logger.info("Serving metrics on http://%s:%s/metrics", self.host, self.port)
+
+    async def close(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def handle(self, request):
+        return web.Response(body=render_metrics(self.bot).encode("utf-8"), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
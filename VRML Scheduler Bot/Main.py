@@ -1,55 +1,216 @@
+import time
+
+# Measured from the very start of the process, startup timings are reported against this
+STARTED_AT = time.perf_counter()
+
 import discord
 from discord.ext import commands
+import argparse
 import asyncio
+import hashlib
 import json
-from commands.Ping import PingCog
-from commands.Team_By_Name_Command import TeamByNameCog
+import logging
+import os
+import subprocess
+import sys
+
+# The shared VRML client package lives at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from VRML_Client.Async_Client import AsyncVRMLClient
+from VRML_Client.Disk_Cache import DEFAULT_PATH as CACHE_PATH
+from VRML_Client.Schedule import MatchSchedule
+from VRML_Client.Name_Index import NameDirectory
+from VRML_Client.Availability import AvailabilityStore
+from Work_Queue import WorkQueue
+from Cards import CardCache
+from Instrumentation import (CommandMetrics, InstrumentedTree, LoopLagMonitor, LoopWatchdog, MetricsServer, setup_logging,
+                             BLOCK_THRESHOLD, DEFAULT_METRICS_HOST, DEFAULT_METRICS_PORT)
+
+COMMANDS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "commands")
+# Hash of the last command tree pushed to Discord, a start with the same commands skips the sync
+TREE_HASH_PATH = os.path.join(os.path.dirname(CACHE_PATH), "command_tree.sha256")
 
 with open("bot.json") as botFile:
     bot = json.load(botFile)
     botFile.close()
 
+# Every log record (ours, the VRML client's and discord.py's) is written by a background thread, never by the event loop
+log_listener = setup_logging(bot.get("logLevel", "INFO"))
+logger = logging.getLogger("scheduler")
+
 token =   bot["token"]
 clientid = bot["clientID"]
 prefix = "!!"
 
+parser = argparse.ArgumentParser()
+parser.add_argument("--sync", action="store_true", help="Sync the slash commands with Discord and exit, even if they haven't changed")
+parser.add_argument("--process", type=int, default=None, help="Index of this shard process, set by the launcher")
+args = parser.parse_args()
+
+# "sharding": {"processes": 1, "shardCount": null}, one process runs every shard (Discord's recommended count when
+# shardCount is null), more processes split the shards between them and share the SQLite caches in Cache
+sharding = bot.get("sharding", {})
+processes = sharding.get("processes", 1)
+shard_count = sharding.get("shardCount") or (processes if processes > 1 else None)
+process_index = args.process or 0
+shard_ids = [shard for shard in range(shard_count) if shard % processes == process_index] if processes > 1 else None
+
 intents = discord.Intents.default()
 intents.guilds = True
 intents.members = True
 intents.guild_messages = True
 intents.message_content = True
-client = commands.Bot(command_prefix=prefix, intents=intents, help_command=None, application_id=clientid)
 
-@client.event
-async def on_ready():
-    print("Bot is online")
-    print(f"Logged in as: {client.user} - {client.user.id}")
+class SchedulerBot(commands.AutoShardedBot):
+    def __init__(self, config, process_index, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config = config
+        # The first process polls VRML and writes the shared stores, the others read them
+        self.process_index = process_index
+        self.is_leader = process_index == 0
+        # One pooled VRML session for the whole bot, opened in setup_hook
+        self.vrml = AsyncVRMLClient()
+        # In-memory match schedule kept up to date by the schedule poller
+        self.schedule = MatchSchedule()
+        # Local team/player name indexes per game, resolve names and power autocomplete without VRML calls
+        self.names = NameDirectory()
+        # Team, player and caster availability windows (Cache/availability.sqlite3), used to propose slots for unscheduled matches
+        self.availability = AvailabilityStore()
+        # Bounded, per-guild fair queue that slow commands run their VRML lookups on after deferring
+        self.work_queue = WorkQueue(**config.get("workQueue", {}))
+        # Team, match and head-to-head cards built once per version of their data, logos composited when Pillow is installed
+        self.cards = CardCache(self)
+        # Command durations and event loop lag, served with the VRML client's metrics on a local /metrics endpoint
+        self.command_metrics = CommandMetrics()
+        self.loop_lag = LoopLagMonitor()
+        # "watchdog": {"threshold": 0.25, "asyncioDebug": false}, reports callbacks that hold the loop longer than the
+        # threshold with their stack and command. asyncioDebug also turns on asyncio's own slow callback warnings
+        watchdog = config.get("watchdog", {})
+        self.watchdog = LoopWatchdog(watchdog.get("threshold", BLOCK_THRESHOLD))
+        self.asyncio_debug = watchdog.get("asyncioDebug", False)
+        # "metrics": {"host": "127.0.0.1", "port": 9108}, each shard process takes the next port, a null port turns it off
+        metrics = config.get("metrics", {})
+        port = metrics.get("port", DEFAULT_METRICS_PORT)
+        self.metrics_server = MetricsServer(self, metrics.get("host", DEFAULT_METRICS_HOST), port + process_index) if port else None
+
+        # Set by --sync to push the commands whatever their hash
+        self.force_sync = False
+        self.first_command_served = False
+
+    async def setup_hook(self):
+        await self.vrml.start()
+        await self.work_queue.start()
+        await self.loop_lag.start()
+        await self.watchdog.start()
+        if self.asyncio_debug:
+            loop = asyncio.get_running_loop()
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.watchdog.threshold
+        if self.metrics_server is not None and not self.force_sync:
+            await self.metrics_server.start()
+        if self.is_leader and not self.force_sync:
+            # Runs alongside the gateway connection, the first poll then finds the responses already cached
+            asyncio.create_task(self.prewarm())
+        await self.load_commands()
+        if self.is_leader:
+            await self.sync_commands()
+        logger.info("Setup finished in %.2fs", time.perf_counter() - STARTED_AT)
+
+    async def close(self):
+        if self.metrics_server is not None:
+            await self.metrics_server.close()
+        await self.watchdog.close()
+        await self.loop_lag.close()
+        await self.work_queue.close()
+        await self.vrml.close()
+        await super().close()
+
+    # Function to load every cog module in commands/ as an extension, each module brings its own imports
+    async def load_commands(self):
+        for file_name in sorted(os.listdir(COMMANDS_DIR)):
+            if file_name.endswith(".py") and not file_name.startswith("_"):
+                await self.load_extension(f"commands.{file_name[:-3]}")
+
+    # Function to fetch the tracked games' matches concurrently before the first command needs them
+    async def prewarm(self):
+        started = time.perf_counter()
+        tracked_games = self.config.get("trackedGames", [])
+        results = await asyncio.gather(
+            *(self.vrml.fetch_matches(tracked["game"], tracked.get("region")) for tracked in tracked_games),
+            return_exceptions=True,
+        )
+        warmed = sum(1 for result in results if result is not None and not isinstance(result, Exception))
+        logger.info("Prewarmed %d/%d match lists in %.2fs", warmed, len(tracked_games), time.perf_counter() - started)
+
+    # Function to hash the command signatures, any change to a name, option or description changes it
+    def tree_hash(self):
+        payload = [command.to_dict(self.tree) for command in self.tree.get_commands()]
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    # Function to push the slash commands to Discord only when they changed since the last sync. Global commands
+    # reach every guild (including ones joined later), so nothing needs syncing on ready or on guild join
+    async def sync_commands(self):
+        tree_hash = self.tree_hash()
+        previous_hash = None
+        if os.path.exists(TREE_HASH_PATH):
+            with open(TREE_HASH_PATH) as hashFile:
+                previous_hash = hashFile.read().strip()
+        if tree_hash == previous_hash and not self.force_sync:
+            logger.info("Commands unchanged, skipping sync")
+            return
+
+        synced = await self.tree.sync()
+        os.makedirs(os.path.dirname(TREE_HASH_PATH), exist_ok=True)
+        with open(TREE_HASH_PATH, "w") as hashFile:
+            hashFile.write(tree_hash)
+        logger.info("Synced %d app_commands", len(synced))
+
+    async def on_ready(self):
+        logger.info("Bot is online")
+        logger.info("Logged in as: %s - %s (process %s, shards %s)", self.user, self.user.id, self.process_index, self.shard_ids or "all")
+        logger.info("Ready %.2fs after start", time.perf_counter() - STARTED_AT)
+
+    async def on_app_command_completion(self, interaction, command):
+        started_at = interaction.extras.get("started_at")
+        if started_at is not None:
+            self.command_metrics.record(command, time.perf_counter() - started_at, True)
+        if not self.first_command_served:
+            self.first_command_served = True
+            logger.info("First command (/%s) served %.2fs after start", command.name, time.perf_counter() - STARTED_AT)
+
+# Function to build the bot of this process. Only processes that run (or sync) a bot build one, the launcher of a
+# multi-process bot just supervises its children and never opens the caches, stores or VRML session
+def create_client():
+    return SchedulerBot(bot, process_index, command_prefix=prefix, intents=intents, help_command=None, application_id=clientid,
+                        shard_count=shard_count, shard_ids=shard_ids, tree_cls=InstrumentedTree)
+
+# Function to push the slash commands to Discord and exit, whether or not they changed
+async def sync_only():
+    client = create_client()
+    client.force_sync = True
+    async with client:
+        # login runs setup_hook, which loads the commands and syncs them
+        await client.login(token)
+
+# Function to start one bot process per slice of shards and wait for them
+def launch_processes():
+    children = [subprocess.Popen([sys.executable, os.path.abspath(__file__), "--process", str(index)]) for index in range(processes)]
     try:
-        synced = await client.tree.sync()
-        print(f"Synced {len(synced)} command(s)")
-    except Exception as e:
-        print(e)
-
-@client.event
-async def on_guild_join(guild: discord.Guild):  
-    await client.tree.sync(guild=guild)
-
-async def setup_hook():
-    logs = await client.tree.sync()
-    print(f"[!] Synced {len(logs)} app_commands")
-
-async def load_cogs():
-    cogs_to_load = [
-        PingCog(client),
-        TeamByNameCog(client)
-    ]
-    for cog in cogs_to_load:
-        await client.add_cog(cog)
-
-# Load cogs before starting the bot
-async def startup():
-    await load_cogs()
-
-# Run the bot
-asyncio.run(startup())
-client.run(token)
\ No newline at end of file
+        for child in children:
+            child.wait()
+    except KeyboardInterrupt:
+        for child in children:
+            child.terminate()
+
+try:
+    if args.sync:
+        asyncio.run(sync_only())
+    elif processes > 1 and args.process is None:
+        launch_processes()
+    else:
+        # Run the bot, the commands are loaded in setup_hook on the bot's own event loop. discord.py logs through the
+        # queued root handler instead of adding its own
+        create_client().run(token, log_handler=None)
+finally:
+    log_listener.stop()
\ No newline at end of file
@@ -0,0 +1,259 @@
+import asyncio
+import heapq
+import logging
+import os
+import sqlite3
+import threading
+import time
+import discord
+from VRML_Client.Disk_Cache import DEFAULT_PATH as CACHE_PATH
+from VRML_Client.Rate_Limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(CACHE_PATH), "subscriptions.sqlite3")
+REMINDER_SECONDS = 30 * 60  # "Match in 30 minutes"
+BATCH_SECONDS = 5  # Alerts for the same channel within this long go out as one message
+CHANNEL_INTERVAL = 1.0  # Discord allows 5 messages per 5 seconds in a channel, stay at one a second
+SEND_RATE = 20  # Messages per second across every channel, well under Discord's global limit
+SEND_BURST = 20
+MESSAGE_LIMIT = 2000
+
+# Subscription kinds
+TEAM = "team"
+DIVISION = "division"
+
+class SubscriptionStore:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS subscriptions ("
+            "guild_id INTEGER, channel_id INTEGER NOT NULL, game TEXT NOT NULL, kind TEXT NOT NULL, target TEXT NOT NULL, label TEXT, "
+            "PRIMARY KEY (channel_id, game, kind, target))"
+        )
+        self.connection.commit()
+
+        # (game, kind, target) -> set of channel IDs, so a match finds its channels with a couple of lookups
+        self.channels = {}
+        for channel_id, game, kind, target in self.connection.execute("SELECT channel_id, game, kind, target FROM subscriptions"):
+            self.channels.setdefault((game, kind, target), set()).add(channel_id)
+
+    # Function to build the key a subscription is indexed under (teams by ID, divisions by lower-case name)
+    @staticmethod
+    def make_key(game, kind, target):
+        return game.lower(), kind, target.lower() if kind == DIVISION else target
+
+    # Function to follow a team or division in a channel
+    def add(self, guild_id, channel_id, game, kind, target, label):
+        key = self.make_key(game, kind, target)
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO subscriptions VALUES (?, ?, ?, ?, ?, ?)", (guild_id, channel_id, *key, label))
+            self.connection.commit()
+            self.channels.setdefault(key, set()).add(channel_id)
+
+    # Function to stop following a team or division in a channel, returns False if it wasn't followed
+    def remove(self, channel_id, game, kind, target):
+        key = self.make_key(game, kind, target)
+        with self.lock:
+            deleted = self.connection.execute(
+                "DELETE FROM subscriptions WHERE channel_id = ? AND game = ? AND kind = ? AND target = ?", (channel_id, *key)
+            ).rowcount
+            self.connection.commit()
+            self.channels.get(key, set()).discard(channel_id)
+        return deleted > 0
+
+    # Function to drop every subscription of a channel (e.g. when it was deleted or the bot lost access)
+    def remove_channel(self, channel_id):
+        with self.lock:
+            self.connection.execute("DELETE FROM subscriptions WHERE channel_id = ?", (channel_id,))
+            self.connection.commit()
+            for channels in self.channels.values():
+                channels.discard(channel_id)
+
+    # Function to list a channel's subscriptions as (game, kind, target, label)
+    def for_channel(self, channel_id):
+        with self.lock:
+            return self.connection.execute(
+                "SELECT game, kind, target, label FROM subscriptions WHERE channel_id = ? ORDER BY game, kind, label", (channel_id,)
+            ).fetchall()
+
+    # Function to find every channel following either team or division of a match
+    def channels_for(self, game, match):
+        channels = set()
+        with self.lock:
+            for team in (match.home, match.away):
+                if team is None:
+                    continue
+                channels.update(self.channels.get(self.make_key(game, TEAM, team.team_id), ()))
+                if team.division:
+                    channels.update(self.channels.get(self.make_key(game, DIVISION, team.division), ()))
+        return channels
+
+class ReminderTimer:
+    def __init__(self, lead=REMINDER_SECONDS):
+        self.lead = lead
+        # One heap entry per match, however many channels follow it: (fire at, game, matchID, scheduled epoch)
+        self.heap = []
+        # (game, matchID) -> scheduled epoch of its live entry, older entries (rescheduled matches) are skipped when they pop
+        self.pending = {}
+
+    # Function to (re)arm the reminder of a scheduled match, nothing changes if it's already armed for that time
+    def schedule(self, game, match, now):
+        epoch = match.scheduled_epoch if match.is_scheduled else None
+        key = (game.lower(), match.match_id)
+        if epoch is None or epoch <= now:
+            self.pending.pop(key, None)
+            return
+        if self.pending.get(key) == epoch:
+            return
+        self.pending[key] = epoch
+        heapq.heappush(self.heap, (epoch - self.lead, key[0], match.match_id, epoch))
+
+    # Function to pop every reminder that is due, returns [(game, matchID, epoch)]
+    def due(self, now):
+        fired = []
+        while self.heap and self.heap[0][0] <= now:
+            _, game, match_id, epoch = heapq.heappop(self.heap)
+            if self.pending.get((game, match_id)) != epoch:
+                continue
+            del self.pending[(game, match_id)]
+            fired.append((game, match_id, epoch))
+        return fired
+
+    # Function to get when the next reminder is due, or None
+    def next_at(self):
+        return self.heap[0][0] if self.heap else None
+
+class NotificationDispatcher:
+    def __init__(self, bot, store, lead=REMINDER_SECONDS, batch_seconds=BATCH_SECONDS):
+        self.bot = bot
+        self.store = store
+        self.timer = ReminderTimer(lead)
+        self.batch_seconds = batch_seconds
+        self.outbox = {}  # channel ID -> alert lines waiting to be sent
+        self.next_send = {}  # channel ID -> monotonic time the channel may be sent to again
+        self.bucket = TokenBucket(SEND_RATE, SEND_BURST)
+        self.wakeup = None
+        self.tasks = []
+        self.sent = 0
+
+    # Function to start the timer and the batching loop on the running event loop
+    async def start(self):
+        self.wakeup = asyncio.Event()
+        self.tasks = [asyncio.create_task(self.timer_loop()), asyncio.create_task(self.flush_loop())]
+
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    # Function to arm reminders for a game's upcoming matches, called whenever the schedule changes
+    def schedule_matches(self, game, matches):
+        now = time.time()
+        for match in matches:
+            self.timer.schedule(game, match, now)
+        # The timer may need to fire earlier than it planned
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    # Function to turn a schedule event into alerts (reminders follow from schedule_matches)
+    def on_event(self, event):
+        match = event["match"]
+        if event["type"] == "scheduled" and match.is_scheduled and match.scheduled_epoch:
+            self.queue_alert(event["game"], match, f"{{teams}} was scheduled for <t:{match.scheduled_epoch}:F>")
+        elif event["type"] == "rescheduled" and match.is_scheduled and match.scheduled_epoch:
+            self.queue_alert(event["game"], match, f"{{teams}} was rescheduled to <t:{match.scheduled_epoch}:F>")
+        elif event["type"] == "postponed":
+            self.queue_alert(event["game"], match, "{teams} was postponed")
+
+    # Function to add an alert line to the outbox of every channel following the match, {teams} in the text becomes
+    # "home vs away". Matches whose teams aren't decided yet (e.g. playoffs) have nobody to alert
+    def queue_alert(self, game, match, text):
+        if match.home is None or match.away is None:
+            return
+        text = text.replace("{teams}", f"{match.home.name} vs {match.away.name}")
+        for channel_id in self.store.channels_for(game, match):
+            self.outbox.setdefault(channel_id, []).append(text)
+
+    # Sleeps until the next reminder is due (or the schedule changes), so thousands of reminders need one task
+    async def timer_loop(self):
+        while True:
+            next_at = self.timer.next_at()
+            timeout = None if next_at is None else max(0.0, next_at - time.time())
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+            for game, match_id, epoch in self.timer.due(time.time()):
+                # One bad match mustn't stop the only task that sends reminders
+                try:
+                    match = self.bot.schedule.index(game).matches.get(match_id)
+                    if match is None or match.scheduled_epoch != epoch:
+                        continue
+                    self.queue_alert(game, match, f"{{teams}} starts <t:{epoch}:R> (<t:{epoch}:t>)")
+                except Exception as e:
+                    logger.exception("Failed to queue the reminder for match %s: %s", match_id, e)
+
+    async def flush_loop(self):
+        while True:
+            await asyncio.sleep(self.batch_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.exception("Failed to send notifications: %s", e)
+
+    # Function to send each channel its waiting alerts as one message, channels sent to too recently wait for the next batch
+    async def flush(self):
+        now = time.monotonic()
+        for channel_id in list(self.outbox):
+            if self.next_send.get(channel_id, 0) > now:
+                continue
+            lines = self.outbox.pop(channel_id)
+            self.next_send[channel_id] = now + CHANNEL_INTERVAL
+            for content in self.chunk(lines):
+                await self.send(channel_id, content)
+
+    # Function to pack alert lines into as few messages as fit Discord's length limit
+    @staticmethod
+    def chunk(lines):
+        messages = []
+        current = ""
+        for line in lines:
+            if current and len(current) + len(line) + 1 > MESSAGE_LIMIT:
+                messages.append(current)
+                current = ""
+            current = f"{current}\n{line}" if current else line[:MESSAGE_LIMIT]
+        if current:
+            messages.append(current)
+        return messages
+
+    async def send(self, channel_id, content):
+        # With several shard processes each one only sends to the channels of its own guilds
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            return
+        await asyncio.sleep(self.bucket.reserve())
+        try:
+            await channel.send(content)
+            self.sent += 1
+        except (discord.Forbidden, discord.NotFound):
+            logger.info("Lost access to channel %s, removing its subscriptions", channel_id)
+            await asyncio.to_thread(self.store.remove_channel, channel_id)
+        except discord.HTTPException as e:
+            if e.status == 429:
+                # Hold every channel back for a bit and try this one again in the next batch
+                retry_after = getattr(e, "retry_after", None) or 5
+                self.bucket.pause(retry_after)
+                self.outbox.setdefault(channel_id, []).insert(0, content)
+            else:
+                logger.warning("Failed to send notifications to channel %s: %s", channel_id, e)
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_PENDING = 200  # Jobs waiting across every guild before new ones are turned away
+DEFAULT_MAX_PER_GUILD = 20  # Jobs one guild can have waiting, so a busy server can't fill the queue alone
+WAIT_SAMPLES = 500  # Recent wait times kept for the percentiles
+
+class QueueMetrics:
+    def __init__(self):
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.max_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+        self.waits = deque(maxlen=WAIT_SAMPLES)
+
+    # Function to record how long a job sat in the queue before a worker picked it up
+    def record_wait(self, wait):
+        self.started += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.waits.append(wait)
+
+    # Function to record a finished job
+    def record_run(self, duration, ok):
+        self.total_run += duration
+        if ok:
+            self.completed += 1
+        else:
+            self.failed += 1
+
+    # Function to return the counters with the average and p50/p95 wait times
+    def snapshot(self, depth, guilds):
+        finished = self.completed + self.failed
+        waits = sorted(self.waits)
+        return {
+            "depth": depth,
+            "max_depth": self.max_depth,
+            "guilds_waiting": guilds,
+            "submitted": self.submitted,
+            "started": self.started,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            # Waits are recorded when a job starts, so they're averaged over started jobs (running ones included)
+            "average_wait": self.total_wait / self.started if self.started else 0.0,
+            "p50_wait": waits[len(waits) // 2] if waits else 0.0,
+            "p95_wait": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+            "max_wait": self.max_wait,
+            "average_run": self.total_run / finished if finished else 0.0,
+        }
+
+class WorkQueue:
+    def __init__(self, workers=DEFAULT_WORKERS, max_pending=DEFAULT_MAX_PENDING, max_per_guild=DEFAULT_MAX_PER_GUILD):
+        self.worker_count = workers
+        self.max_pending = max_pending
+        self.max_per_guild = max_per_guild
+
+        # guild_id -> deque of (enqueued_at, job, future), guilds take turns in `ready`
+        self.queues = {}
+        self.ready = deque()
+        self.pending = 0
+        self.available = None
+        self.workers = []
+        self.metrics = QueueMetrics()
+
+    # Function to start the workers on the running event loop (called from setup_hook)
+    async def start(self):
+        if self.workers:
+            return
+        self.available = asyncio.Condition()
+        self.workers = [asyncio.create_task(self.worker()) for _ in range(self.worker_count)]
+
+    # Function to stop the workers, jobs still waiting are cancelled
+    async def close(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        for queue in self.queues.values():
+            for _, _, future in queue:
+                future.cancel()
+        self.queues.clear()
+        self.ready.clear()
+        self.pending = 0
+
+    # Function to queue a coroutine function for a guild, returns a future for its result or None if the queue is full
+    async def submit(self, guild_id, job):
+        queue = self.queues.get(guild_id)
+        if self.pending >= self.max_pending or (queue is not None and len(queue) >= self.max_per_guild):
+            self.metrics.rejected += 1
+            return None
+
+        future = asyncio.get_running_loop().create_future()
+        if queue is None:
+            queue = self.queues[guild_id] = deque()
+            self.ready.append(guild_id)
+        queue.append((time.perf_counter(), job, future))
+        self.pending += 1
+        self.metrics.submitted += 1
+        self.metrics.max_depth = max(self.metrics.max_depth, self.pending)
+
+        async with self.available:
+            self.available.notify()
+        return future
+
+    # Function to take the next job, one per guild in turn (round robin) so no guild waits behind another's backlog
+    def next_job(self):
+        guild_id = self.ready.popleft()
+        queue = self.queues[guild_id]
+        entry = queue.popleft()
+        if queue:
+            self.ready.append(guild_id)
+        else:
+            del self.queues[guild_id]
+        self.pending -= 1
+        return entry
+
+    async def worker(self):
+        while True:
+            async with self.available:
+                await self.available.wait_for(lambda: self.ready)
+                enqueued_at, job, future = self.next_job()
+
+            # The command may have given up (e.g. the interaction expired) while the job was waiting
+            if future.cancelled():
+                continue
+            started = time.perf_counter()
+            self.metrics.record_wait(started - enqueued_at)
+            try:
+                result = await job()
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                self.metrics.record_run(time.perf_counter() - started, False)
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            self.metrics.record_run(time.perf_counter() - started, True)
+            if not future.done():
+                future.set_result(result)
+
+    # Function to list the queue depth and wait/run time metrics
+    def snapshot(self):
+        return self.metrics.snapshot(self.pending, len(self.ready))
+
+# Function to run a slow command: acknowledge the interaction straight away (inside Discord's 3 second window),
+# run `job` on the bot's work queue, then hand its result to `respond`, which edits the deferred response.
+# If the queue is full or the job fails the user is told instead and `respond` isn't called
+async def run_deferred(interaction, job, respond, ephemeral=False):
+    await interaction.response.defer(thinking=True, ephemeral=ephemeral)
+
+    future = await interaction.client.work_queue.submit(interaction.guild_id, job)
+    if future is None:
+        await interaction.edit_original_response(content="The bot is busy right now, please try again in a minute.")
+        return
+    try:
+        result = await future
+    except Exception as e:
+        logger.exception("Queued command failed: %s", e)
+        await interaction.edit_original_response(content="Something went wrong while fetching that, please try again.")
+        return
+    await respond(result)
@@ -0,0 +1,213 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+import logging
+import asyncio
+import time
+import zoneinfo
+from datetime import datetime
+from VRML_Client.Availability import TEAM, PLAYER, CASTER, WEEKDAYS, get_timezone, local_window
+from VRML_Client.Match_Scheduler import propose_schedule
+from VRML_Client.Models import Team
+from Work_Queue import run_deferred
+
+logger = logging.getLogger(__name__)
+
+DAY_SECONDS = 24 * 60 * 60
+# Read from the tz database once, autocomplete filters this on every keystroke
+TIMEZONES = sorted(zoneinfo.available_timezones())
+USAGE = "Use a weekday (e.g. tuesday) for every week or a date (e.g. 2025-01-31) for once, times like 19:00 and a timezone like Europe/London."
+
+# Function to read "HH:MM" as minutes after midnight, or None if it can't be read
+def parse_minutes(text):
+    try:
+        moment = datetime.strptime(text.strip(), "%H:%M")
+    except ValueError:
+        return None
+    return moment.hour * 60 + moment.minute
+
+# Function to check a Discord user is on a team's VRML roster (by the Discord account linked on VRML)
+def on_roster(team_data, user_id):
+    return any(player.discord_id is not None and str(player.discord_id) == str(user_id) for player in Team.from_json(team_data).players)
+
+class AvailabilityCog(commands.Cog):
+    def __init__(self, bot):
+        logger.info("AvailabilityCogLoaded")
+        self.bot = bot
+        # "casters": {"roles": ["Caster"], "userIDs": []}, who may add caster availability besides channel managers
+        casters = bot.config.get("casters", {})
+        self.caster_roles = {role.lower() for role in casters.get("roles", ["Caster"])}
+        self.caster_ids = {str(user_id) for user_id in casters.get("userIDs", [])}
+
+    # Function to save a window for an owner. `day` is a weekday name (every week) or a date (once), times are in the
+    # owner's own timezone and stored as UTC epochs. Returns the reply to send
+    def save_window(self, kind, owner_id, day, start_time, end_time, timezone_name, name=None, team_id=None):
+        start_minute, end_minute = parse_minutes(start_time), parse_minutes(end_time)
+        zone = get_timezone(timezone_name)
+        if start_minute is None or end_minute is None or zone is None:
+            return USAGE
+
+        day = day.strip().lower()
+        if day in WEEKDAYS:
+            self.bot.availability.add_weekly_window(kind, owner_id, WEEKDAYS.index(day), start_minute, end_minute, timezone_name, name, team_id)
+            return f"every {day.capitalize()} {start_time}-{end_time} ({timezone_name})"
+        try:
+            date = datetime.strptime(day, "%Y-%m-%d").date()
+        except ValueError:
+            return USAGE
+        start, end = local_window(date, start_minute, end_minute, zone)
+        self.bot.availability.add_window(kind, owner_id, start, end, name, team_id)
+        return f"<t:{start}:F> - <t:{end}:t>"
+
+    # Function to resolve a team name through the local name index
+    def resolve_team(self, game_name, team_name):
+        return self.bot.names.index("teams", game_name).resolve(team_name)
+
+    # Function to check a member may add caster availability: a caster role, the casters.userIDs allowlist, or
+    # permission to manage channels
+    def is_caster(self, user):
+        if str(user.id) in self.caster_ids:
+            return True
+        permissions = getattr(user, "guild_permissions", None)
+        if permissions is not None and permissions.manage_channels:
+            return True
+        return any(role.name.lower() in self.caster_roles for role in getattr(user, "roles", []))
+
+    # The store is shared by every guild, so only channel managers can change a team's windows
+    @app_commands.command(name="availability-add")
+    @app_commands.default_permissions(manage_channels=True)
+    async def availabilityadd(self, interaction: discord.Interaction, game_name: str, team_name: str, day: str, start_time: str, end_time: str, timezone: str = "UTC"):
+        team = self.resolve_team(game_name, team_name)
+        if team is None:
+            await interaction.response.send_message(f"No team found for '{team_name}' in {game_name}.", ephemeral=True)
+            return
+        reply = await asyncio.to_thread(self.save_window, TEAM, team["id"], day, start_time, end_time, timezone)
+        if reply is USAGE:
+            await interaction.response.send_message(USAGE, ephemeral=True)
+            return
+        await interaction.response.send_message(f"{team['name']} is available {reply}.", ephemeral=True)
+
+    @app_commands.command(name="my-availability-add")
+    async def myavailabilityadd(self, interaction: discord.Interaction, game_name: str, team_name: str, day: str, start_time: str, end_time: str, timezone: str = "UTC"):
+        team = self.resolve_team(game_name, team_name)
+        if team is None:
+            await interaction.response.send_message(f"No team found for '{team_name}' in {game_name}.", ephemeral=True)
+            return
+
+        # Once a player registers, the team only counts as free when every registered player is, so only players on
+        # the team's VRML roster may register for it
+        async def respond(team_data):
+            if team_data is None:
+                await interaction.edit_original_response(content="VRML is not responding right now, please try again in a minute.")
+                return
+            if not on_roster(team_data, interaction.user.id):
+                await interaction.edit_original_response(content=f"You're not on the VRML roster of {team['name']} (or this Discord account isn't linked to your VRML profile).")
+                return
+            reply = await asyncio.to_thread(self.save_window, PLAYER, str(interaction.user.id), day, start_time, end_time, timezone,
+                                            interaction.user.display_name, team["id"])
+            if reply is USAGE:
+                await interaction.edit_original_response(content=USAGE)
+                return
+            await interaction.edit_original_response(content=f"You're available for {team['name']} {reply}.")
+
+        await run_deferred(interaction, lambda: self.bot.vrml.fetch_team_details(team["id"]), respond, ephemeral=True)
+
+    @app_commands.command(name="availability-list")
+    async def availabilitylist(self, interaction: discord.Interaction, game_name: str, team_name: str):
+        team = self.resolve_team(game_name, team_name)
+        if team is None:
+            await interaction.response.send_message(f"No team found for '{team_name}' in {game_name}.", ephemeral=True)
+            return
+
+        now = int(time.time())
+        # May reload the store from SQLite and re-expand every rule, keep it off the event loop
+        windows = await asyncio.to_thread(self.bot.availability.team_windows, team["id"], now, now + 14 * DAY_SECONDS)
+        if not windows:
+            await interaction.response.send_message(f"No time in the next two weeks when all of {team['name']} is available.", ephemeral=True)
+            return
+        lines = [f"<t:{start}:F> - <t:{end}:t>" for start, end in windows[:25]]
+        await interaction.response.send_message(f"When all of {team['name']} is available:\n" + "\n".join(lines), ephemeral=True)
+
+    @app_commands.command(name="availability-clear")
+    @app_commands.default_permissions(manage_channels=True)
+    async def availabilityclear(self, interaction: discord.Interaction, game_name: str, team_name: str):
+        team = self.resolve_team(game_name, team_name)
+        if team is None:
+            await interaction.response.send_message(f"No team found for '{team_name}' in {game_name}.", ephemeral=True)
+            return
+        await asyncio.to_thread(self.bot.availability.clear_team, team["id"])
+        await interaction.response.send_message(f"Cleared the team availability of {team['name']}.", ephemeral=True)
+
+    @app_commands.command(name="my-availability-clear")
+    async def myavailabilityclear(self, interaction: discord.Interaction):
+        await asyncio.to_thread(self.bot.availability.clear, PLAYER, str(interaction.user.id))
+        await interaction.response.send_message("Cleared your availability.", ephemeral=True)
+
+    @app_commands.command(name="caster-availability-add")
+    async def casteravailabilityadd(self, interaction: discord.Interaction, day: str, start_time: str, end_time: str, timezone: str = "UTC"):
+        if not self.is_caster(interaction.user):
+            await interaction.response.send_message("Only casters can add caster availability.", ephemeral=True)
+            return
+        reply = await asyncio.to_thread(self.save_window, CASTER, str(interaction.user.id), day, start_time, end_time, timezone, interaction.user.display_name)
+        if reply is USAGE:
+            await interaction.response.send_message(USAGE, ephemeral=True)
+            return
+        await interaction.response.send_message(f"You're available to cast {reply}.", ephemeral=True)
+
+    @app_commands.command(name="propose-schedule")
+    async def proposeschedule(self, interaction: discord.Interaction, game_name: str, division: str = None, days: int = 7):
+        matches = list(self.bot.schedule.matches(game_name))
+        if division:
+            matches = [match for match in matches
+                       if any(team is not None and (team.division or "").lower() == division.lower() for team in (match.home, match.away))]
+        if not any(not match.is_scheduled for match in matches):
+            await interaction.response.send_message(f"No unscheduled matches known for {game_name}.", ephemeral=True)
+            return
+
+        now = int(time.time())
+
+        # The solver (and the availability store it reads) runs in a worker thread, the interaction is deferred first
+        def propose():
+            proposals, unplaced = propose_schedule(matches, self.bot.availability, now, now + days * DAY_SECONDS)
+            return proposals, unplaced, self.bot.availability.caster_names
+
+        async def respond(result):
+            proposals, unplaced, caster_names = result
+            embed = discord.Embed(
+                title=f"Proposed schedule - {game_name}{f' - {division}' if division else ''}",
+                description=f"{len(proposals)} matches placed, {len(unplaced)} without a slot everyone can make.",
+                color=discord.Color.green(),
+            )
+            for proposal in proposals[:25]:
+                match = proposal["match"]
+                caster_id = proposal["caster_id"]
+                caster = caster_names.get(caster_id, caster_id) if caster_id else "no caster free"
+                embed.add_field(
+                    name=match.title,
+                    value=f"<t:{proposal['start']}:F> - cast by {caster}" + (f" ({proposal['overlaps']} other matches at the same time)" if proposal["overlaps"] else ""),
+                    inline=False,
+                )
+            await interaction.edit_original_response(embed=embed)
+
+        await run_deferred(interaction, lambda: asyncio.to_thread(propose), respond)
+
+    @availabilityadd.autocomplete("team_name")
+    @myavailabilityadd.autocomplete("team_name")
+    @availabilitylist.autocomplete("team_name")
+    @availabilityclear.autocomplete("team_name")
+    async def team_name_autocomplete(self, interaction: discord.Interaction, current: str):
+        game = interaction.namespace.game_name or ""
+        teams = self.bot.names.index("teams", game).search(current, 25)
+        return [app_commands.Choice(name=team["name"][:100], value=team["name"][:100]) for team in teams]
+
+    @availabilityadd.autocomplete("timezone")
+    @myavailabilityadd.autocomplete("timezone")
+    @casteravailabilityadd.autocomplete("timezone")
+    async def timezone_autocomplete(self, interaction: discord.Interaction, current: str):
+        current = current.lower().replace(" ", "_")
+        zones = [zone for zone in TIMEZONES if current in zone.lower()]
+        return [app_commands.Choice(name=zone, value=zone) for zone in zones[:25]]
+
+# Called by bot.load_extension when Main discovers this module in commands/
+async def setup(bot):
+    await bot.add_cog(AvailabilityCog(bot))
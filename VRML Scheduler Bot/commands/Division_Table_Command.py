@@ -0,0 +1,82 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+import logging
+import time
+from VRML_Client.Standings import division_teams, team_row, format_table
+from Work_Queue import run_deferred
+
+logger = logging.getLogger(__name__)
+
+# Seconds between edits of the reply while teams are still arriving, Discord rate limits edits of one message
+EDIT_INTERVAL = 1.0
+DESCRIPTION_LIMIT = 4000
+
+class DivisionTableCog(commands.Cog):
+    def __init__(self, bot):
+        logger.info("DivisionTableCogLoaded")
+        self.bot = bot
+
+    @app_commands.command(name="division-table")
+    async def divisiontable(self, interaction: discord.Interaction, game_name: str, division: str):
+        teams = self.find_teams(game_name, division)
+        if not teams:
+            await interaction.response.send_message(f"No teams known for the {division} division in {game_name}.", ephemeral=True)
+            return
+
+        async def respond(rows):
+            await interaction.edit_original_response(embed=self.table_embed(game_name, division, rows, len(teams)))
+
+        await run_deferred(interaction, lambda: self.collect(interaction, game_name, division, teams), respond)
+
+    @divisiontable.autocomplete("division")
+    async def division_autocomplete(self, interaction: discord.Interaction, current: str):
+        game = interaction.namespace.game_name or ""
+        divisions = {match.home.division for match in self.bot.schedule.matches(game) if match.home is not None and match.home.division}
+        return [app_commands.Choice(name=division, value=division) for division in sorted(divisions) if current.lower() in division.lower()][:25]
+
+    # Function to list a division's teams as {teamID: name}, from the schedule and the name index (which has the
+    # league snapshot's teams), no VRML call
+    def find_teams(self, game, division):
+        teams = division_teams(self.bot.schedule.matches(game), division)
+        for entry in self.bot.names.index("teams", game).all_entries():
+            if (entry.get("division") or "").lower() == division.lower():
+                teams.setdefault(entry["id"], entry["name"])
+        return teams
+
+    # Function to fetch every team's details at once through the shared client, editing the reply with the table so
+    # far as they arrive, returns every row
+    async def collect(self, interaction, game, division, teams):
+        rows = []
+        last_edit = time.monotonic()
+        async for team_id, data in self.bot.vrml.iter_team_details(list(teams)):
+            rows.append(team_row(team_id, teams[team_id], data))
+            if len(rows) < len(teams) and time.monotonic() - last_edit >= EDIT_INTERVAL:
+                last_edit = time.monotonic()
+                try:
+                    await interaction.edit_original_response(embed=self.table_embed(game, division, rows, len(teams)))
+                except discord.HTTPException as e:
+                    logger.warning("Failed to update the division table: %s", e)
+        return rows
+
+    # Function to build the table embed, the footer says how many teams are still loading
+    def table_embed(self, game, division, rows, total):
+        table = format_table(rows)
+        # Embed descriptions stop at 4096 characters, drop the bottom of very large divisions
+        if len(table) > DESCRIPTION_LIMIT:
+            table = table[:table.rfind("\n", 0, DESCRIPTION_LIMIT)] + "\n..."
+        embed = discord.Embed(
+            title=f"{division} - {game}",
+            description=f"```\n{table}\n```",
+            color=discord.Color.green(),
+        )
+        missing = sum(1 for row in rows if not row["has_details"])
+        if len(rows) < total:
+            embed.set_footer(text=f"Loading... {len(rows)} of {total} teams")
+        elif missing:
+            embed.set_footer(text=f"{missing} of {total} teams didn't load from VRML")
+        return embed
+
+# Called by bot.load_extension when Main discovers this module in commands/
+async def setup(bot):
+    await bot.add_cog(DivisionTableCog(bot))
@@ -0,0 +1,97 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+import logging
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_LIMIT = 2000
+
+class MetricsCog(commands.Cog):
+    def __init__(self, bot):
+        logger.info("MetricsCogLoaded")
+        self.bot = bot
+
+    @app_commands.command(name="metrics")
+    @app_commands.default_permissions(administrator=True)
+    async def metrics(self, interaction: discord.Interaction):
+        await interaction.response.send_message(self.summary()[:MESSAGE_LIMIT], ephemeral=True)
+
+    @app_commands.command(name="debug-loop")
+    @app_commands.default_permissions(administrator=True)
+    async def debugloop(self, interaction: discord.Interaction):
+        await interaction.response.send_message(self.loop_report()[:MESSAGE_LIMIT], ephemeral=True)
+
+    @app_commands.command(name="queue-stats")
+    @app_commands.default_permissions(administrator=True)
+    async def queuestats(self, interaction: discord.Interaction):
+        stats = self.bot.work_queue.snapshot()
+        await interaction.response.send_message(
+            f"Queue depth: {stats['depth']} (max {stats['max_depth']}, {stats['guilds_waiting']} guilds waiting)\n"
+            f"Jobs: {stats['completed']} done, {stats['failed']} failed, {stats['rejected']} turned away\n"
+            f"Wait: avg {stats['average_wait']:.2f}s, p50 {stats['p50_wait']:.2f}s, p95 {stats['p95_wait']:.2f}s, max {stats['max_wait']:.2f}s\n"
+            f"Run: avg {stats['average_run']:.2f}s",
+            ephemeral=True,
+        )
+
+    # Function to describe event loop health: lag, which commands blocked it and the latest blocked stack
+    def loop_report(self):
+        loop_lag = self.bot.loop_lag
+        watchdog = self.bot.watchdog
+        lines = [f"**Event loop lag**: last {loop_lag.last * 1000:.1f}ms, p95 {loop_lag.histogram.quantile(0.95) * 1000:.1f}ms, "
+                 f"max {loop_lag.max * 1000:.1f}ms",
+                 f"**Blocks** over {watchdog.threshold * 1000:.0f}ms: {sum(watchdog.counts.values())}"]
+        if not watchdog.blocks:
+            return "\n".join(lines)
+
+        worst = {}
+        for block in watchdog.blocks:
+            labels = (block["cog"], block["command"])
+            worst[labels] = max(worst.get(labels, 0.0), block["duration"])
+        for (cog, command), count in sorted(watchdog.counts.items(), key=lambda item: -item[1]):
+            recent = f", worst recent {worst[(cog, command)]:.2f}s" if (cog, command) in worst else ""
+            lines.append(f"`/{command}` ({cog}): {count} blocks{recent}")
+
+        latest = watchdog.blocks[-1]
+        lines.append(f"**Latest**: {latest['duration']:.2f}s in /{latest['command']} (<t:{int(latest['started_at'])}:R>)")
+        # Keep the innermost frames, they're where the blocking call is
+        room = MESSAGE_LIMIT - len("\n".join(lines)) - 10
+        stack = latest["stack"][-room:] if room > 0 else ""
+        lines.append(f"```{stack}```")
+        return "\n".join(lines)
+
+    # Function to summarise the same numbers the /metrics endpoint serves
+    def summary(self):
+        lines = ["**VRML requests** (count, p50 / p95, in flight, cache hit ratio)"]
+        histograms, in_flight = self.bot.vrml.metrics.latency()
+        requests = self.bot.vrml.metrics.snapshot()
+        cache = self.bot.vrml.cache.stats()["endpoints"]
+        for endpoint in sorted(set(histograms) | set(cache)):
+            histogram = histograms.get(endpoint)
+            stats = requests.get(endpoint, {"failures": 0})
+            timing = f"{histogram.count} sent, {histogram.quantile(0.5) * 1000:.0f} / {histogram.quantile(0.95) * 1000:.0f}ms" if histogram else "0 sent"
+            hit_ratio = cache[endpoint]["hit_ratio"] if endpoint in cache else 0.0
+            lines.append(f"`{endpoint}`: {timing}, {stats['failures']} failed, {in_flight.get(endpoint, 0)} in flight, {hit_ratio:.0%} cached")
+
+        lines.append("**Commands** (count, p50 / p95, errors)")
+        command_metrics = self.bot.command_metrics
+        for (cog, command), histogram in sorted(command_metrics.histograms.items(), key=lambda item: -item[1].quantile(0.95)):
+            lines.append(f"`/{command}` ({cog}): {histogram.count}, {histogram.quantile(0.5) * 1000:.0f} / {histogram.quantile(0.95) * 1000:.0f}ms, "
+                         f"{command_metrics.errors.get((cog, command), 0)} errors")
+
+        loop_lag = self.bot.loop_lag
+        queue_stats = self.bot.work_queue.snapshot()
+        lines.append(f"**Event loop lag**: last {loop_lag.last * 1000:.1f}ms, p95 {loop_lag.histogram.quantile(0.95) * 1000:.1f}ms, "
+                     f"max {loop_lag.max * 1000:.1f}ms")
+        lines.append(f"**Work queue**: {queue_stats['depth']} waiting, p95 wait {queue_stats['p95_wait']:.2f}s")
+        card_stats = self.bot.cards.stats()
+        served = ", ".join(f"{kind} {stats['hits']} cached / {stats['builds']} built" for kind, stats in sorted(card_stats["kinds"].items()))
+        lines.append(f"**Cards**: {served or 'none shown yet'}, {card_stats['uploaded']} images uploaded")
+        server = self.bot.metrics_server
+        if server is not None and server.runner is not None:
+            lines.append(f"Scrape http://{server.host}:{server.port}/metrics for the full set")
+        return "\n".join(lines)
+
+# Called by bot.load_extension when Main discovers this module in commands/
+async def setup(bot):
+    await bot.add_cog(MetricsCog(bot))
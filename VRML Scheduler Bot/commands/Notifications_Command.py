@@ -0,0 +1,80 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+import logging
+import asyncio
+import time
+from Notifications import NotificationDispatcher, SubscriptionStore, TEAM, DIVISION
+
+logger = logging.getLogger(__name__)
+
+class NotificationsCog(commands.Cog):
+    def __init__(self, bot):
+        logger.info("NotificationsCogLoaded")
+        self.bot = bot
+        self.store = SubscriptionStore()
+        self.dispatcher = NotificationDispatcher(bot, self.store)
+
+    # Nothing is sent during a --sync run, it only pushes the commands
+    async def cog_load(self):
+        if not self.bot.force_sync:
+            await self.dispatcher.start()
+
+    async def cog_unload(self):
+        await self.dispatcher.close()
+
+    # Re-arm the reminders whenever the schedule poller loads or refreshes a game
+    @commands.Cog.listener()
+    async def on_vrml_schedule_updated(self, game):
+        self.dispatcher.schedule_matches(game, self.bot.schedule.index(game).query(start=int(time.time())))
+
+    @commands.Cog.listener()
+    async def on_vrml_match_event(self, event):
+        self.dispatcher.on_event(event)
+
+    @app_commands.command(name="follow-team")
+    @app_commands.default_permissions(manage_channels=True)
+    async def followteam(self, interaction: discord.Interaction, game_name: str, team_name: str):
+        team = self.bot.names.index("teams", game_name).resolve(team_name)
+        if team is None:
+            await interaction.response.send_message(f"No team found for '{team_name}' in {game_name}.", ephemeral=True)
+            return
+        await asyncio.to_thread(self.store.add, interaction.guild_id, interaction.channel_id, game_name, TEAM, team["id"], team["name"])
+        await interaction.response.send_message(f"This channel will get reminders and reschedules for {team['name']}.", ephemeral=True)
+
+    @app_commands.command(name="follow-division")
+    @app_commands.default_permissions(manage_channels=True)
+    async def followdivision(self, interaction: discord.Interaction, game_name: str, division: str):
+        await asyncio.to_thread(self.store.add, interaction.guild_id, interaction.channel_id, game_name, DIVISION, division, division)
+        await interaction.response.send_message(f"This channel will get reminders and reschedules for the {division} division.", ephemeral=True)
+
+    @app_commands.command(name="unfollow")
+    @app_commands.default_permissions(manage_channels=True)
+    async def unfollow(self, interaction: discord.Interaction, game_name: str, name: str):
+        team = self.bot.names.index("teams", game_name).exact(name, 1)
+        removed = await asyncio.to_thread(self.store.remove, interaction.channel_id, game_name, DIVISION, name)
+        if team:
+            removed = await asyncio.to_thread(self.store.remove, interaction.channel_id, game_name, TEAM, team[0]["id"]) or removed
+        if not removed:
+            await interaction.response.send_message(f"This channel doesn't follow '{name}' in {game_name}.", ephemeral=True)
+            return
+        await interaction.response.send_message(f"This channel no longer follows '{name}'.", ephemeral=True)
+
+    @app_commands.command(name="following")
+    async def following(self, interaction: discord.Interaction):
+        subscriptions = await asyncio.to_thread(self.store.for_channel, interaction.channel_id)
+        if not subscriptions:
+            await interaction.response.send_message("This channel doesn't follow any teams or divisions.", ephemeral=True)
+            return
+        lines = [f"{game} - {label} ({kind})" for game, kind, _, label in subscriptions]
+        await interaction.response.send_message("This channel follows:\n" + "\n".join(lines), ephemeral=True)
+
+    @followteam.autocomplete("team_name")
+    async def team_name_autocomplete(self, interaction: discord.Interaction, current: str):
+        game = interaction.namespace.game_name or ""
+        teams = self.bot.names.index("teams", game).search(current, 25)
+        return [app_commands.Choice(name=team["name"][:100], value=team["name"][:100]) for team in teams]
+
+# Called by bot.load_extension when Main discovers this module in commands/
+async def setup(bot):
+    await bot.add_cog(NotificationsCog(bot))
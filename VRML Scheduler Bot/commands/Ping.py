@@ -1,15 +1,22 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import logging
 import json
 import random
 import os
 
+logger = logging.getLogger(__name__)
+
 class PingCog(commands.Cog):
     def __init__(self, bot):
-        print("PingCogLoaded")
+        logger.info("PingCogLoaded")
         self.bot = bot
 
     @app_commands.command(name="ping")
     async def ping(self, interaction: discord.Interaction):
-        await interaction.response.send_message("Pong",ephemeral=True)
\ No newline at end of file
+        await interaction.response.send_message("Pong",ephemeral=True)
+
+# Called by bot.load_extension when Main discovers this module in commands/
+async def setup(bot):
+    await bot.add_cog(PingCog(bot))
@@ -0,0 +1,98 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+import logging
+import asyncio
+import time
+
+logger = logging.getLogger(__name__)
+
+class PredictCog(commands.Cog):
+    def __init__(self, bot):
+        logger.info("PredictCogLoaded")
+        self.bot = bot
+        # (game, division) -> (snapshot creation time, LeagueAnalytics), rebuilt when a newer snapshot is saved
+        self.analytics = {}
+
+    # Function to get the analytics for a game/division from its saved league snapshot, or None without one
+    async def load_analytics(self, game, division):
+        # numpy and the analytics engine are only imported once someone asks for a prediction
+        from VRML_Client import Snapshot
+        if Snapshot.np is None:
+            return None
+        from VRML_Client.Analytics import LeagueAnalytics
+
+        snapshot = await asyncio.to_thread(Snapshot.load_snapshot, game)
+        if snapshot is None:
+            return None
+        key = (game.lower(), division)
+        cached = self.analytics.get(key)
+        if cached is None or cached[0] != snapshot.meta["created_at"]:
+            cached = self.analytics[key] = (snapshot.meta["created_at"], await asyncio.to_thread(LeagueAnalytics, snapshot, division))
+        return cached[1]
+
+    @app_commands.command(name="predict-week")
+    async def predictweek(self, interaction: discord.Interaction, game_name: str, division: str = None, week: int = None):
+        analytics = await self.load_analytics(game_name, division)
+        if analytics is None:
+            await interaction.response.send_message(f"No league snapshot saved for {game_name}, predictions need one (API_Tests/League_Snapshot.py).", ephemeral=True)
+            return
+        from VRML_Client.Analytics import RATING_SOURCE
+
+        # This week's fixtures come from the live schedule, the ratings from the snapshot
+        index = self.bot.schedule.index(game_name)
+        now = int(time.time())
+        if week is None:
+            next_matches = index.query(division=division, start=now, limit=1)
+            week = next_matches[0].week if next_matches else None
+        matches = index.query(division=division, week=week, start=now) if week is not None else []
+        if not matches:
+            await interaction.response.send_message(f"No upcoming matches known for {game_name}{f' - {division}' if division else ''}.", ephemeral=True)
+            return
+
+        # Playoff slots can list a team that isn't decided yet, there's nobody to predict for those
+        matches = matches[:25]
+        decided = [match for match in matches if match.home is not None and match.away is not None]
+        probabilities = dict(zip((match.match_id for match in decided),
+                                 analytics.predict_many([(match.home.team_id, match.away.team_id) for match in decided])))
+        embed = discord.Embed(
+            title=f"Week {week} predictions - {game_name}{f' - {division}' if division else ''}",
+            color=discord.Color.green(),
+        )
+        for match in matches:
+            probability = probabilities.get(match.match_id)
+            if probability is None:
+                value = "No prediction, opponent not decided"
+            elif probability != probability:  # nan, one of the teams isn't in the snapshot
+                value = "No prediction, team not in the league snapshot"
+            else:
+                value = f"{match.home.name} {probability:.0%} - {1 - probability:.0%} {match.away.name}"
+            record = analytics.head_to_head(match.home.team_id, match.away.team_id) if probability is not None else None
+            if record and record[2]:
+                value += f"\nHead to head: {record[0]}-{record[1]}"
+            embed.add_field(name=match.title, value=f"{value}\n<t:{match.scheduled_epoch}:F>", inline=False)
+        embed.set_footer(text=f"Win chances from {RATING_SOURCE}")
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="head-to-head")
+    async def headtohead(self, interaction: discord.Interaction, game_name: str, team_name: str, opponent_name: str):
+        names = self.bot.names.index("teams", game_name)
+        team, opponent = names.resolve(team_name), names.resolve(opponent_name)
+        if team is None or opponent is None:
+            await interaction.response.send_message(f"No team found for '{team_name if team is None else opponent_name}' in {game_name}.", ephemeral=True)
+            return
+        analytics = await self.load_analytics(game_name, None)
+        if analytics is None:
+            await interaction.response.send_message(f"No league snapshot saved for {game_name}, head to head records need one (API_Tests/League_Snapshot.py).", ephemeral=True)
+            return
+
+        # Their next meeting, if the schedule has one
+        upcoming = self.bot.schedule.upcoming(game_name, team["name"], limit=25)
+        meeting = next((match for match in upcoming if opponent["id"] in match.team_ids), None)
+        card = self.bot.cards.head_to_head_card(team, opponent, analytics.head_to_head(team["id"], opponent["id"]),
+                                                analytics.predict(team["id"], opponent["id"]), meeting)
+        await self.bot.cards.send(interaction, card)
+
+# Called by bot.load_extension when Main discovers this module in commands/
+async def setup(bot):
+    await bot.add_cog(PredictCog(bot))
@@ -0,0 +1,140 @@
+import discord
+from discord.ext import commands, tasks
+from discord import app_commands
+import logging
+import asyncio
+from VRML_Client.Schedule import MatchSchedule, ScheduleStore
+
+logger = logging.getLogger(__name__)
+
+class SchedulePollerCog(commands.Cog):
+    def __init__(self, bot):
+        logger.info("SchedulePollerCogLoaded")
+        self.bot = bot
+        self.store = ScheduleStore()
+
+        # Games (and optional regions) to keep in memory, e.g. [{"game": "breachers", "region": "EU"}]
+        self.tracked_games = bot.config.get("trackedGames", [])
+        self.poll_schedule.change_interval(seconds=bot.config.get("schedulePollSeconds", 120))
+        # (game, region) -> schedule store version last loaded, used by the processes that don't poll VRML
+        self.versions = {}
+
+    # Cogs are loaded in setup_hook, on the bot's own event loop, so the poller can start straight away. A --sync run
+    # only needs the commands in the tree, it must not poll VRML or write the schedule store
+    async def cog_load(self):
+        if not self.bot.force_sync:
+            self.poll_schedule.start()
+
+    async def cog_unload(self):
+        self.poll_schedule.cancel()
+
+    @tasks.loop(seconds=120)
+    async def poll_schedule(self):
+        for tracked in self.tracked_games:
+            try:
+                # With several shard processes only the first one polls VRML, the others follow the shared store
+                if self.bot.is_leader:
+                    await self.poll_game(tracked["game"], tracked.get("region"))
+                else:
+                    await self.follow_game(tracked["game"], tracked.get("region"))
+            except Exception as e:
+                logger.exception("Failed to poll matches for '%s': %s", tracked, e)
+
+    @poll_schedule.before_loop
+    async def seed_schedule(self):
+        # Start from the persisted snapshot so a restart doesn't announce every match again
+        for tracked in self.tracked_games:
+            game, region = tracked["game"], tracked.get("region")
+            self.versions[MatchSchedule.make_key(game, region)] = await asyncio.to_thread(self.store.version, game, region)
+            stored = await asyncio.to_thread(self.store.load, game, region)
+            if stored:
+                self.bot.schedule.load(game, region, stored)
+                self.bot.names.learn_schedule(game, self.bot.schedule)
+                self.bot.dispatch("vrml_schedule_updated", game)
+            await self.load_snapshot(game, region)
+
+    # Function to learn every team of the game from a saved league snapshot, if there is one (API_Tests/League_Snapshot.py)
+    async def load_snapshot(self, game, region):
+        # Imported here so the bot only loads numpy when snapshots are used
+        from VRML_Client import Snapshot
+        if Snapshot.np is None:
+            return
+        snapshot = await asyncio.to_thread(Snapshot.load_snapshot, game, region)
+        if snapshot is not None:
+            self.bot.names.learn_snapshot(game, snapshot)
+            logger.info("Loaded %d teams for %s from %s", len(snapshot), game, snapshot.path)
+
+    # Function to fetch one game/region, diff it against the previous snapshot and emit the events
+    async def poll_game(self, game, region):
+        match_data = await self.bot.vrml.fetch_matches(game, region)
+        if match_data is None:
+            return  # Keep serving the previous snapshot
+
+        # Parsing a full league's matches takes long enough to stall the gateway, so only the diff runs on the loop
+        current = await asyncio.to_thread(MatchSchedule.parse, match_data)
+        events, changed, removed = self.bot.schedule.apply(game, region, current)
+        # Keep the local team name index (used for autocomplete and name resolution) in step with the schedule
+        if changed:
+            self.bot.names.learn_schedule(game, self.bot.schedule)
+            await asyncio.to_thread(self.store.save, game, region, changed)
+        if changed or removed:
+            self.bot.dispatch("vrml_schedule_updated", game)
+        if removed:
+            await asyncio.to_thread(self.store.delete, game, region, removed)
+
+        # Other cogs listen with @commands.Cog.listener() async def on_vrml_match_event(self, event),
+        # and to on_vrml_schedule_updated(game) for any change at all
+        for event in events:
+            self.bot.dispatch("vrml_match_event", event)
+
+    # Function to pick up the snapshot the polling process wrote to the shared store, if it changed
+    async def follow_game(self, game, region):
+        key = MatchSchedule.make_key(game, region)
+        version = await asyncio.to_thread(self.store.version, game, region)
+        if version == self.versions.get(key):
+            return
+        self.versions[key] = version
+
+        stored = await asyncio.to_thread(self.store.load, game, region)
+        events, changed, removed = self.bot.schedule.apply(game, region, stored)
+        if changed:
+            self.bot.names.learn_schedule(game, self.bot.schedule)
+        if changed or removed:
+            self.bot.dispatch("vrml_schedule_updated", game)
+        # Each process dispatches the events for the guilds on its own shards
+        for event in events:
+            self.bot.dispatch("vrml_match_event", event)
+
+    @app_commands.command(name="upcoming-matches")
+    async def upcomingmatches(self, interaction: discord.Interaction, game_name: str, team_name: str = None, division: str = None, hours: int = None):
+        # Answered from the in-memory schedule index, no VRML request
+        matches = self.bot.schedule.upcoming(game_name, team_name, division, hours)
+        title = " - ".join(part for part in (team_name or game_name, division, f"next {hours}h" if hours else None) if part)
+        if not matches:
+            await interaction.response.send_message(f"No upcoming matches known for {title}.", ephemeral=True)
+            return
+
+        embed = discord.Embed(
+            title=f"Upcoming matches - {title}",
+            color=discord.Color.green(),
+        )
+        for match in matches:
+            embed.add_field(
+                name=match.title,
+                value=f"<t:{match.scheduled_epoch}:F> - Week {match.week} ({match.division or 'no division'})",
+                inline=False,
+            )
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="next-match")
+    async def nextmatch(self, interaction: discord.Interaction, game_name: str, team_name: str):
+        matches = self.bot.schedule.upcoming(game_name, team_name, limit=1)
+        if not matches:
+            await interaction.response.send_message(f"No upcoming match known for {team_name}.", ephemeral=True)
+            return
+        # Answered from the schedule index, the card is only built once per version of the match
+        await self.bot.cards.send(interaction, self.bot.cards.match_card(matches[0]))
+
+# Called by bot.load_extension when Main discovers this module in commands/
+async def setup(bot):
+    await bot.add_cog(SchedulePollerCog(bot))
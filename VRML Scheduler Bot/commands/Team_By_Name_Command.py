@@ -1,40 +1,61 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import requests
+import logging
 import json
+from VRML_Client.Name_Index import best_match
+from Work_Queue import run_deferred
+
+logger = logging.getLogger(__name__)
 
 class TeamByNameCog(commands.Cog):
     def __init__(self, bot):
-        print("TeamByNameCogLoaded")
+        logger.info("TeamByNameCogLoaded")
         self.bot = bot
 
     @app_commands.command(name="team-by-name")
     async def teambyname(self, interaction: discord.Interaction, game_name: str,team_name: str):
-        team_data = await self.fetch_team_data(game_name,team_name)
+        # Names picked from autocomplete (or typed exactly) are answered from the local index without a VRML call
+        known_team = self.bot.names.index("teams", game_name).exact(team_name, 1)
+        # and a team shown before reuses its card
+        if known_team and known_team[0].get("logo"):
+            await self.bot.cards.send(interaction, self.bot.cards.team_card(known_team[0]))
+            return
+
+        # Anything else needs VRML, which can take longer than Discord's 3 seconds, so defer and queue the lookup
+        async def respond(team_data):
+            # The client returns None once retries are exhausted (or the API is known to be down)
+            if team_data is None:
+                await interaction.edit_original_response(content="VRML is not responding right now, please try again in a minute.")
+                return
+            if not team_data:
+                await interaction.edit_original_response(content=f"No team found for '{team_name}' in {game_name}.")
+                return
+
+            self.bot.names.learn_team_search(game_name, team_data)
+            # The closest name rather than whatever the search happened to list first
+            team = best_match(team_data, team_name) or team_data[0]
+            card = self.bot.cards.team_card({"id": team["id"], "name": team["name"], "logo": team["image"]})
+            await self.bot.cards.send(interaction, card, edit=True)
 
-        team_name = team_data[0]["name"]
-        team_logo = f"https://vrmasterleague.com{team_data[0]["image"]}"
-        embed = discord.Embed(
-            title=f"{team_name}",
-            color=discord.Color.green(),
-        ) 
-        embed.set_image(url=team_logo)
-        await interaction.response.send_message(embed=embed)
+        await run_deferred(interaction, lambda: self.fetch_team_data(game_name, team_name), respond)
+
+    @teambyname.autocomplete("team_name")
+    async def team_name_autocomplete(self, interaction: discord.Interaction, current: str):
+        game = interaction.namespace.game_name or ""
+        teams = self.bot.names.index("teams", game).search(current, 25)
+        return [app_commands.Choice(name=team["name"][:100], value=team["name"][:100]) for team in teams]
+
+    @teambyname.autocomplete("game_name")
+    async def game_name_autocomplete(self, interaction: discord.Interaction, current: str):
+        games = set(self.bot.names.games())
+        games.update(tracked["game"].lower() for tracked in self.bot.config.get("trackedGames", []))
+        return [app_commands.Choice(name=game, value=game) for game in sorted(games) if current.lower() in game][:25]
 
     async def fetch_team_data(self, game, team_name):
-        try:
-            # Build the API URL dynamically based on the game and team
-            api_url = f'https://api.vrmasterleague.com/{game}/Teams/Search'
-            params = {"name": team_name}
-            
-            # Print the API URL before making the request
-            print(f"Fetching data from URL: {api_url}?name={team_name}")
-
-            response = requests.get(api_url, params=params)
-            response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
-            
-            return response.json()
-        except Exception as e:
-            print(f"Failed to fetch data for team '{team_name}' in game '{game}': {e}")
-            return None
\ No newline at end of file
+        # Uses the bot's shared, pooled VRML session so the event loop is never blocked
+        return await self.bot.vrml.search_teams(game, team_name)
+
+# Called by bot.load_extension when Main discovers this module in commands/
+async def setup(bot):
+    await bot.add_cog(TeamByNameCog(bot))
@@ -0,0 +1,123 @@
+import numpy as np
+from VRML_Client.Snapshot import PLAYED, decode
+
+ELO_BASE = 1000  # Starting Elo for a team replayed from its first known match
+ELO_K = 32  # How far one result moves a rating
+ELO_SCALE = 400  # Rating gap that makes a team 10 times as likely to win
+WEEK_SECONDS = 7 * 24 * 60 * 60
+# Shown next to predictions so nobody reads them as VRML's MMR
+RATING_SOURCE = "Elo replayed from the league snapshot's results"
+
+# Function to turn rating gaps into the chance the first team wins (the Elo logistic curve)
+def win_probability(rating, opponent_rating):
+    return 1.0 / (1.0 + np.power(10.0, (opponent_rating - rating) / ELO_SCALE))
+
+# Function to replay every played match of a snapshot into Elo ratings. Matches are taken a week at a time: all
+# results of a week are scored against the ratings from before it and applied together, one vectorized step per week
+def replay_elo(snapshot, k=ELO_K, base=ELO_BASE):
+    ratings = np.full(len(snapshot.teams), float(base))
+    matches = snapshot.matches
+    played = matches[(matches["status"] == PLAYED) & (matches["home"] >= 0) & (matches["away"] >= 0)]
+    if not len(played):
+        return ratings
+
+    home = played["home"]
+    away = played["away"]
+    # 1 for a home win, 0 for an away win, 0.5 for a tie
+    home_result = np.where(played["winner"] == home, 1.0, np.where(played["winner"] == away, 0.0, 0.5))
+    weeks = played["scheduled_epoch"] // WEEK_SECONDS
+    boundaries = np.flatnonzero(np.diff(weeks)) + 1
+
+    for week in np.split(np.arange(len(played)), boundaries):
+        expected = win_probability(ratings[home[week]], ratings[away[week]])
+        change = k * (home_result[week] - expected)
+        np.add.at(ratings, home[week], change)
+        np.add.at(ratings, away[week], -change)
+    return ratings
+
+class LeagueAnalytics:
+    def __init__(self, snapshot, division=None, k=ELO_K, base=ELO_BASE):
+        self.snapshot = snapshot
+        teams = snapshot.teams
+
+        # Every team is rated on the replayed Elo scale. VRML's MMR is on a different scale (and missing for some
+        # teams), mixing the two would compare numbers that don't mean the same thing, so it's only kept for display
+        self.elo = replay_elo(snapshot, k, base)
+        self.mmr = teams["mmr"].astype(float)
+        self.ratings = self.elo
+
+        # The pairwise matrices only cover one division (or the whole snapshot), rows are snapshot team rows
+        self.rows = snapshot.division_rows(division) if division else np.arange(len(teams))
+        self.local = np.full(len(teams), -1)
+        self.local[self.rows] = np.arange(len(self.rows))
+
+        self.strength_of_schedule = self.compute_strength_of_schedule()
+        local_ratings = self.ratings[self.rows]
+        # probabilities[i, j] is the chance team i beats team j
+        self.probabilities = win_probability(local_ratings[:, None], local_ratings[None, :])
+        self.wins, self.games = self.compute_head_to_head()
+
+    # Function to average the rating of every opponent each team has played
+    def compute_strength_of_schedule(self):
+        matches = self.snapshot.matches
+        played = matches[(matches["status"] == PLAYED) & (matches["home"] >= 0) & (matches["away"] >= 0)]
+        size = len(self.snapshot.teams)
+        opponent_total = (np.bincount(played["home"], weights=self.ratings[played["away"]], minlength=size)
+                          + np.bincount(played["away"], weights=self.ratings[played["home"]], minlength=size))
+        games = np.bincount(played["home"], minlength=size) + np.bincount(played["away"], minlength=size)
+        return np.divide(opponent_total, games, out=np.zeros(size), where=games > 0)
+
+    # Function to count wins and games between every pair of teams in the matrices
+    def compute_head_to_head(self):
+        size = len(self.rows)
+        wins = np.zeros((size, size), dtype=np.int32)
+        games = np.zeros((size, size), dtype=np.int32)
+
+        matches = self.snapshot.matches
+        played = matches[(matches["status"] == PLAYED) & (matches["home"] >= 0) & (matches["away"] >= 0)]
+        home = self.local[played["home"]]
+        away = self.local[played["away"]]
+        inside = (home >= 0) & (away >= 0)
+        home, away, winner = home[inside], away[inside], played["winner"][inside]
+
+        np.add.at(games, (home, away), 1)
+        np.add.at(games, (away, home), 1)
+        home_won = winner == played["home"][inside]
+        away_won = winner == played["away"][inside]
+        np.add.at(wins, (home[home_won], away[home_won]), 1)
+        np.add.at(wins, (away[away_won], home[away_won]), 1)
+        return wins, games
+
+    # Function to get a team's snapshot row from its teamID, or None
+    def team_row(self, team_id):
+        return self.snapshot.team_rows.get(team_id)
+
+    # Function to get the chance the first team beats the second, or None if either isn't in the snapshot
+    def predict(self, team_id, opponent_id):
+        row, opponent_row = self.team_row(team_id), self.team_row(opponent_id)
+        if row is None or opponent_row is None:
+            return None
+        return float(win_probability(self.ratings[row], self.ratings[opponent_row]))
+
+    # Function to predict a list of (home teamID, away teamID) pairs in one go, unknown teams get nan
+    def predict_many(self, pairs):
+        rows = np.array([(self.team_row(home), self.team_row(away)) for home, away in pairs], dtype=float).reshape(-1, 2)
+        known = ~np.isnan(rows).any(axis=1)
+        probabilities = np.full(len(rows), np.nan)
+        home, away = rows[known, 0].astype(int), rows[known, 1].astype(int)
+        probabilities[known] = win_probability(self.ratings[home], self.ratings[away])
+        return probabilities
+
+    # Function to get the (wins, losses, games) record of one team against another inside the matrices
+    def head_to_head(self, team_id, opponent_id):
+        row, opponent_row = self.team_row(team_id), self.team_row(opponent_id)
+        if row is None or opponent_row is None or self.local[row] < 0 or self.local[opponent_row] < 0:
+            return None
+        first, second = self.local[row], self.local[opponent_row]
+        return int(self.wins[first, second]), int(self.wins[second, first]), int(self.games[first, second])
+
+    # Function to list the matrix teams by rating, as (name, elo, VRML MMR, strength of schedule)
+    def table(self):
+        order = self.rows[np.argsort(-self.ratings[self.rows], kind="stable")]
+        return [(decode(self.snapshot.teams["name"][row]), float(self.ratings[row]), float(self.mmr[row]), float(self.strength_of_schedule[row]))
+                for row in order]
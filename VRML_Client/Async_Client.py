@@ -0,0 +1,266 @@
+import asyncio
+import json
+import logging
+import time
+import aiohttp
+from VRML_Client import Endpoints, Rate_Limit, Streaming
+from VRML_Client.Metrics import ClientMetrics
+from VRML_Client.Cache import ResponseCache
+from VRML_Client.Disk_Cache import DiskCache
+from VRML_Client.Single_Flight import SingleFlight
+from VRML_Client.Transport import NetworkTransport, TransportConnectionError
+
+logger = logging.getLogger(__name__)
+
+# Failures that mean the request never got an answer, retried and counted against the circuit breaker
+CONNECTION_ERRORS = (aiohttp.ClientConnectionError, asyncio.TimeoutError, TransportConnectionError)
+
+class AsyncVRMLClient:
+    def __init__(self, base_url=Endpoints.BASE_URL, timeout=Endpoints.DEFAULT_TIMEOUT, retries=Endpoints.DEFAULT_RETRIES, cache=None, disk_cache=None, rate_limiter=None, breaker=None, limit=20, limit_per_host=10, keepalive_timeout=30, transport=None):
+        self.base_url = base_url
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.retries = retries
+        self.metrics = ClientMetrics()
+        # In-process TTL + LRU cache in front of the network (cached responses are shared, don't mutate them)
+        self.cache = cache or ResponseCache()
+        # Persistent cache so bot restarts start warm (pass disk_cache=False to stay in memory only)
+        if disk_cache is None:
+            disk_cache = DiskCache()
+        self.disk_cache = disk_cache or None
+        # Concurrent identical lookups (e.g. everyone running /team-by-name after an announcement) share one request
+        self.single_flight = SingleFlight()
+
+        # Token bucket and circuit breaker are shared process-wide unless the caller passes its own
+        self.rate_limiter = rate_limiter or Rate_Limit.get_rate_limiter()
+        self.breaker = breaker or Rate_Limit.get_circuit_breaker()
+
+        # Connection pool settings, shared by every cog that uses this client
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        # Where requests actually go: the network, or a RecordingTransport / ReplayTransport for offline runs
+        self.transport = transport or NetworkTransport()
+
+        self.session = None
+
+    # Function to open the pooled session (must be called from inside the running event loop)
+    async def start(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+
+    # Function to close the pooled session and all kept-alive connections
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    # Function to make a GET request against the VRML API and return the decoded JSON
+    async def get_json(self, endpoint, path, params=None):
+        if self.session is None or self.session.closed:
+            await self.start()
+
+        params = Endpoints.clean_params(params)
+
+        cache_key = self.cache.make_key(path, params)
+        found, cached = self.cache.get(endpoint, cache_key)
+        if found:
+            return cached
+
+        return await self.single_flight.run(endpoint, cache_key, lambda: self.fetch_json(endpoint, path, params, cache_key))
+
+    # Function to load a response from the persistent cache or the network and store it in both caches
+    async def fetch_json(self, endpoint, path, params, cache_key):
+        api_url = f"{self.base_url}/{path}"
+
+        # Fall back to the persistent cache (off the event loop), served directly while it's still fresh
+        disk_key = None
+        stored = None
+        if self.disk_cache is not None:
+            disk_key = self.disk_cache.make_key(path, params)
+            stored = await asyncio.to_thread(self.disk_cache.get, disk_key)
+            if stored is not None and self.disk_cache.is_fresh(stored):
+                data = json.loads(stored["body"])
+                self.cache.set(endpoint, cache_key, data, age=stored["age"])
+                return data
+        # Otherwise revalidate the stored copy with a conditional request
+        headers = DiskCache.conditional_headers(stored)
+
+        logger.debug("Fetching data from URL: %s with params: %s", api_url, params)
+        self.metrics.begin(endpoint)
+        try:
+            return await self.request_json(endpoint, api_url, params, headers, stored, disk_key, cache_key)
+        finally:
+            self.metrics.finish(endpoint)
+
+    # Function to send a request (with retries) and store the response in both caches, or fall back to the stored copy
+    async def request_json(self, endpoint, api_url, params, headers, stored, disk_key, cache_key):
+        start = time.perf_counter()
+        error = None
+        retry_after = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(Rate_Limit.backoff_delay(attempt - 1, retry_after))
+            # Fail fast while the API is known to be down instead of piling more requests onto it
+            if not self.breaker.allow():
+                error = "circuit breaker is open"
+                break
+            wait = self.rate_limiter.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                response = await self.transport.get_async(self.session, api_url, params, headers)
+                retry_after = self.check_response_health(response.status, response.headers)
+                if response.status in Endpoints.RETRY_STATUSES and attempt < self.retries:
+                    continue
+                not_modified = response.status == 304 and stored is not None
+                if not not_modified:
+                    response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
+                body = stored["body"] if not_modified else response.body
+                data = json.loads(body)
+            except CONNECTION_ERRORS as e:
+                self.breaker.record_failure()
+                error = e
+                continue
+            except Exception as e:
+                error = e
+                break
+
+            self.metrics.record(endpoint, time.perf_counter() - start, True, attempt)
+            self.cache.set(endpoint, cache_key, data)
+            if self.disk_cache is not None:
+                await asyncio.to_thread(self.disk_cache.store_response, disk_key, endpoint, body, response.headers, not_modified)
+            return data
+
+        self.metrics.record(endpoint, time.perf_counter() - start, False, attempt)
+        # Degrade to the last stored copy rather than failing outright
+        if stored is not None:
+            logger.warning("Failed to fetch data from '%s': %s (serving cached copy from %.0fs ago)", api_url, error, stored["age"])
+            return json.loads(stored["body"])
+        logger.warning("Failed to fetch data from '%s': %s", api_url, error)
+        return None
+
+    # Function to feed a response status into the breaker and rate limiter, returns the Retry-After delay if any
+    def check_response_health(self, status, headers):
+        retry_after = Rate_Limit.parse_retry_after(headers.get("Retry-After"))
+        if status >= 500:
+            self.breaker.record_failure()
+        else:
+            # Anything else (even a 429) means the API is up
+            self.breaker.record_success()
+        if status == 429:
+            # Slow every caller down, not just this one
+            self.rate_limiter.pause(retry_after if retry_after is not None else Endpoints.RETRY_BACKOFF)
+        return retry_after
+
+    # Function to return a response from the memory cache or a fresh disk cache entry, or None if it must be fetched
+    async def cached_json(self, endpoint, path, params):
+        found, cached = self.cache.get(endpoint, self.cache.make_key(path, params))
+        if found:
+            return cached
+        if self.disk_cache is not None:
+            stored = await asyncio.to_thread(self.disk_cache.get, self.disk_cache.make_key(path, params))
+            if stored is not None and self.disk_cache.is_fresh(stored):
+                return json.loads(stored["body"])
+        return None
+
+    # Function to yield (path, value) for only the requested paths (e.g. "team.players[*].playerName") as they
+    # arrive off the socket, instead of loading the whole document first
+    async def iter_paths(self, endpoint, path, paths, params=None):
+        if self.session is None or self.session.closed:
+            await self.start()
+        params = Endpoints.clean_params(params)
+
+        # Nothing to stream when the document is already cached, when ijson isn't installed or the transport can't stream
+        cached = await self.cached_json(endpoint, path, params)
+        if cached is not None or Streaming.ijson is None or not self.transport.streams or not self.breaker.allow():
+            data = cached if cached is not None else await self.get_json(endpoint, path, params)
+            for pair in Streaming.extract_paths(data, paths):
+                yield pair
+            return
+
+        api_url = f"{self.base_url}/{path}"
+        logger.debug("Streaming data from URL: %s with params: %s", api_url, params)
+
+        wait = self.rate_limiter.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        start = time.perf_counter()
+        yielded = False
+        self.metrics.begin(endpoint)
+        try:
+            async with self.transport.stream_async(self.session, api_url, params) as response:
+                self.check_response_health(response.status, response.headers)
+                response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
+                async for pair in Streaming.iter_paths_async(Streaming.ijson.parse_async(response.body), paths):
+                    yielded = True
+                    yield pair
+        except Exception as e:
+            if isinstance(e, CONNECTION_ERRORS):
+                self.breaker.record_failure()
+            self.metrics.record(endpoint, time.perf_counter() - start, False)
+            logger.warning("Failed to stream data from '%s': %s", api_url, e)
+            # Only fall back when nothing was handed out yet, otherwise callers would see duplicates
+            if not yielded:
+                for pair in Streaming.extract_paths(await self.get_json(endpoint, path, params), paths):
+                    yield pair
+            return
+        finally:
+            self.metrics.finish(endpoint)
+        self.metrics.record(endpoint, time.perf_counter() - start, True)
+
+    # Function to collect the requested paths into {path: value} (wildcard paths give a list)
+    async def stream_paths(self, endpoint, path, paths, params=None):
+        return Streaming.collect([pair async for pair in self.iter_paths(endpoint, path, paths, params)], paths)
+
+    # Function to pull only some paths out of a teams/{id} response
+    async def stream_team_details(self, team_id, paths):
+        endpoint, path, params = Endpoints.team_details(team_id)
+        return await self.stream_paths(endpoint, path, paths, params)
+
+    # Function to fetch the details of many teams at once (at most `limit` in flight), yielding (teamID, data) in the
+    # order they arrive rather than the order asked for
+    async def iter_team_details(self, team_ids, limit=Endpoints.DETAIL_WORKERS):
+        semaphore = asyncio.Semaphore(limit)
+
+        async def fetch(team_id):
+            async with semaphore:
+                return team_id, await self.fetch_team_details(team_id)
+
+        tasks = [asyncio.ensure_future(fetch(team_id)) for team_id in team_ids]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            # The caller stopped early (or gave up), don't leave requests running for nobody
+            for task in tasks:
+                task.cancel()
+
+    # Function to search for teams by name
+    async def search_teams(self, game, team_name, region=None, season=None):
+        return await self.get_json(*Endpoints.team_search(game, team_name, region, season))
+
+    # Function to fetch detailed data for a team using the team ID
+    async def fetch_team_details(self, team_id):
+        return await self.get_json(*Endpoints.team_details(team_id))
+
+    # Function to search for players by name
+    async def search_players(self, player_name):
+        return await self.get_json(*Endpoints.player_search(player_name))
+
+    # Function to fetch player data by playerID (not userID)
+    async def fetch_player(self, player_id):
+        return await self.get_json(*Endpoints.player_details(player_id))
+
+    # Function to fetch match data for a game
+    async def fetch_matches(self, game, region=None, filters=None, posMin=1):
+        return await self.get_json(*Endpoints.matches(game, region, filters, posMin))
+
+    # Function to fetch statistics between two teams
+    async def fetch_team_statistics(self, team_id1, team_id2):
+        return await self.get_json(*Endpoints.team_statistics(team_id1, team_id2))
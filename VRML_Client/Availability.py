@@ -0,0 +1,217 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from VRML_Client.Disk_Cache import DEFAULT_PATH as CACHE_PATH
+from VRML_Client.Interval_Tree import IntervalTree, intersect_intervals
+
+DEFAULT_PATH = os.path.join(os.path.dirname(CACHE_PATH), "availability.sqlite3")
+HORIZON_DAYS = 28  # How far ahead weekly windows are expanded into the trees, extended when a query needs more
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# Kinds of availability owners
+TEAM = "team"
+PLAYER = "player"
+CASTER = "caster"
+
+# Function to look up a timezone by name ("Europe/London", "UTC"...), or None if it isn't known
+def get_timezone(name):
+    try:
+        return ZoneInfo(name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+# Function to turn a local wall-clock window on a date into UTC epochs, an end at or before the start runs past midnight.
+# Each date is converted on its own, so a weekly window stays at the same local time across daylight saving changes
+def local_window(date, start_minute, end_minute, zone):
+    start = datetime(date.year, date.month, date.day, start_minute // 60, start_minute % 60, tzinfo=zone)
+    end_date = date if end_minute > start_minute else date + timedelta(days=1)
+    end = datetime(end_date.year, end_date.month, end_date.day, end_minute // 60, end_minute % 60, tzinfo=zone)
+    return int(start.timestamp()), int(end.timestamp())
+
+class AvailabilityStore:
+    def __init__(self, path=DEFAULT_PATH, horizon_days=HORIZON_DAYS):
+        self.path = path
+        self.horizon = horizon_days * 24 * 60 * 60
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # A window is either weekly (weekday + local minutes + timezone) or one-off (UTC epochs)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS windows ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, owner_id TEXT NOT NULL, name TEXT, team_id TEXT, "
+            "weekday INTEGER, start_minute INTEGER, end_minute INTEGER, timezone TEXT, start_epoch INTEGER, end_epoch INTEGER)"
+        )
+        self.connection.commit()
+        self.data_version = None
+        self.reload()
+
+    # Function to (re)read every window into memory, the trees start from a day ago
+    def reload(self):
+        with self.lock:
+            self.trees = {}  # (kind, owner ID) -> IntervalTree of UTC [start, end) windows, the value is the window's row ID
+            self.rules = {}  # row ID -> row dict
+            self.names = {}  # (kind, owner ID) -> display name
+            self.members = {}  # team ID -> set of player IDs that registered for it
+            self.expanded_from = int(time.time()) - 24 * 60 * 60
+            self.expanded_until = self.expanded_from + self.horizon
+
+            self.data_version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+            rows = self.connection.execute(
+                "SELECT id, kind, owner_id, name, team_id, weekday, start_minute, end_minute, timezone, start_epoch, end_epoch FROM windows"
+            ).fetchall()
+            for row in rows:
+                self.index_rule(dict(zip(("id", "kind", "owner_id", "name", "team_id", "weekday", "start_minute", "end_minute",
+                                          "timezone", "start_epoch", "end_epoch"), row)))
+
+    # Function to reload when another connection (another shard process) changed the windows. data_version only
+    # moves for other connections' commits, this store's own writes are already indexed
+    def refresh(self):
+        with self.lock:
+            if self.connection.execute("PRAGMA data_version").fetchone()[0] != self.data_version:
+                self.reload()
+
+    # Function to put a window row into memory and its occurrences into the owner's tree
+    def index_rule(self, rule):
+        key = (rule["kind"], rule["owner_id"])
+        self.rules[rule["id"]] = rule
+        if rule["name"]:
+            self.names[key] = rule["name"]
+        if rule["kind"] == PLAYER and rule["team_id"]:
+            self.members.setdefault(rule["team_id"], set()).add(rule["owner_id"])
+        self.expand_rule(rule, self.expanded_from, self.expanded_until)
+
+    # Function to add a rule's occurrences between two epochs to its owner's tree (a one-off window is added as it is)
+    def expand_rule(self, rule, start, end):
+        tree = self.trees.setdefault((rule["kind"], rule["owner_id"]), IntervalTree())
+        if rule["weekday"] is None:
+            tree.add(rule["start_epoch"], rule["end_epoch"], rule["id"])
+            return
+
+        zone = get_timezone(rule["timezone"])
+        if zone is None:
+            return
+        # Walk the local dates that can start inside [start, end), a day either side for timezone offsets
+        date = datetime.fromtimestamp(start, zone).date() - timedelta(days=1)
+        last_date = datetime.fromtimestamp(end, zone).date() + timedelta(days=1)
+        date += timedelta(days=(rule["weekday"] - date.weekday()) % 7)
+        while date <= last_date:
+            window_start, window_end = local_window(date, rule["start_minute"], rule["end_minute"], zone)
+            if start <= window_start < end:
+                tree.add(window_start, window_end, rule["id"])
+            date += timedelta(days=7)
+
+    # Function to make sure weekly windows are expanded at least up to an epoch
+    def ensure_expanded(self, until):
+        if until <= self.expanded_until:
+            return
+        new_until = until + self.horizon
+        for rule in self.rules.values():
+            if rule["weekday"] is not None:
+                self.expand_rule(rule, self.expanded_until, new_until)
+        self.expanded_until = new_until
+
+    # Function to save a window row and index it, returns its row ID
+    def insert(self, rule):
+        cursor = self.connection.execute(
+            "INSERT INTO windows (kind, owner_id, name, team_id, weekday, start_minute, end_minute, timezone, start_epoch, end_epoch) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (rule["kind"], rule["owner_id"], rule.get("name"), rule.get("team_id"), rule.get("weekday"), rule.get("start_minute"),
+             rule.get("end_minute"), rule.get("timezone"), rule.get("start_epoch"), rule.get("end_epoch")),
+        )
+        self.connection.commit()
+        rule = dict({"name": None, "team_id": None, "weekday": None, "start_minute": None, "end_minute": None,
+                     "timezone": None, "start_epoch": None, "end_epoch": None}, **rule, id=cursor.lastrowid)
+        self.index_rule(rule)
+        return rule["id"]
+
+    # Function to add a weekly window in the owner's own timezone, e.g. (PLAYER, "1234", 2, 19 * 60, 22 * 60, "Europe/London")
+    def add_weekly_window(self, kind, owner_id, weekday, start_minute, end_minute, timezone_name="UTC", name=None, team_id=None):
+        if get_timezone(timezone_name) is None:
+            return None
+        with self.lock:
+            return self.insert({"kind": kind, "owner_id": owner_id, "name": name, "team_id": team_id, "weekday": weekday,
+                                "start_minute": start_minute, "end_minute": end_minute, "timezone": timezone_name})
+
+    # Function to add a one-off window given as UTC epochs
+    def add_window(self, kind, owner_id, start, end, name=None, team_id=None):
+        with self.lock:
+            return self.insert({"kind": kind, "owner_id": owner_id, "name": name, "team_id": team_id, "start_epoch": start, "end_epoch": end})
+
+    # Function to add a one-off window in which a team can play
+    def add_team_window(self, team_id, start, end):
+        return self.add_window(TEAM, team_id, start, end)
+
+    # Function to add a one-off window in which a caster can cast
+    def add_caster_window(self, caster_id, name, start, end):
+        return self.add_window(CASTER, caster_id, start, end, name)
+
+    # Function to forget every window of an owner
+    def clear(self, kind, owner_id):
+        with self.lock:
+            self.connection.execute("DELETE FROM windows WHERE kind = ? AND owner_id = ?", (kind, owner_id))
+            self.connection.commit()
+            self.trees.pop((kind, owner_id), None)
+            self.names.pop((kind, owner_id), None)
+            for rule_id in [rule_id for rule_id, rule in self.rules.items() if (rule["kind"], rule["owner_id"]) == (kind, owner_id)]:
+                del self.rules[rule_id]
+            if kind == PLAYER:
+                for players in self.members.values():
+                    players.discard(owner_id)
+
+    # Function to forget every window of a team
+    def clear_team(self, team_id):
+        self.clear(TEAM, team_id)
+
+    # Function to forget every window of a caster
+    def clear_caster(self, caster_id):
+        self.clear(CASTER, caster_id)
+
+    # Function to list an owner's merged windows between two epochs
+    def windows(self, kind, owner_id, start, end):
+        with self.lock:
+            self.refresh()
+            self.ensure_expanded(end)
+            tree = self.trees.get((kind, owner_id))
+            return tree.windows(start, end) if tree is not None else []
+
+    # Function to list when a team can play between two epochs: its own windows (if it set any) intersected with the
+    # windows of every player registered for it, so the answer is when everyone is free
+    def team_windows(self, team_id, start, end):
+        with self.lock:
+            self.refresh()
+            sources = []
+            if self.trees.get((TEAM, team_id)):
+                sources.append(self.windows(TEAM, team_id, start, end))
+            for player_id in sorted(self.members.get(team_id, ())):
+                sources.append(self.windows(PLAYER, player_id, start, end))
+            if not sources:
+                return []
+            shared = sources[0]
+            for windows in sources[1:]:
+                shared = intersect_intervals(shared, windows)
+            return shared
+
+    # Function to list a caster's merged windows between two epochs
+    def caster_windows(self, caster_id, start, end):
+        return self.windows(CASTER, caster_id, start, end)
+
+    # Function to list the IDs of everyone who registered as a caster
+    @property
+    def casters(self):
+        with self.lock:
+            self.refresh()
+            return [owner_id for kind, owner_id in self.trees if kind == CASTER]
+
+    # Function to get a caster's display name
+    @property
+    def caster_names(self):
+        with self.lock:
+            self.refresh()
+            return {owner_id: name for (kind, owner_id), name in self.names.items() if kind == CASTER}
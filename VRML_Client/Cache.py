@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+
+# How long (in seconds) a response stays fresh for each endpoint
+DEFAULT_TTLS = {
+    "team_search": 6 * 60 * 60,  # Team names and IDs barely change
+    "player_search": 6 * 60 * 60,
+    "team_details": 15 * 60,
+    "player_details": 30 * 60,
+    "team_statistics": 30 * 60,
+    "matches": 90,  # Schedules change constantly
+}
+DEFAULT_TTL = 5 * 60  # Used for endpoints without their own entry
+
+class ResponseCache:
+    def __init__(self, max_entries=512, ttls=None):
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+
+        # Most recently used entries are kept at the end, so eviction pops from the front
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+
+    # Function to build a cache key from the request path (as built by Endpoints) and its (already cleaned) parameters
+    @staticmethod
+    def make_key(path, params):
+        return path, tuple(sorted((key, str(value)) for key, value in params.items()))
+
+    # Function to look up a fresh response, returns (found, value)
+    def get(self, endpoint, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits[endpoint] = self.hits.get(endpoint, 0) + 1
+                    return True, value
+                # Expired, drop it so it doesn't take up an LRU slot
+                del self.entries[key]
+            self.misses[endpoint] = self.misses.get(endpoint, 0) + 1
+            return False, None
+
+    # Function to store a response using the endpoint's TTL, evicting the least recently used entries
+    # age is how old the response already is (e.g. when it was loaded from the disk cache)
+    def set(self, endpoint, key, value, age=0):
+        ttl = self.ttls.get(endpoint, DEFAULT_TTL) - age
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    # Function to drop every cached response
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    # Function to return hit/miss counters per endpoint
+    def stats(self):
+        with self.lock:
+            stats = {"entries": len(self.entries), "endpoints": {}}
+            for endpoint in set(self.hits) | set(self.misses):
+                hits = self.hits.get(endpoint, 0)
+                misses = self.misses.get(endpoint, 0)
+                stats["endpoints"][endpoint] = {"hits": hits, "misses": misses, "hit_ratio": hits / (hits + misses)}
+            return stats
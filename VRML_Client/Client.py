@@ -0,0 +1,248 @@
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+from requests.adapters import HTTPAdapter
+from VRML_Client import Endpoints, Rate_Limit, Streaming
+from VRML_Client.Metrics import ClientMetrics
+from VRML_Client.Cache import ResponseCache
+from VRML_Client.Disk_Cache import DiskCache
+from VRML_Client.Transport import NetworkTransport, TransportConnectionError
+
+logger = logging.getLogger(__name__)
+
+# Failures that mean the request never got an answer, retried and counted against the circuit breaker
+CONNECTION_ERRORS = (requests.ConnectionError, requests.Timeout, TransportConnectionError)
+
+class VRMLClient:
+    def __init__(self, base_url=Endpoints.BASE_URL, timeout=Endpoints.DEFAULT_TIMEOUT, retries=Endpoints.DEFAULT_RETRIES, cache=None, disk_cache=None, rate_limiter=None, breaker=None, pool_size=10, transport=None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.retries = retries
+        self.metrics = ClientMetrics()
+        # In-process TTL + LRU cache in front of the network (cached responses are shared, don't mutate them)
+        self.cache = cache or ResponseCache()
+        # Persistent cache so script reruns start warm (pass disk_cache=False to stay in memory only)
+        if disk_cache is None:
+            disk_cache = DiskCache()
+        self.disk_cache = disk_cache or None
+
+        # Token bucket and circuit breaker are shared process-wide unless the caller passes its own
+        self.rate_limiter = rate_limiter or Rate_Limit.get_rate_limiter()
+        self.breaker = breaker or Rate_Limit.get_circuit_breaker()
+
+        # One session keeps TCP+TLS connections alive between calls, so name->ID->details flows pay the handshake once
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Where requests actually go: the network, or a RecordingTransport / ReplayTransport for offline runs
+        self.transport = transport or NetworkTransport()
+
+    # Function to close the session and its pooled connections
+    def close(self):
+        self.session.close()
+
+    # Function to make a GET request against the VRML API and return the decoded JSON
+    def get_json(self, endpoint, path, params=None):
+        api_url = f"{self.base_url}/{path}"
+        params = Endpoints.clean_params(params)
+
+        cache_key = self.cache.make_key(path, params)
+        found, cached = self.cache.get(endpoint, cache_key)
+        if found:
+            return cached
+
+        # Fall back to the persistent cache, which is served directly while it's inside its freshness window
+        disk_key = None
+        stored = None
+        if self.disk_cache is not None:
+            disk_key = self.disk_cache.make_key(path, params)
+            stored = self.disk_cache.get(disk_key)
+            if stored is not None and self.disk_cache.is_fresh(stored):
+                data = json.loads(stored["body"])
+                self.cache.set(endpoint, cache_key, data, age=stored["age"])
+                return data
+        # Otherwise revalidate the stored copy with a conditional request
+        headers = DiskCache.conditional_headers(stored)
+
+        logger.debug("Fetching data from URL: %s with params: %s", api_url, params)
+        self.metrics.begin(endpoint)
+        try:
+            return self.request_json(endpoint, api_url, params, headers, stored, disk_key, cache_key)
+        finally:
+            self.metrics.finish(endpoint)
+
+    # Function to send a request (with retries) and store the response in both caches, or fall back to the stored copy
+    def request_json(self, endpoint, api_url, params, headers, stored, disk_key, cache_key):
+        start = time.perf_counter()
+        error = None
+        retry_after = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(Rate_Limit.backoff_delay(attempt - 1, retry_after))
+            # Fail fast while the API is known to be down instead of piling more requests onto it
+            if not self.breaker.allow():
+                error = "circuit breaker is open"
+                break
+            wait = self.rate_limiter.reserve()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                response = self.transport.get(self.session, api_url, params, headers, self.timeout)
+                retry_after = self.check_response_health(response.status, response.headers)
+                if response.status in Endpoints.RETRY_STATUSES and attempt < self.retries:
+                    continue
+                not_modified = response.status == 304 and stored is not None
+                if not not_modified:
+                    response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
+                body = stored["body"] if not_modified else response.body
+                data = json.loads(body)
+            except CONNECTION_ERRORS as e:
+                self.breaker.record_failure()
+                error = e
+                continue
+            except Exception as e:
+                error = e
+                break
+
+            self.metrics.record(endpoint, time.perf_counter() - start, True, attempt)
+            self.cache.set(endpoint, cache_key, data)
+            if self.disk_cache is not None:
+                self.disk_cache.store_response(disk_key, endpoint, body, response.headers, not_modified)
+            return data
+
+        self.metrics.record(endpoint, time.perf_counter() - start, False, attempt)
+        # Degrade to the last stored copy rather than failing outright
+        if stored is not None:
+            logger.warning("Failed to fetch data from '%s': %s (serving cached copy from %.0fs ago)", api_url, error, stored["age"])
+            return json.loads(stored["body"])
+        logger.warning("Failed to fetch data from '%s': %s", api_url, error)
+        return None
+
+    # Function to feed a response status into the breaker and rate limiter, returns the Retry-After delay if any
+    def check_response_health(self, status, headers):
+        retry_after = Rate_Limit.parse_retry_after(headers.get("Retry-After"))
+        if status >= 500:
+            self.breaker.record_failure()
+        else:
+            # Anything else (even a 429) means the API is up
+            self.breaker.record_success()
+        if status == 429:
+            # Slow every caller down, not just this one
+            self.rate_limiter.pause(retry_after if retry_after is not None else Endpoints.RETRY_BACKOFF)
+        return retry_after
+
+    # Function to return a response from the memory cache or a fresh disk cache entry, or None if it must be fetched
+    def cached_json(self, endpoint, path, params):
+        found, cached = self.cache.get(endpoint, self.cache.make_key(path, params))
+        if found:
+            return cached
+        if self.disk_cache is not None:
+            stored = self.disk_cache.get(self.disk_cache.make_key(path, params))
+            if stored is not None and self.disk_cache.is_fresh(stored):
+                return json.loads(stored["body"])
+        return None
+
+    # Function to yield (path, value) for only the requested paths (e.g. "team.players[*].playerName") as they
+    # arrive off the socket, instead of loading the whole document first
+    def iter_paths(self, endpoint, path, paths, params=None):
+        params = Endpoints.clean_params(params)
+
+        # Nothing to stream when the document is already cached, when ijson isn't installed or the transport can't stream
+        cached = self.cached_json(endpoint, path, params)
+        if cached is not None or Streaming.ijson is None or not self.transport.streams or not self.breaker.allow():
+            data = cached if cached is not None else self.get_json(endpoint, path, params)
+            yield from Streaming.extract_paths(data, paths)
+            return
+
+        api_url = f"{self.base_url}/{path}"
+        logger.debug("Streaming data from URL: %s with params: %s", api_url, params)
+
+        wait = self.rate_limiter.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        start = time.perf_counter()
+        yielded = False
+        self.metrics.begin(endpoint)
+        try:
+            with self.transport.stream(self.session, api_url, params, self.timeout) as response:
+                self.check_response_health(response.status, response.headers)
+                response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
+                for pair in Streaming.iter_paths(Streaming.ijson.parse(response.body), paths):
+                    yielded = True
+                    yield pair
+        except Exception as e:
+            if isinstance(e, CONNECTION_ERRORS):
+                self.breaker.record_failure()
+            self.metrics.record(endpoint, time.perf_counter() - start, False)
+            logger.warning("Failed to stream data from '%s': %s", api_url, e)
+            # Only fall back when nothing was handed out yet, otherwise callers would see duplicates
+            if not yielded:
+                yield from Streaming.extract_paths(self.get_json(endpoint, path, params), paths)
+            return
+        finally:
+            self.metrics.finish(endpoint)
+        self.metrics.record(endpoint, time.perf_counter() - start, True)
+
+    # Function to collect the requested paths into {path: value} (wildcard paths give a list)
+    def stream_paths(self, endpoint, path, paths, params=None):
+        return Streaming.collect(self.iter_paths(endpoint, path, paths, params), paths)
+
+    # Function to pull only some paths out of a teams/{id} response
+    def stream_team_details(self, team_id, paths):
+        endpoint, path, params = Endpoints.team_details(team_id)
+        return self.stream_paths(endpoint, path, paths, params)
+
+    # Function to run independent lookups concurrently on the shared session, results come back in call order
+    # calls is a list of zero-argument callables, e.g. [lambda: client.search_teams(game, name1), ...]
+    def fan_out(self, calls, max_workers=Endpoints.FAN_OUT_WORKERS):
+        if len(calls) <= 1:
+            return [call() for call in calls]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as executor:
+            futures = [executor.submit(call) for call in calls]
+            return [future.result() for future in futures]
+
+    # Function to fetch the details of many teams at once (max_workers in flight), yielding (teamID, data) in the
+    # order they arrive rather than the order asked for
+    def iter_team_details(self, team_ids, max_workers=Endpoints.DETAIL_WORKERS):
+        if not team_ids:
+            return
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(team_ids))) as executor:
+            futures = {executor.submit(self.fetch_team_details, team_id): team_id for team_id in team_ids}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    # Function to search for teams by name
+    def search_teams(self, game, team_name, region=None, season=None):
+        return self.get_json(*Endpoints.team_search(game, team_name, region, season))
+
+    # Function to fetch detailed data for a team using the team ID
+    def fetch_team_details(self, team_id):
+        return self.get_json(*Endpoints.team_details(team_id))
+
+    # Function to search for players by name
+    def search_players(self, player_name):
+        return self.get_json(*Endpoints.player_search(player_name))
+
+    # Function to fetch player data by playerID (not userID)
+    def fetch_player(self, player_id):
+        return self.get_json(*Endpoints.player_details(player_id))
+
+    # Function to fetch match data for a game
+    def fetch_matches(self, game, region=None, filters=None, posMin=1):
+        return self.get_json(*Endpoints.matches(game, region, filters, posMin))
+
+    # Function to fetch statistics between two teams
+    def fetch_team_statistics(self, team_id1, team_id2):
+        return self.get_json(*Endpoints.team_statistics(team_id1, team_id2))
+
+_default_client = None
+
+# Function to get the process-wide client so every fetcher shares one connection pool
+def get_client():
+    global _default_client
+    if _default_client is None:
+        _default_client = VRMLClient()
+    return _default_client
@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import threading
+import time
+from VRML_Client.Cache import DEFAULT_TTLS, DEFAULT_TTL
+
+# Shared by the API_Tests scripts and the bot so reruns and restarts start warm
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Cache", "vrml_cache.sqlite3")
+MAX_STORED_AGE = 14 * 24 * 60 * 60  # Rows older than this are pruned on open
+
+class DiskCache:
+    def __init__(self, path=DEFAULT_PATH, ttls=None):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # One connection shared between threads (and the bot's to_thread calls), guarded by a lock
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, endpoint TEXT NOT NULL, body TEXT NOT NULL, "
+            "etag TEXT, last_modified TEXT, fetched_at REAL NOT NULL)"
+        )
+        self.connection.commit()
+        self.prune(MAX_STORED_AGE)
+
+    # Function to build a stable text key from the request path (as built by Endpoints) and its (already cleaned) parameters
+    @staticmethod
+    def make_key(path, params):
+        query = "&".join(f"{key}={value}" for key, value in sorted(params.items()))
+        return f"{path}?{query}"
+
+    # Function to load a stored response, returns a dict with the body, validators and age or None
+    def get(self, key):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT endpoint, body, etag, last_modified, fetched_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        endpoint, body, etag, last_modified, fetched_at = row
+        return {
+            "endpoint": endpoint,
+            "body": body,
+            "etag": etag,
+            "last_modified": last_modified,
+            "age": max(0.0, time.time() - fetched_at),
+        }
+
+    # Function to check whether a stored response is still inside its endpoint's freshness window
+    def is_fresh(self, entry):
+        return entry["age"] < self.ttls.get(entry["endpoint"], DEFAULT_TTL)
+
+    # Function to build the conditional request headers for a stored response
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    # Function to store (or replace) a response body together with its validators
+    def set(self, key, endpoint, body, etag=None, last_modified=None):
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, endpoint, body, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, endpoint, body, etag, last_modified, time.time()),
+            )
+            self.connection.commit()
+
+    # Function to persist a network response, or just refresh its timestamp when it was a 304 Not Modified
+    def store_response(self, key, endpoint, body, headers, not_modified):
+        if not_modified:
+            self.touch(key)
+        else:
+            self.set(key, endpoint, body, headers.get("ETag"), headers.get("Last-Modified"))
+
+    # Function to mark a stored response as fresh again after a 304 Not Modified
+    def touch(self, key):
+        with self.lock:
+            self.connection.execute("UPDATE responses SET fetched_at = ? WHERE key = ?", (time.time(), key))
+            self.connection.commit()
+
+    # Function to delete responses older than max_age seconds
+    def prune(self, max_age):
+        with self.lock:
+            self.connection.execute("DELETE FROM responses WHERE fetched_at < ?", (time.time() - max_age,))
+            self.connection.commit()
+
+    # Function to close the database connection
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,51 @@
+# Single place for the VRML API location, timeouts and retry policy used by both clients
+BASE_URL = "https://api.vrmasterleague.com"
+DEFAULT_TIMEOUT = 10  # Seconds before a request is abandoned
+DEFAULT_RETRIES = 2  # Extra attempts after the first one for transient failures
+RETRY_BACKOFF = 0.5  # Seconds, doubled after every failed attempt (with jitter)
+RETRY_BACKOFF_MAX = 30  # Upper bound for a single wait, including the server's Retry-After
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RATE_LIMIT_PER_SECOND = 5  # Sustained requests per second shared by every caller in the process
+RATE_LIMIT_BURST = 10
+BREAKER_FAILURE_THRESHOLD = 5  # Consecutive server failures before requests fail fast
+BREAKER_RESET_TIMEOUT = 30  # Seconds before a single probe request is let through again
+FAN_OUT_WORKERS = 4  # Threads used by VRMLClient.fan_out for independent lookups
+DETAIL_WORKERS = 10  # teams/{id} requests in flight at once when a whole division is fetched
+
+# Every endpoint function returns (endpoint name used for metrics, path, query parameters).
+# Game names are lower-cased here (the API routes them case-insensitively) so "EchoArena" and "echoarena" share
+# cache entries, IDs are kept verbatim because they are case-sensitive
+
+# GET /{game}/Teams/Search - Fetch a team BY NAME
+def team_search(game, team_name, region=None, season=None):
+    return "team_search", f"{game.lower()}/Teams/Search", {"name": team_name, "region": region, "season": season}
+
+# GET /teams/{id} - Fetch detailed data for a team
+def team_details(team_id):
+    return "team_details", f"teams/{team_id}", {}
+
+# GET /Players/Search - Fetch a player BY NAME across the whole of VRML
+def player_search(player_name):
+    return "player_search", "Players/Search", {"name": player_name}
+
+# GET /Players/{id} - Fetch player data by playerID (not userID)
+def player_details(player_id):
+    return "player_details", f"Players/{player_id}", {}
+
+# GET /{game}/Matches - Fetch the match lists for a game
+def matches(game, region=None, filters=None, posMin=1):
+    return "matches", f"{game.lower()}/Matches", {"region": region, "filters": filters, "posMin": posMin}
+
+# GET /Teams/{id1}/{id2} - Fetch the statistics between two teams
+def team_statistics(team_id1, team_id2):
+    return "team_statistics", f"Teams/{team_id1}/{team_id2}", {}
+
+# Function to drop unset query parameters (aiohttp refuses None values)
+def clean_params(params):
+    return {key: value for key, value in (params or {}).items() if value is not None}
+
+# Function to find a case-insensitive exact name match in a search response
+def find_exact_match(results, name):
+    if not results:
+        return None
+    return next((result for result in results if result.get("name", "").lower() == name.lower()), None)
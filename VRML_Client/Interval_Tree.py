@@ -0,0 +1,192 @@
+# Function to merge (start, end) intervals into a sorted list of non-overlapping ones (touching ones are joined)
+def merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+# Function to intersect two sorted lists of non-overlapping intervals in one sweep
+def intersect_intervals(first, second):
+    intersection = []
+    i = j = 0
+    while i < len(first) and j < len(second):
+        start = max(first[i][0], second[j][0])
+        end = min(first[i][1], second[j][1])
+        if start < end:
+            intersection.append((start, end))
+        # Move on from whichever interval finishes first
+        if first[i][1] < second[j][1]:
+            i += 1
+        else:
+            j += 1
+    return intersection
+
+class IntervalNode:
+    __slots__ = ("start", "end", "values", "max_end", "height", "left", "right")
+
+    def __init__(self, start, end, value):
+        self.start = start
+        self.end = end
+        self.values = [value]  # Everything stored under the same [start, end)
+        self.max_end = end  # Largest end in this subtree, lets queries skip whole subtrees
+        self.height = 1
+        self.left = None
+        self.right = None
+
+# Self-balancing (AVL) tree of half-open [start, end) intervals ordered by (start, end), each node knows the largest end
+# below it, so finding the intervals that overlap a window is O(log n + matches)
+class IntervalTree:
+    def __init__(self, intervals=None):
+        self.root = None
+        self.size = 0
+        self.removed = False  # Set by delete when it found the interval
+        for start, end, value in intervals or []:
+            self.add(start, end, value)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        yield from self.walk(self.root)
+
+    # Function to yield (start, end, value) in order
+    def walk(self, node):
+        while node is not None:
+            yield from self.walk(node.left)
+            for value in node.values:
+                yield node.start, node.end, value
+            node = node.right
+
+    @staticmethod
+    def height(node):
+        return node.height if node is not None else 0
+
+    # Function to recompute a node's height and max_end from its children
+    def update(self, node):
+        node.height = 1 + max(self.height(node.left), self.height(node.right))
+        node.max_end = node.end
+        if node.left is not None and node.left.max_end > node.max_end:
+            node.max_end = node.left.max_end
+        if node.right is not None and node.right.max_end > node.max_end:
+            node.max_end = node.right.max_end
+
+    def rotate_left(self, node):
+        child = node.right
+        node.right = child.left
+        child.left = node
+        self.update(node)
+        self.update(child)
+        return child
+
+    def rotate_right(self, node):
+        child = node.left
+        node.left = child.right
+        child.right = node
+        self.update(node)
+        self.update(child)
+        return child
+
+    # Function to restore the AVL balance of a node after an insert or delete below it
+    def balance(self, node):
+        self.update(node)
+        difference = self.height(node.left) - self.height(node.right)
+        if difference > 1:
+            if self.height(node.left.left) < self.height(node.left.right):
+                node.left = self.rotate_left(node.left)
+            return self.rotate_right(node)
+        if difference < -1:
+            if self.height(node.right.right) < self.height(node.right.left):
+                node.right = self.rotate_right(node.right)
+            return self.rotate_left(node)
+        return node
+
+    # Function to add an interval with a value attached (e.g. a team ID or a match ID)
+    def add(self, start, end, value=None):
+        if end <= start:
+            return
+        self.root = self.insert(self.root, start, end, value)
+        self.size += 1
+
+    def insert(self, node, start, end, value):
+        if node is None:
+            return IntervalNode(start, end, value)
+        key = (start, end)
+        if key == (node.start, node.end):
+            node.values.append(value)
+            return node
+        if key < (node.start, node.end):
+            node.left = self.insert(node.left, start, end, value)
+        else:
+            node.right = self.insert(node.right, start, end, value)
+        return self.balance(node)
+
+    # Function to remove one interval/value pair, returns False if it wasn't in the tree
+    def remove(self, start, end, value=None):
+        self.removed = False
+        self.root = self.delete(self.root, (start, end), value)
+        if self.removed:
+            self.size -= 1
+        return self.removed
+
+    def delete(self, node, key, value):
+        if node is None:
+            return None
+        if key < (node.start, node.end):
+            node.left = self.delete(node.left, key, value)
+        elif key > (node.start, node.end):
+            node.right = self.delete(node.right, key, value)
+        else:
+            if value not in node.values:
+                return node
+            node.values.remove(value)
+            self.removed = True
+            if node.values:
+                return node
+            if node.left is None:
+                return node.right
+            if node.right is None:
+                return node.left
+            # Replace the node with the smallest interval of its right subtree
+            successor = node.right
+            while successor.left is not None:
+                successor = successor.left
+            node.start, node.end, node.values = successor.start, successor.end, successor.values
+            node.right = self.detach_smallest(node.right)
+        return self.balance(node)
+
+    def detach_smallest(self, node):
+        if node.left is None:
+            return node.right
+        node.left = self.detach_smallest(node.left)
+        return self.balance(node)
+
+    # Function to yield (start, end, value) for every interval overlapping [start, end)
+    def overlapping(self, start, end):
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            # Nothing in this subtree ends after the window starts
+            if node is None or node.max_end <= start:
+                continue
+            stack.append(node.left)
+            # Intervals right of here start at or after this one, so they can only overlap if this one starts in time
+            if node.start < end:
+                if node.end > start:
+                    for value in node.values:
+                        yield node.start, node.end, value
+                stack.append(node.right)
+
+    # Function to tell whether anything overlaps [start, end)
+    def overlaps(self, start, end):
+        return next(self.overlapping(start, end), None) is not None
+
+    # Function to list the values of intervals that contain the whole of [start, end)
+    def covering(self, start, end):
+        return [value for interval_start, interval_end, value in self.overlapping(start, end) if interval_start <= start and interval_end >= end]
+
+    # Function to return the merged intervals inside [start, end), clipped to it
+    def windows(self, start, end):
+        return merge_intervals((max(interval_start, start), min(interval_end, end)) for interval_start, interval_end, _ in self.overlapping(start, end))
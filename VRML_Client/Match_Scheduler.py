@@ -0,0 +1,118 @@
+from VRML_Client.Interval_Tree import IntervalTree, intersect_intervals
+
+MATCH_SECONDS = 60 * 60  # How long a slot is blocked for one match
+SLOT_STEP_SECONDS = 30 * 60  # Proposed start times are on the hour or half hour
+
+class MatchScheduler:
+    def __init__(self, duration=MATCH_SECONDS, step=SLOT_STEP_SECONDS):
+        self.duration = duration
+        self.step = step
+        self.team_bookings = {}  # team ID -> IntervalTree of slots the team already plays in
+        self.caster_bookings = {}  # caster ID -> IntervalTree of slots the caster already casts
+        self.slots = IntervalTree()  # Every booked slot, used to count overlapping matches
+        self.casters = IntervalTree()  # Every caster window, the value is the caster ID
+
+    # Function to block a slot for the teams of a match, e.g. one that's already scheduled
+    def book_match(self, match_id, team_ids, start, end):
+        for team_id in team_ids:
+            self.team_bookings.setdefault(team_id, IntervalTree()).add(start, end, match_id)
+        self.slots.add(start, end, match_id)
+
+    # Function to add a window in which a caster can cast
+    def add_caster_window(self, caster_id, start, end):
+        self.casters.add(start, end, caster_id)
+
+    # Function to list the start times at which a match of `duration` fits entirely inside one of the windows
+    def candidate_starts(self, windows):
+        starts = []
+        for start, end in windows:
+            # Round up to the next step so slots line up on the hour / half hour
+            slot = -(-start // self.step) * self.step
+            while slot + self.duration <= end:
+                starts.append(slot)
+                slot += self.step
+        return starts
+
+    # Function to tell whether a team is already playing during a slot
+    def team_busy(self, team_id, start, end):
+        bookings = self.team_bookings.get(team_id)
+        return bookings is not None and bookings.overlaps(start, end)
+
+    # Function to pick a caster for a slot: available for all of it, not already casting, least booked first
+    def free_caster(self, start, end):
+        free = [caster_id for caster_id in self.casters.covering(start, end)
+                if caster_id not in self.caster_bookings or not self.caster_bookings[caster_id].overlaps(start, end)]
+        if not free:
+            return None
+        return min(free, key=lambda caster_id: (len(self.caster_bookings.get(caster_id, ())), str(caster_id)))
+
+    # Function to pick the best slot for a match: fewest overlapping matches, then one a caster can take, then earliest
+    def best_slot(self, home_id, away_id, starts):
+        best = None
+        for start in starts:
+            end = start + self.duration
+            if self.team_busy(home_id, start, end) or self.team_busy(away_id, start, end):
+                continue
+            overlaps = sum(1 for _ in self.slots.overlapping(start, end))
+            caster_id = self.free_caster(start, end)
+            score = (overlaps, caster_id is None, start)
+            if best is None or score < best[0]:
+                best = (score, start, caster_id)
+                # Starts are in time order, nothing later can beat a slot with no overlaps and a caster
+                if score[:2] == (0, False):
+                    break
+        return best
+
+    # Function to propose conflict-free slots for unscheduled matches. `team_windows` maps team ID to that team's
+    # merged availability windows. Matches with the fewest possible slots are placed first (greedy, most constrained
+    # first). Returns (proposals, unplaced); a proposal is a dict with the match, start, end, caster_id and overlaps,
+    # unplaced is a list of (match, reason)
+    def solve(self, matches, team_windows):
+        options = []
+        unplaced = []
+        for match in matches:
+            if match.home is None or match.away is None:
+                unplaced.append((match, "teams not decided yet"))
+                continue
+            shared = intersect_intervals(team_windows.get(match.home.team_id, []), team_windows.get(match.away.team_id, []))
+            starts = self.candidate_starts(shared)
+            if not starts:
+                unplaced.append((match, "no shared availability"))
+                continue
+            options.append((len(starts), match.match_id, match, starts))
+        options.sort(key=lambda option: option[:2])
+
+        proposals = []
+        for _, _, match, starts in options:
+            best = self.best_slot(match.home.team_id, match.away.team_id, starts)
+            if best is None:
+                unplaced.append((match, "every shared slot is taken by another match"))
+                continue
+            (overlaps, _, _), start, caster_id = best
+            end = start + self.duration
+            self.book_match(match.match_id, match.team_ids, start, end)
+            if caster_id is not None:
+                self.caster_bookings.setdefault(caster_id, IntervalTree()).add(start, end, match.match_id)
+            proposals.append({"match": match, "start": start, "end": end, "caster_id": caster_id, "overlaps": overlaps})
+
+        proposals.sort(key=lambda proposal: proposal["start"])
+        return proposals, unplaced
+
+# Function to propose slots for a schedule's unscheduled matches using an AvailabilityStore, between two epochs.
+# Matches that are already scheduled block their teams' slots
+def propose_schedule(matches, availability, start, end, duration=MATCH_SECONDS, step=SLOT_STEP_SECONDS):
+    scheduler = MatchScheduler(duration, step)
+    unscheduled = []
+    team_ids = set()
+    for match in matches:
+        team_ids.update(match.team_ids)
+        if match.is_scheduled and match.scheduled_epoch is not None:
+            scheduler.book_match(match.match_id, match.team_ids, match.scheduled_epoch, match.scheduled_epoch + duration)
+        else:
+            unscheduled.append(match)
+
+    team_windows = {team_id: availability.team_windows(team_id, start, end) for team_id in team_ids}
+    for caster_id in list(availability.casters):
+        for window_start, window_end in availability.caster_windows(caster_id, start, end):
+            scheduler.add_caster_window(caster_id, window_start, window_end)
+    return scheduler.solve(unscheduled, team_windows)
@@ -0,0 +1,100 @@
+import bisect
+import threading
+
+# Upper bounds (seconds) of the latency histogram buckets, anything slower lands in the last (+Inf) bucket
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Fixed-bucket latency histogram: recording is one bisect and an increment, nothing grows with the number of requests
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    # Function to record one duration in seconds
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    # Function to list (upper bound, requests at or under it) the way Prometheus expects, the last bound is +Inf
+    def cumulative(self):
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    # Function to estimate a quantile (0.5, 0.95...) by interpolating inside the bucket it falls in, never past the
+    # slowest duration actually recorded
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                if index == len(self.buckets):
+                    return self.max
+                return min(self.max, lower + (self.buckets[index] - lower) * (rank - seen) / count)
+            seen += count
+        return self.buckets[-1]
+
+    # Function to copy the histogram so it can be read without holding the owner's lock
+    def copy(self):
+        histogram = LatencyHistogram(self.buckets)
+        histogram.counts = list(self.counts)
+        histogram.count = self.count
+        histogram.sum = self.sum
+        histogram.max = self.max
+        return histogram
+
+class ClientMetrics:
+    def __init__(self):
+        # The sync client can be shared between threads, so guard the counters
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.histograms = {}  # endpoint -> LatencyHistogram of whole requests (including retries)
+        self.in_flight = {}  # endpoint -> requests currently waiting on the network
+
+    # Function to count a request that went out to the network, paired with finish()
+    def begin(self, endpoint):
+        with self.lock:
+            self.in_flight[endpoint] = self.in_flight.get(endpoint, 0) + 1
+
+    def finish(self, endpoint):
+        with self.lock:
+            self.in_flight[endpoint] -= 1
+
+    # Function to record the outcome of one logical request (including its retries)
+    def record(self, endpoint, duration, ok, retries=0):
+        with self.lock:
+            stats = self.endpoints.setdefault(endpoint, {"requests": 0, "failures": 0, "retries": 0, "total_time": 0.0})
+            stats["requests"] += 1
+            stats["retries"] += retries
+            stats["total_time"] += duration
+            if not ok:
+                stats["failures"] += 1
+            histogram = self.histograms.get(endpoint)
+            if histogram is None:
+                histogram = self.histograms[endpoint] = LatencyHistogram()
+            histogram.observe(duration)
+
+    # Function to return a copy of the counters with the average latency per endpoint
+    def snapshot(self):
+        with self.lock:
+            snapshot = {}
+            for endpoint, stats in self.endpoints.items():
+                snapshot[endpoint] = dict(stats, average_time=stats["total_time"] / stats["requests"])
+            return snapshot
+
+    # Function to return a copy of every endpoint's histogram and in-flight count
+    def latency(self):
+        with self.lock:
+            return {endpoint: histogram.copy() for endpoint, histogram in self.histograms.items()}, dict(self.in_flight)
@@ -0,0 +1,269 @@
+import json
+import sys
+import weakref
+from datetime import datetime, timezone
+
+# Function to convert a VRML UTC date ("YYYY-MM-DD HH:MM") into an epoch, or None if it's missing/invalid
+def utc_epoch(text):
+    if not text:
+        return None
+    try:
+        return int(datetime.strptime(text, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc).timestamp())
+    except ValueError:
+        return None
+
+# Shown for a side of a match whose team isn't decided yet (e.g. a playoff slot)
+TBD_NAME = "TBD"
+
+# Function to intern short strings that repeat across thousands of records (divisions, regions, roles...)
+def intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+# Function to pack the fields we rarely read into compact JSON, they are only decoded when accessed
+def pack(data, used_fields):
+    extra = {key: value for key, value in data.items() if key not in used_fields}
+    return json.dumps(extra, separators=(",", ":"), sort_keys=True).encode("utf-8") if extra else None
+
+# Function to decode packed fields back into a dict
+def unpack(packed):
+    return json.loads(packed) if packed else {}
+
+class TeamRef:
+    __slots__ = ("team_id", "name", "division", "division_logo", "logo", "region_id", "region", "submitted_scores",
+                 "__weakref__")
+
+    FIELDS = ("teamID", "teamName", "divisionName", "divisionLogo", "teamLogo", "regionID", "regionName", "submittedScores")
+
+    def __init__(self, team_id, name, division, division_logo, logo, region_id, region, submitted_scores):
+        self.team_id = team_id
+        self.name = name
+        self.division = intern(division)
+        self.division_logo = intern(division_logo)
+        self.logo = logo
+        self.region_id = intern(region_id)
+        self.region = intern(region)
+        self.submitted_scores = submitted_scores
+
+    # Function to build a TeamRef from a match's homeTeam/awayTeam, identical refs are shared between matches
+    @classmethod
+    def from_json(cls, data):
+        if not data:
+            return None
+        values = tuple(data.get(field) for field in cls.FIELDS)
+        ref = _team_refs.get(values)
+        if ref is None:
+            ref = _team_refs[values] = cls(*values)
+        return ref
+
+    # Function to convert back into the API's dict shape
+    def to_json(self):
+        return dict(zip(self.FIELDS, (getattr(self, slot) for slot in self.__slots__[:len(self.FIELDS)])))
+
+# Refs disappear from the intern table once no match holds them, so replaced snapshots don't pin old teams
+_team_refs = weakref.WeakValueDictionary()
+
+class Match:
+    __slots__ = ("match_id", "week", "scheduled_utc", "scheduled_epoch", "is_scheduled", "is_challenge", "is_cup",
+                 "home", "away", "postpone_team_id", "caster_id", "packed")
+
+    USED_FIELDS = {"matchID", "week", "dateScheduledUTC", "isScheduled", "isChallenge", "isCup", "homeTeam", "awayTeam", "postponeTeamID"}
+
+    @classmethod
+    def from_json(cls, data):
+        match = cls.__new__(cls)
+        match.match_id = data["matchID"]
+        match.week = data.get("week")
+        match.scheduled_utc = data.get("dateScheduledUTC")
+        match.scheduled_epoch = utc_epoch(match.scheduled_utc)
+        match.is_scheduled = bool(data.get("isScheduled"))
+        match.is_challenge = bool(data.get("isChallenge"))
+        match.is_cup = bool(data.get("isCup"))
+        match.home = TeamRef.from_json(data.get("homeTeam"))
+        match.away = TeamRef.from_json(data.get("awayTeam"))
+        match.postpone_team_id = data.get("postponeTeamID")
+        match.caster_id = (data.get("castingInfo") or {}).get("casterID")
+        # Bet counts, casting info, VODs, highlights... stay packed until someone asks for them
+        match.packed = pack(data, cls.USED_FIELDS)
+        return match
+
+    # Decoded on every access, nothing rarely used is kept as live objects
+    @property
+    def extra(self):
+        return unpack(self.packed)
+
+    @property
+    def casting(self):
+        return self.extra.get("castingInfo") or {}
+
+    # Function to list the IDs of both teams
+    @property
+    def team_ids(self):
+        return [team.team_id for team in (self.home, self.away) if team is not None and team.team_id]
+
+    # Function to name both sides as "home vs away", undecided teams show as TBD
+    @property
+    def title(self):
+        return " vs ".join(team.name if team is not None else TBD_NAME for team in (self.home, self.away))
+
+    # Function to get the match's division from whichever team is decided, or None
+    @property
+    def division(self):
+        return next((team.division for team in (self.home, self.away) if team is not None and team.division), None)
+
+    # Function to convert back into the API's dict shape (used to persist the schedule)
+    def to_json(self):
+        data = self.extra
+        data.update({
+            "matchID": self.match_id,
+            "week": self.week,
+            "dateScheduledUTC": self.scheduled_utc,
+            "isScheduled": self.is_scheduled,
+            "isChallenge": self.is_challenge,
+            "isCup": self.is_cup,
+            "homeTeam": self.home.to_json() if self.home else None,
+            "awayTeam": self.away.to_json() if self.away else None,
+            "postponeTeamID": self.postpone_team_id,
+        })
+        return data
+
+    def __eq__(self, other):
+        if not isinstance(other, Match):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        home = self.home.name if self.home else None
+        away = self.away.name if self.away else None
+        return f"Match({self.match_id!r}, {home!r} vs {away!r}, {self.scheduled_utc!r})"
+
+class Player:
+    __slots__ = ("player_id", "name", "user_id", "logo", "country", "nationality", "discord_id", "discord_tag",
+                 "team_id", "team_name", "role", "is_owner", "is_starter", "packed")
+
+    TEAM_MEMBER_FIELDS = {"playerID", "playerName", "userID", "userLogo", "country", "nationality", "discordID", "discordTag",
+                          "teamID", "teamName", "role", "isTeamOwner", "isTeamStarter"}
+
+    # Function to build a Player from an entry of team.players in a teams/{id} response
+    @classmethod
+    def from_team_member(cls, data):
+        player = cls.__new__(cls)
+        player.player_id = data.get("playerID")
+        player.name = data.get("playerName")
+        player.user_id = data.get("userID")
+        player.logo = data.get("userLogo")
+        player.country = intern(data.get("country"))
+        player.nationality = intern(data.get("nationality"))
+        player.discord_id = data.get("discordID")
+        player.discord_tag = data.get("discordTag")
+        player.team_id = data.get("teamID")
+        player.team_name = data.get("teamName")
+        player.role = intern(data.get("role"))
+        player.is_owner = bool(data.get("isTeamOwner"))
+        player.is_starter = bool(data.get("isTeamStarter"))
+        player.packed = pack(data, cls.TEAM_MEMBER_FIELDS)
+        return player
+
+    # Function to build a Player from a Players/{id} response (user + thisGame)
+    @classmethod
+    def from_details(cls, data):
+        user = data.get("user") or {}
+        this_game = data.get("thisGame") or {}
+        bio = this_game.get("bioCurrent") or {}
+
+        player = cls.__new__(cls)
+        player.player_id = this_game.get("playerID")
+        player.name = this_game.get("playerName") or user.get("userName")
+        player.user_id = user.get("userID")
+        player.logo = user.get("userLogo")
+        player.country = intern(user.get("country"))
+        player.nationality = intern(user.get("nationality"))
+        player.discord_id = user.get("discordID")
+        player.discord_tag = user.get("discordTag")
+        player.team_id = bio.get("teamID")
+        player.team_name = bio.get("teamName")
+        player.role = intern(bio.get("role"))
+        player.is_owner = bool(bio.get("isTeamOwner"))
+        player.is_starter = bool(bio.get("isTeamStarter"))
+        # Past seasons, connoisseur history and the game block are only needed for detailed views
+        player.packed = pack(data, set())
+        return player
+
+    @property
+    def extra(self):
+        return unpack(self.packed)
+
+    def __repr__(self):
+        return f"Player({self.player_id!r}, {self.name!r})"
+
+class Team:
+    __slots__ = ("team_id", "name", "logo", "game", "division", "division_logo", "region_id", "region",
+                 "gp", "w", "l", "t", "pts", "plus_minus", "mmr", "rank", "rank_worldwide",
+                 "is_active", "is_recruiting", "players", "packed_team", "packed_season")
+
+    USED_TEAM_FIELDS = {"teamID", "teamName", "teamLogo", "gameName", "divisionName", "divisionLogo", "regionID", "regionName",
+                        "gp", "w", "l", "t", "pts", "plusMinus", "mmr", "rank", "rankWorldwide", "isActive", "isRecruiting", "players"}
+
+    # Function to build a Team from a teams/{id} response
+    @classmethod
+    def from_json(cls, data):
+        team_data = data.get("team") or {}
+
+        team = cls.__new__(cls)
+        team.team_id = team_data.get("teamID")
+        team.name = team_data.get("teamName")
+        team.logo = team_data.get("teamLogo")
+        team.game = intern(team_data.get("gameName"))
+        team.division = intern(team_data.get("divisionName"))
+        team.division_logo = intern(team_data.get("divisionLogo"))
+        team.region_id = intern(team_data.get("regionID"))
+        team.region = intern(team_data.get("regionName"))
+        team.gp = team_data.get("gp") or 0
+        team.w = team_data.get("w") or 0
+        team.l = team_data.get("l") or 0
+        team.t = team_data.get("t") or 0
+        team.pts = team_data.get("pts") or 0
+        team.plus_minus = team_data.get("plusMinus") or 0
+        # The API sends mmr as a string ("1340")
+        try:
+            team.mmr = int(team_data.get("mmr"))
+        except (TypeError, ValueError):
+            team.mmr = None
+        team.rank = team_data.get("rank")
+        team.rank_worldwide = team_data.get("rankWorldwide")
+        team.is_active = bool(team_data.get("isActive"))
+        team.is_recruiting = bool(team_data.get("isRecruiting"))
+        team.players = [Player.from_team_member(player) for player in team_data.get("players") or []]
+
+        # fanart, bio, upcomingMatches, seasonsPlayed... and the whole season block stay packed until accessed
+        team.packed_team = pack(team_data, cls.USED_TEAM_FIELDS)
+        team.packed_season = pack(data, {"team"})
+        return team
+
+    @property
+    def extra(self):
+        return unpack(self.packed_team)
+
+    @property
+    def upcoming_matches(self):
+        return [Match.from_json(match) for match in self.extra.get("upcomingMatches") or []]
+
+    @property
+    def season_matches(self):
+        return unpack(self.packed_season).get("seasonMatches") or []
+
+    @property
+    def season_players(self):
+        return unpack(self.packed_season).get("seasonPlayers") or []
+
+    @property
+    def season_stats_maps(self):
+        return unpack(self.packed_season).get("seasonStatsMaps") or []
+
+    @property
+    def ex_members(self):
+        return unpack(self.packed_season).get("exMembers") or []
+
+    def __repr__(self):
+        return f"Team({self.team_id!r}, {self.name!r}, {self.division!r})"
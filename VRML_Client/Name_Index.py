@@ -0,0 +1,193 @@
+import re
+import threading
+import unicodedata
+
+FUZZY_THRESHOLD = 0.3  # Minimum trigram similarity for a fuzzy match to count
+
+# Function to normalise a name for matching: Unicode compatibility form, case-folded, single spaces
+def normalize(name):
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", name or "").casefold()).strip()
+
+# Function to split a normalised name into padded trigrams ("ab" -> {"  a", " ab", "ab "})
+def trigrams(normalized):
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TrieNode:
+    __slots__ = ("children", "names")
+
+    def __init__(self):
+        self.children = {}
+        self.names = set()  # Normalised names ending at this node
+
+class NameIndex:
+    def __init__(self):
+        self.root = TrieNode()
+        self.entries = {}  # id -> {"id", "name", ...extra data such as the logo}
+        self.ids_by_name = {}  # normalised name -> set of ids
+        self.trigram_index = {}  # trigram -> set of normalised names
+        # Autocomplete runs on the event loop while the poller refreshes, keep writers and readers apart
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    # Function to list every entry, a copy taken under the lock so it can be iterated while names are being learned
+    def all_entries(self):
+        with self.lock:
+            return list(self.entries.values())
+
+    # Function to add (or refresh) a name for an id, extra data is returned with every match
+    def add(self, entity_id, name, **extra):
+        if not entity_id or not name:
+            return
+        normalized = normalize(name)
+        with self.lock:
+            previous = self.entries.get(entity_id)
+            if previous is not None and previous["name"] != name:
+                self.remove_name(entity_id, normalize(previous["name"]))
+            self.entries[entity_id] = dict(extra, id=entity_id, name=name)
+
+            if normalized not in self.ids_by_name:
+                node = self.root
+                for character in normalized:
+                    node = node.children.setdefault(character, TrieNode())
+                node.names.add(normalized)
+                for trigram in trigrams(normalized):
+                    self.trigram_index.setdefault(trigram, set()).add(normalized)
+            self.ids_by_name.setdefault(normalized, set()).add(entity_id)
+
+    # Function to detach an id from a name (when a team is renamed), dropping the name once nobody uses it
+    def remove_name(self, entity_id, normalized):
+        ids = self.ids_by_name.get(normalized)
+        if ids is None:
+            return
+        ids.discard(entity_id)
+        if ids:
+            return
+        del self.ids_by_name[normalized]
+        node = self.root
+        for character in normalized:
+            node = node.children.get(character)
+            if node is None:
+                return
+        node.names.discard(normalized)
+        for trigram in trigrams(normalized):
+            self.trigram_index.get(trigram, set()).discard(normalized)
+
+    # Function to return the entries for a list of normalised names
+    def entries_for(self, names, limit):
+        results = []
+        for normalized in names:
+            for entity_id in sorted(self.ids_by_name.get(normalized, ())):
+                results.append(self.entries[entity_id])
+                if len(results) >= limit:
+                    return results
+        return results
+
+    # Function to find entries whose name matches exactly (after normalisation)
+    def exact(self, name, limit=25):
+        with self.lock:
+            return self.entries_for([normalize(name)], limit)
+
+    # Function to find entries whose name starts with a prefix, shortest names first
+    def prefix(self, prefix, limit=25):
+        with self.lock:
+            node = self.root
+            for character in normalize(prefix):
+                node = node.children.get(character)
+                if node is None:
+                    return []
+            # Breadth-first, so shorter (closer) names come out before longer ones
+            names = []
+            level = [node]
+            while level and len(names) < limit:
+                next_level = []
+                for current in level:
+                    names.extend(sorted(current.names))
+                    next_level.extend(current.children[character] for character in sorted(current.children))
+                level = next_level
+            return self.entries_for(names, limit)
+
+    # Function to find entries with a similar name, ranked by trigram (Jaccard) similarity
+    def fuzzy(self, name, limit=25, threshold=FUZZY_THRESHOLD):
+        query = trigrams(normalize(name))
+        with self.lock:
+            shared = {}
+            for trigram in query:
+                for candidate in self.trigram_index.get(trigram, ()):
+                    shared[candidate] = shared.get(candidate, 0) + 1
+            scored = []
+            for candidate, count in shared.items():
+                score = count / (len(query) + len(trigrams(candidate)) - count)
+                if score >= threshold:
+                    scored.append((-score, candidate))
+            scored.sort()
+            return self.entries_for([candidate for _, candidate in scored], limit)
+
+    # Function to search for autocomplete: exact matches, then prefix matches, then fuzzy ones
+    def search(self, query, limit=25):
+        if not normalize(query):
+            with self.lock:
+                return sorted(self.entries.values(), key=lambda entry: normalize(entry["name"]))[:limit]
+        results = {}
+        for finder in (self.exact, self.prefix, self.fuzzy):
+            for entry in finder(query, limit):
+                results.setdefault(entry["id"], entry)
+            if len(results) >= limit:
+                break
+        return list(results.values())[:limit]
+
+    # Function to resolve a name to a single entry: an exact match, otherwise the best fuzzy match (or None)
+    def resolve(self, name):
+        matches = self.exact(name, 1) or self.fuzzy(name, 1)
+        return matches[0] if matches else None
+
+class NameDirectory:
+    def __init__(self):
+        # (kind, game) -> NameIndex, kind is "teams" or "players"
+        self.indexes = {}
+
+    # Function to get (or create) the index for a kind of name in a game
+    def index(self, kind, game):
+        return self.indexes.setdefault((kind, normalize(game)), NameIndex())
+
+    # Function to list the games that have any names indexed
+    def games(self):
+        return sorted({game for (_, game), index in self.indexes.items() if len(index)})
+
+    # Function to learn team names from a {game}/Teams/Search response
+    def learn_team_search(self, game, results):
+        index = self.index("teams", game)
+        for team in results or []:
+            index.add(team.get("id"), team.get("name"), logo=team.get("image"))
+
+    # Function to learn every team (and its logo/division) that appears in a game's schedule
+    def learn_schedule(self, game, schedule):
+        index = self.index("teams", game)
+        for match in schedule.matches(game):
+            for team in (match.home, match.away):
+                if team is not None:
+                    index.add(team.team_id, team.name, logo=team.logo, division=team.division, division_logo=team.division_logo)
+
+    # Function to learn every team of a saved league snapshot (see Snapshot.py)
+    def learn_snapshot(self, game, snapshot):
+        index = self.index("teams", game)
+        for team in snapshot.team_entries():
+            index.add(team["id"], team["name"], logo=team["logo"], division=team["division"])
+
+    # Function to learn player names from a Team model's roster
+    def learn_team(self, game, team):
+        index = self.index("players", game)
+        for player in team.players:
+            index.add(player.player_id, player.name, team_id=team.team_id, team_name=team.name)
+
+# Function to pick the best result of a search response for a name: exact match first, then the closest name
+def best_match(results, name):
+    index = NameIndex()
+    for result in results or []:
+        index.add(result.get("id"), result.get("name"))
+    match = index.resolve(name)
+    if match is None:
+        return None
+    return next(result for result in results if result.get("id") == match["id"])
@@ -0,0 +1,121 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from VRML_Client import Endpoints
+
+class TokenBucket:
+    def __init__(self, rate=Endpoints.RATE_LIMIT_PER_SECOND, capacity=Endpoints.RATE_LIMIT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    # Function to take one token, returns how long the caller must wait before sending its request
+    # Tokens may go negative, which queues later callers behind the ones already waiting
+    def reserve(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.paused_until - now)
+
+    # Function to hold back every caller for a while (used when the API answers 429 Too Many Requests)
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=Endpoints.BREAKER_FAILURE_THRESHOLD, reset_timeout=Endpoints.BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_started_at = None
+        self.lock = threading.Lock()
+
+    # Function to check whether a request may be sent (closed, or half-open and nobody else is probing)
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            # Half-open: let exactly one request through to probe the API (another one if the probe never reported back)
+            if self.trial_started_at is not None and now - self.trial_started_at < self.reset_timeout:
+                return False
+            self.trial_started_at = now
+            return True
+
+    # Function to close the breaker after a healthy response
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_started_at = None
+
+    # Function to count a server-side failure, opening the breaker once the threshold is reached
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_started_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_started_at = None
+
+    # Function to describe the breaker state for metrics and debugging
+    def state(self):
+        with self.lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return "open"
+            return "half-open"
+
+# Function to turn a Retry-After header (seconds or an HTTP date) into seconds, or None if missing/invalid
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+# Function to pick the delay before retry number `attempt` (0-based)
+# The server's Retry-After wins; otherwise exponential backoff with full jitter so callers don't retry in lockstep
+def backoff_delay(attempt, retry_after=None):
+    if retry_after is not None:
+        return min(retry_after, Endpoints.RETRY_BACKOFF_MAX)
+    return random.uniform(0, min(Endpoints.RETRY_BACKOFF_MAX, Endpoints.RETRY_BACKOFF * 2 ** attempt))
+
+_default_rate_limiter = None
+_default_breaker = None
+_defaults_lock = threading.Lock()
+
+# Function to get the process-wide token bucket, shared by every client so they stay under VRML's limits together
+def get_rate_limiter():
+    global _default_rate_limiter
+    with _defaults_lock:
+        if _default_rate_limiter is None:
+            _default_rate_limiter = TokenBucket()
+        return _default_rate_limiter
+
+# Function to get the process-wide circuit breaker for api.vrmasterleague.com
+def get_circuit_breaker():
+    global _default_breaker
+    with _defaults_lock:
+        if _default_breaker is None:
+            _default_breaker = CircuitBreaker()
+        return _default_breaker
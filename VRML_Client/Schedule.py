@@ -0,0 +1,185 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from VRML_Client.Disk_Cache import DEFAULT_PATH as CACHE_PATH
+from VRML_Client.Models import Match
+from VRML_Client.Schedule_Index import ScheduleIndex
+
+DEFAULT_PATH = os.path.join(os.path.dirname(CACHE_PATH), "schedule.sqlite3")
+
+# Function to list the events between two versions of the same match (previous is None for a new match)
+def match_events(previous, current):
+    if previous is None:
+        return ["new"]
+
+    events = []
+    if previous.scheduled_utc != current.scheduled_utc:
+        # A match getting its first time is scheduled, only a change of an existing time is a reschedule
+        events.append("scheduled" if previous.scheduled_epoch is None or not previous.is_scheduled else "rescheduled")
+    if current.caster_id and current.caster_id != previous.caster_id:
+        events.append("cast_assigned")
+    if current.postpone_team_id and current.postpone_team_id != previous.postpone_team_id:
+        events.append("postponed")
+    return events
+
+class MatchSchedule:
+    def __init__(self):
+        # (game, region) -> {matchID: Match}, replaced wholesale on every successful poll
+        self.snapshots = {}
+        self.updated_at = {}
+        # game -> ScheduleIndex over every region snapshot of that game
+        self.indexes = {}
+
+    # Function to build the snapshot key for a game and (optional) region
+    @staticmethod
+    def make_key(game, region=None):
+        return game.lower(), (region or "").upper()
+
+    # Function to get (or create) the index for a game
+    def index(self, game):
+        return self.indexes.setdefault(game.lower(), ScheduleIndex())
+
+    # Function to put a match into its game's index, only scheduled matches get a place in the time index
+    def index_match(self, game, match):
+        epoch = match.scheduled_epoch if match.is_scheduled else None
+        self.index(game).add(match, epoch)
+
+    # Function to drop a match from its game's index unless another region snapshot still lists it
+    def unindex_match(self, game, match_id):
+        for (snapshot_game, _), snapshot in self.snapshots.items():
+            if snapshot_game == game.lower() and match_id in snapshot:
+                self.index_match(game, snapshot[match_id])
+                return
+        self.index(game).remove(match_id)
+
+    # Function to seed a snapshot (e.g. from the schedule store after a restart) without emitting events
+    def load(self, game, region, matches):
+        key = self.make_key(game, region)
+        previous = self.snapshots.get(key, {})
+        self.snapshots[key] = dict(matches)
+        for match in matches.values():
+            self.index_match(game, match)
+        # Matches of a replaced snapshot that the new one doesn't list must not stay in the index
+        for match_id in previous:
+            if match_id not in matches:
+                self.unindex_match(game, match_id)
+
+    # Function to parse a {game}/Matches response into {matchID: Match}. Touches no state, so it can run in a worker
+    # thread (asyncio.to_thread) while apply() stays on the event loop with the indexes
+    @staticmethod
+    def parse(match_data):
+        current = {}
+        for match in match_data.get("matchesScheduledUpcoming", []) + match_data.get("matchesUnscheduled", []):
+            current[match["matchID"]] = Match.from_json(match)
+        return current
+
+    # Function to apply a fresh {game}/Matches response, returns (events, changed matches, removed match IDs)
+    def update(self, game, region, match_data):
+        return self.apply(game, region, self.parse(match_data))
+
+    # Function to replace a snapshot with {matchID: Match} (a parsed response, or the schedule store when another
+    # process does the polling), returns (events, changed matches, removed match IDs)
+    def apply(self, game, region, current):
+        key = self.make_key(game, region)
+        previous = self.snapshots.get(key)
+        self.snapshots[key] = current
+        self.updated_at[key] = time.time()
+
+        # The very first snapshot is a baseline, announcing every match in the league as "new" would be noise
+        if previous is None:
+            for match in current.values():
+                self.index_match(game, match)
+            return [], list(current.values()), []
+
+        events = []
+        changed = []
+        for match_id, match in current.items():
+            old_match = previous.get(match_id)
+            if old_match == match:
+                continue
+            changed.append(match)
+            self.index_match(game, match)
+            for event_type in match_events(old_match, match):
+                events.append({"type": event_type, "game": game, "region": region, "match": match, "previous": old_match})
+
+        removed = [match_id for match_id in previous if match_id not in current]
+        for match_id in removed:
+            self.unindex_match(game, match_id)
+        return events, changed, removed
+
+    # Function to iterate over every known match, optionally limited to one game
+    def matches(self, game=None):
+        for (snapshot_game, _), snapshot in self.snapshots.items():
+            if game is None or snapshot_game == game.lower():
+                yield from snapshot.values()
+
+    # Function to list the next scheduled matches for a game, optionally narrowed by team name, division and hours ahead
+    def upcoming(self, game, team_name=None, division=None, hours=None, limit=10, now=None):
+        now = int(now if now is not None else time.time())
+        end = now + hours * 60 * 60 if hours is not None else None
+        index = self.index(game)
+
+        if team_name is None:
+            return index.query(division=division, start=now, end=end, limit=limit)
+
+        # A name can map to several team IDs (e.g. a renamed or re-created team), merge their next matches
+        matches = {}
+        for team_id in index.team_ids(team_name):
+            for match in index.query(team_id=team_id, division=division, start=now, end=end, limit=limit):
+                matches[match.match_id] = match
+        return sorted(matches.values(), key=lambda match: index.epochs[match.match_id])[:limit]
+
+class ScheduleStore:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS matches ("
+            "game TEXT NOT NULL, region TEXT NOT NULL, match_id TEXT NOT NULL, body TEXT NOT NULL, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (game, region, match_id))"
+        )
+        self.connection.commit()
+
+    # Function to load the last persisted snapshot for a game and region as {matchID: match}
+    def load(self, game, region=None):
+        game, region = MatchSchedule.make_key(game, region)
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT match_id, body FROM matches WHERE game = ? AND region = ?", (game, region)
+            ).fetchall()
+        return {match_id: Match.from_json(json.loads(body)) for match_id, body in rows}
+
+    # Function to tell whether a snapshot changed since it was last read: (row count, last write time)
+    def version(self, game, region=None):
+        game, region = MatchSchedule.make_key(game, region)
+        with self.lock:
+            return self.connection.execute(
+                "SELECT COUNT(*), MAX(updated_at) FROM matches WHERE game = ? AND region = ?", (game, region)
+            ).fetchone()
+
+    # Function to persist only the matches that changed since the last poll
+    def save(self, game, region, matches):
+        game, region = MatchSchedule.make_key(game, region)
+        now = time.time()
+        rows = [(game, region, match.match_id, json.dumps(match.to_json(), separators=(",", ":")), now) for match in matches]
+        with self.lock:
+            self.connection.executemany("INSERT OR REPLACE INTO matches VALUES (?, ?, ?, ?, ?)", rows)
+            self.connection.commit()
+
+    # Function to drop matches that are no longer listed (played or cancelled)
+    def delete(self, game, region, match_ids):
+        game, region = MatchSchedule.make_key(game, region)
+        with self.lock:
+            self.connection.executemany(
+                "DELETE FROM matches WHERE game = ? AND region = ? AND match_id = ?",
+                [(game, region, match_id) for match_id in match_ids],
+            )
+            self.connection.commit()
@@ -0,0 +1,144 @@
+from bisect import bisect_left, insort
+
+class ScheduleIndex:
+    def __init__(self):
+        self.matches = {}  # matchID -> Match
+        self.epochs = {}  # matchID -> scheduled UTC epoch (None while unscheduled)
+
+        # Hash indexes: key -> set of matchIDs (scheduled or not)
+        self.by_team = {}
+        self.by_division = {}
+        self.by_week = {}
+        self.team_ids_by_name = {}  # lower-case team name -> set of teamIDs
+
+        # Sorted indexes of (epoch, matchID) for scheduled matches, globally and per team/division
+        self.times = []
+        self.team_times = {}
+        self.division_times = {}
+
+    # Function to pull the index keys out of a match
+    @staticmethod
+    def match_keys(match):
+        teams = [team for team in (match.home, match.away) if team is not None]
+        team_ids = {team.team_id for team in teams if team.team_id}
+        divisions = {team.division.lower() for team in teams if team.division}
+        return teams, team_ids, divisions
+
+    # Function to add a match, or replace it if it's already indexed
+    def add(self, match, epoch):
+        match_id = match.match_id
+        if match_id in self.matches:
+            self.remove(match_id)
+
+        self.matches[match_id] = match
+        self.epochs[match_id] = epoch
+        teams, team_ids, divisions = self.match_keys(match)
+
+        for team in teams:
+            if team.team_id and team.name:
+                self.team_ids_by_name.setdefault(team.name.lower(), set()).add(team.team_id)
+        for team_id in team_ids:
+            self.by_team.setdefault(team_id, set()).add(match_id)
+        for division in divisions:
+            self.by_division.setdefault(division, set()).add(match_id)
+        self.by_week.setdefault(match.week, set()).add(match_id)
+
+        if epoch is not None:
+            entry = (epoch, match_id)
+            insort(self.times, entry)
+            for team_id in team_ids:
+                insort(self.team_times.setdefault(team_id, []), entry)
+            for division in divisions:
+                insort(self.division_times.setdefault(division, []), entry)
+
+    # Function to remove a match from every index
+    def remove(self, match_id):
+        match = self.matches.pop(match_id, None)
+        if match is None:
+            return
+        epoch = self.epochs.pop(match_id)
+        teams, team_ids, divisions = self.match_keys(match)
+
+        for team_id in team_ids:
+            self.by_team.get(team_id, set()).discard(match_id)
+        for team in teams:
+            if team.team_id and team.name:
+                self.forget_name(team.team_id, team.name)
+        for division in divisions:
+            self.by_division.get(division, set()).discard(match_id)
+        self.by_week.get(match.week, set()).discard(match_id)
+
+        if epoch is not None:
+            entry = (epoch, match_id)
+            self.remove_sorted(self.times, entry)
+            for team_id in team_ids:
+                self.remove_sorted(self.team_times.get(team_id, []), entry)
+            for division in divisions:
+                self.remove_sorted(self.division_times.get(division, []), entry)
+
+    # Function to drop a name -> teamID mapping once no indexed match still lists the team under that name
+    def forget_name(self, team_id, name):
+        for match_id in self.by_team.get(team_id, ()):
+            match = self.matches[match_id]
+            for team in (match.home, match.away):
+                if team is not None and team.team_id == team_id and (team.name or "").lower() == name.lower():
+                    return
+        team_ids = self.team_ids_by_name.get(name.lower())
+        if team_ids is not None:
+            team_ids.discard(team_id)
+            if not team_ids:
+                del self.team_ids_by_name[name.lower()]
+
+    # Function to delete an entry from a sorted list using binary search
+    @staticmethod
+    def remove_sorted(entries, entry):
+        position = bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+
+    # Function to return the matches of a sorted index whose time falls in [start, end)
+    def window(self, entries, start=None, end=None, limit=None):
+        low = 0 if start is None else bisect_left(entries, (start, ""))
+        high = len(entries) if end is None else bisect_left(entries, (end, ""))
+        if limit is not None:
+            high = min(high, low + limit)
+        return [self.matches[match_id] for _, match_id in entries[low:high]]
+
+    # Function to resolve a team name (case-insensitive) to the teamIDs seen in the schedule
+    def team_ids(self, team_name):
+        return self.team_ids_by_name.get(team_name.lower(), set())
+
+    # Function to return a team's next scheduled match at or after `now`, or None
+    def next_match(self, team_id, now):
+        matches = self.window(self.team_times.get(team_id, []), start=now, limit=1)
+        return matches[0] if matches else None
+
+    # Function to query scheduled matches by team, division, week and time window using the most selective index
+    def query(self, team_id=None, division=None, week=None, start=None, end=None, limit=None):
+        if team_id is not None:
+            entries = self.team_times.get(team_id, [])
+        elif division is not None:
+            entries = self.division_times.get(division.lower(), [])
+        else:
+            entries = self.times
+
+        # Without a week filter the sorted slice is already the answer
+        if week is None and (team_id is None or division is None):
+            return self.window(entries, start, end, limit)
+
+        matches = []
+        week_ids = self.by_week.get(week, set()) if week is not None else None
+        division_ids = self.by_division.get(division.lower(), set()) if division is not None else None
+        for match in self.window(entries, start, end):
+            if week_ids is not None and match.match_id not in week_ids:
+                continue
+            if division_ids is not None and match.match_id not in division_ids:
+                continue
+            matches.append(match)
+            if limit is not None and len(matches) >= limit:
+                break
+        return matches
+
+    # Function to list the unscheduled matches of a team
+    def unscheduled(self, team_id):
+        return [self.matches[match_id] for match_id in self.by_team.get(team_id, set()) if self.epochs[match_id] is None]
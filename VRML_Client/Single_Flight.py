@@ -0,0 +1,32 @@
+import asyncio
+
+class SingleFlight:
+    def __init__(self):
+        # key -> task of the request currently on the wire
+        self.in_flight = {}
+        self.leaders = {}
+        self.collapsed = {}
+
+    # Function to run coroutine_factory() once per key, concurrent callers with the same key share its result
+    async def run(self, endpoint, key, coroutine_factory):
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.collapsed[endpoint] = self.collapsed.get(endpoint, 0) + 1
+        else:
+            self.leaders[endpoint] = self.leaders.get(endpoint, 0) + 1
+            task = asyncio.ensure_future(coroutine_factory())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+
+        # Shielded so one caller giving up (e.g. a timed out interaction) doesn't cancel the request for everyone else
+        return await asyncio.shield(task)
+
+    # Function to return how many requests were sent and how many callers were collapsed onto them
+    def stats(self):
+        stats = {"in_flight": len(self.in_flight), "endpoints": {}}
+        for endpoint in set(self.leaders) | set(self.collapsed):
+            stats["endpoints"][endpoint] = {
+                "requests": self.leaders.get(endpoint, 0),
+                "collapsed": self.collapsed.get(endpoint, 0),
+            }
+        return stats
@@ -0,0 +1,281 @@
+import json
+import logging
+import os
+import shutil
+import time
+from VRML_Client import Endpoints
+from VRML_Client.Disk_Cache import DEFAULT_PATH as CACHE_PATH
+from VRML_Client.Models import Match, Team
+
+# numpy is optional, it's only needed to write or read snapshots
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = os.path.join(os.path.dirname(CACHE_PATH), "Snapshots")
+FORMAT_VERSION = 1
+
+# Match status codes in the matches table
+UNSCHEDULED = 0
+SCHEDULED = 1
+PLAYED = 2
+
+# One fixed-width row per team, strings are UTF-8 bytes and divisions/regions are indexes into meta.json
+TEAM_FIELDS = [
+    ("team_id", "S24"),
+    ("name", "S64"),
+    ("logo", "S80"),
+    ("division", "i2"),
+    ("region", "i2"),
+    ("gp", "i2"),
+    ("w", "i2"),
+    ("l", "i2"),
+    ("t", "i2"),
+    ("pts", "i4"),
+    ("plus_minus", "i4"),
+    ("mmr", "i4"),  # -1 when VRML hasn't given the team one yet
+    ("rank", "i4"),
+    ("rank_worldwide", "i4"),
+    ("is_active", "?"),
+    ("is_recruiting", "?"),
+    ("has_details", "?"),  # False for opponents only seen in someone else's matches
+]
+
+# One row per match, teams are row numbers in the teams table (-1 when unknown)
+MATCH_FIELDS = [
+    ("match_id", "S24"),
+    ("week", "i2"),
+    ("scheduled_epoch", "i8"),  # -1 while unscheduled
+    ("status", "i1"),
+    ("home", "i4"),
+    ("away", "i4"),
+    ("winner", "i4"),  # -1 for ties and matches that haven't been played
+    ("home_score", "i2"),
+    ("away_score", "i2"),
+    ("is_tie", "?"),
+    ("is_forfeit", "?"),
+    ("is_challenge", "?"),
+    ("is_cup", "?"),
+]
+
+# Function to check numpy is installed before doing anything with snapshots
+def require_numpy():
+    if np is None:
+        raise RuntimeError("League snapshots need numpy, install it with 'pip install numpy'")
+
+# Function to encode a string into a fixed-width bytes column, cut on a character boundary if it's too long
+def encode(text, width):
+    encoded = (text or "").encode("utf-8")
+    if len(encoded) > width:
+        encoded = encoded[:width].decode("utf-8", "ignore").encode("utf-8")
+    return encoded
+
+# Function to decode a bytes column value back into a string
+def decode(value):
+    return bytes(value).decode("utf-8", "ignore")
+
+# Function to build the folder name of a game/region snapshot
+def snapshot_path(game, region=None, directory=DEFAULT_DIR):
+    name = game.lower() if not region else f"{game.lower()}_{region.upper()}"
+    return os.path.join(directory, name)
+
+class SnapshotBuilder:
+    def __init__(self, game, region=None):
+        self.game = game
+        self.region = region
+        self.teams = {}  # teamID -> row values (a dict) in insertion order
+        self.matches = {}  # matchID -> row values
+        self.divisions = []
+        self.regions = []
+
+    # Function to map a division/region name to its index in the lookup list
+    @staticmethod
+    def lookup(values, name):
+        if not name:
+            return -1
+        if name not in values:
+            values.append(name)
+        return values.index(name)
+
+    # Function to get a team's row, adding a placeholder from a match's homeTeam/awayTeam if it's new
+    def team_row(self, team_ref):
+        if team_ref is None or not team_ref.team_id:
+            return None
+        row = self.teams.get(team_ref.team_id)
+        if row is None:
+            row = self.teams[team_ref.team_id] = {
+                "team_id": team_ref.team_id, "name": team_ref.name, "logo": team_ref.logo,
+                "division": self.lookup(self.divisions, team_ref.division), "region": self.lookup(self.regions, team_ref.region),
+                "mmr": -1, "has_details": False,
+            }
+        return row
+
+    # Function to add a teams/{id} response, filling in the team's stats
+    def add_team(self, data):
+        team = Team.from_json(data)
+        if not team.team_id:
+            return
+        row = self.teams.setdefault(team.team_id, {"team_id": team.team_id})
+        row.update({
+            "name": team.name, "logo": team.logo,
+            "division": self.lookup(self.divisions, team.division), "region": self.lookup(self.regions, team.region),
+            "gp": team.gp, "w": team.w, "l": team.l, "t": team.t, "pts": team.pts, "plus_minus": team.plus_minus,
+            "mmr": team.mmr if team.mmr is not None else -1, "rank": team.rank or 0, "rank_worldwide": team.rank_worldwide or 0,
+            "is_active": team.is_active, "is_recruiting": team.is_recruiting, "has_details": True,
+        })
+        # Played matches carry the scores and the winner
+        for match_data in team.season_matches:
+            self.add_match(match_data, played=True)
+
+    # Function to add a match from the schedule or a team's season matches
+    def add_match(self, data, played=False):
+        match = Match.from_json(data)
+        for team_ref in (match.home, match.away):
+            self.team_row(team_ref)
+
+        existing = self.matches.get(match.match_id)
+        if existing is not None and existing["status"] == PLAYED:
+            return
+        status = PLAYED if played else SCHEDULED if match.is_scheduled and match.scheduled_epoch is not None else UNSCHEDULED
+        self.matches[match.match_id] = {
+            "match_id": match.match_id, "week": match.week or 0,
+            "scheduled_epoch": match.scheduled_epoch if match.scheduled_epoch is not None else -1, "status": status,
+            "home": match.home.team_id if match.home else None, "away": match.away.team_id if match.away else None,
+            "winner": data.get("winningTeamID") if played and not data.get("isTie") else None,
+            "home_score": data.get("homeScore") or 0, "away_score": data.get("awayScore") or 0,
+            "is_tie": bool(data.get("isTie")), "is_forfeit": bool(data.get("isForfeit")),
+            "is_challenge": match.is_challenge, "is_cup": match.is_cup,
+        }
+
+    # Function to add a {game}/Matches response
+    def add_schedule(self, match_data):
+        for match in match_data.get("matchesScheduledUpcoming", []) + match_data.get("matchesUnscheduled", []):
+            self.add_match(match)
+
+    # Function to turn a row dict into a record tuple, strings become fixed-width bytes and missing numbers 0
+    @staticmethod
+    def record(row, fields):
+        values = []
+        for field, kind in fields:
+            value = row.get(field)
+            if kind.startswith("S"):
+                value = encode(value, int(kind[1:]))
+            elif value is None:
+                value = 0
+            values.append(value)
+        return tuple(values)
+
+    # Function to turn the collected rows into the two record arrays
+    def to_arrays(self):
+        require_numpy()
+        teams = np.array([self.record(row, TEAM_FIELDS) for row in self.teams.values()], dtype=TEAM_FIELDS)
+
+        # Teams are referenced by row number, -1 for a team that isn't in the table (or no winner)
+        team_rows = {team_id: position for position, team_id in enumerate(self.teams)}
+        match_rows = []
+        for row in self.matches.values():
+            row = dict(row, home=team_rows.get(row["home"], -1), away=team_rows.get(row["away"], -1), winner=team_rows.get(row["winner"], -1))
+            match_rows.append(self.record(row, MATCH_FIELDS))
+        matches = np.array(match_rows, dtype=MATCH_FIELDS)
+        # Time order, so windows of the season are contiguous slices
+        matches = matches[np.argsort(matches["scheduled_epoch"], kind="stable")]
+        return teams, matches
+
+    # Function to write the snapshot folder (teams.npy, matches.npy, meta.json), replacing any previous one in one step
+    def save(self, directory=DEFAULT_DIR):
+        teams, matches = self.to_arrays()
+        path = snapshot_path(self.game, self.region, directory)
+        temporary_path = f"{path}.tmp"
+        if os.path.exists(temporary_path):
+            shutil.rmtree(temporary_path)
+        os.makedirs(temporary_path)
+
+        np.save(os.path.join(temporary_path, "teams.npy"), teams)
+        np.save(os.path.join(temporary_path, "matches.npy"), matches)
+        meta = {
+            "version": FORMAT_VERSION, "game": self.game, "region": self.region, "created_at": int(time.time()),
+            "divisions": self.divisions, "regions": self.regions, "teams": len(teams), "matches": len(matches),
+        }
+        with open(os.path.join(temporary_path, "meta.json"), "w") as metaFile:
+            json.dump(meta, metaFile)
+
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.rename(temporary_path, path)
+        return path
+
+class LeagueSnapshot:
+    def __init__(self, path, teams, matches, meta):
+        self.path = path
+        self.teams = teams
+        self.matches = matches
+        self.meta = meta
+        self.divisions = meta["divisions"]
+        self.regions = meta["regions"]
+        self._team_rows = None
+
+    # Function to map teamIDs to their row number, built on first use
+    @property
+    def team_rows(self):
+        if self._team_rows is None:
+            self._team_rows = {decode(team_id): position for position, team_id in enumerate(self.teams["team_id"])}
+        return self._team_rows
+
+    # Function to get the rows of a division's teams (case-insensitive)
+    def division_rows(self, division):
+        names = [name.lower() for name in self.divisions]
+        if division.lower() not in names:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(self.teams["division"] == names.index(division.lower()))
+
+    # Function to list the teams as plain dicts (teamID, name, logo, division), e.g. to fill a name index
+    def team_entries(self):
+        for team in self.teams:
+            yield {
+                "id": decode(team["team_id"]), "name": decode(team["name"]), "logo": decode(team["logo"]),
+                "division": self.divisions[team["division"]] if team["division"] >= 0 else None,
+            }
+
+    def __len__(self):
+        return len(self.teams)
+
+# Function to open a snapshot, the arrays are memory-mapped so only the pages that are read get loaded
+def load_snapshot(game, region=None, directory=DEFAULT_DIR, mmap=True):
+    require_numpy()
+    path = snapshot_path(game, region, directory)
+    try:
+        with open(os.path.join(path, "meta.json")) as metaFile:
+            meta = json.load(metaFile)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != FORMAT_VERSION:
+        logger.warning("Snapshot at '%s' has format version %s, expected %s", path, meta.get("version"), FORMAT_VERSION)
+        return None
+
+    mmap_mode = "r" if mmap else None
+    teams = np.load(os.path.join(path, "teams.npy"), mmap_mode=mmap_mode)
+    matches = np.load(os.path.join(path, "matches.npy"), mmap_mode=mmap_mode)
+    return LeagueSnapshot(path, teams, matches, meta)
+
+# Function to crawl a game's schedule and the details of every team in it with the sync client, `workers` team
+# requests at a time, returns the SnapshotBuilder (or None if the schedule couldn't be fetched)
+def crawl(client, game, region=None, workers=Endpoints.FAN_OUT_WORKERS):
+    match_data = client.fetch_matches(game, region)
+    if match_data is None:
+        return None
+
+    builder = SnapshotBuilder(game, region)
+    builder.add_schedule(match_data)
+    team_ids = list(builder.teams)
+    logger.info("Crawling %d teams from %d matches for %s", len(team_ids), len(builder.matches), game)
+
+    details = client.fan_out([lambda team_id=team_id: client.fetch_team_details(team_id) for team_id in team_ids], max_workers=workers)
+    for team_id, data in zip(team_ids, details):
+        if data is None:
+            logger.warning("No details for team '%s', keeping what the schedule had", team_id)
+            continue
+        builder.add_team(data)
+    return builder
@@ -0,0 +1,48 @@
+from VRML_Client.Models import Match, Team
+
+# Columns of the table: (header, row key, width)
+COLUMNS = (("GP", "gp", 3), ("W", "w", 3), ("L", "l", 3), ("T", "t", 3), ("Pts", "pts", 4), ("+/-", "plus_minus", 5), ("MMR", "mmr", 5))
+NAME_WIDTH = 18
+
+# Function to find every team playing in a division, as {teamID: name}, from schedule matches (Match objects)
+def division_teams(matches, division):
+    teams = {}
+    for match in matches:
+        for team in (match.home, match.away):
+            if team is not None and team.team_id and (team.division or "").lower() == division.lower():
+                teams[team.team_id] = team.name
+    return teams
+
+# Function to find every team of a division in a {game}/Matches response
+def division_teams_from_schedule(match_data, division):
+    matches = (match_data or {}).get("matchesScheduledUpcoming", []) + (match_data or {}).get("matchesUnscheduled", [])
+    return division_teams([Match.from_json(match) for match in matches], division)
+
+# Function to build a table row from a teams/{id} response, or a row without stats when the details didn't come back
+def team_row(team_id, name, data):
+    if data is None:
+        return {"team_id": team_id, "name": name, "has_details": False}
+    team = Team.from_json(data)
+    return {"team_id": team_id, "name": team.name or name, "gp": team.gp, "w": team.w, "l": team.l, "t": team.t, "pts": team.pts,
+            "plus_minus": team.plus_minus, "mmr": team.mmr, "rank": team.rank, "has_details": True}
+
+# Function to order rows into standings: points, then +/-, then MMR, with VRML's own rank breaking what's left.
+# Teams without details go last
+def standings(rows):
+    def key(row):
+        if not row["has_details"]:
+            return (1, 0, 0, 0, 0, row["name"] or "")
+        return (0, -row["pts"], -row["plus_minus"], -(row["mmr"] or 0), row["rank"] or float("inf"), row["name"] or "")
+    return sorted(rows, key=key)
+
+# Function to lay standings out as a fixed-width text table (for a code block or a terminal)
+def format_table(rows):
+    lines = ["#   " + "Team".ljust(NAME_WIDTH) + "".join(header.rjust(width) for header, _, width in COLUMNS)]
+    for position, row in enumerate(standings(rows), 1):
+        name = (row["name"] or "?")[:NAME_WIDTH].ljust(NAME_WIDTH)
+        if row["has_details"]:
+            values = "".join(str(row[field] if row[field] is not None else "-").rjust(width) for _, field, width in COLUMNS)
+        else:
+            values = "  no details"
+        lines.append(f"{position if row['has_details'] else '-':<4}{name}{values}")
+    return "\n".join(lines)
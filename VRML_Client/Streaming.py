@@ -0,0 +1,77 @@
+# ijson is optional, without it the clients fall back to a full parse and extract the same paths afterwards
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+SCALAR_EVENTS = ("null", "boolean", "integer", "double", "number", "string")
+
+# Function to turn a path like "team.players[*].playerName" into ijson's prefix "team.players.item.playerName"
+def to_prefix(path):
+    return path.replace("[*]", ".item")
+
+# Function to collect (path, value) pairs into {path: value}, wildcard paths ("[*]") collect a list
+def collect(pairs, paths):
+    results = {path: [] if "[*]" in path else None for path in paths}
+    for path, value in pairs:
+        if "[*]" in path:
+            results[path].append(value)
+        elif results[path] is None:
+            results[path] = value
+    return results
+
+# Function to walk an already parsed document, yields (path, value) for every requested path
+def extract_paths(data, paths):
+    for path in paths:
+        yield from ((path, value) for value in walk(data, to_prefix(path).split(".")))
+
+# Function to follow prefix tokens through nested dicts/lists ("item" means every element of a list)
+def walk(data, tokens):
+    if not tokens:
+        yield data
+        return
+    token, rest = tokens[0], tokens[1:]
+    if token == "item":
+        if isinstance(data, list):
+            for item in data:
+                yield from walk(item, rest)
+    elif isinstance(data, dict) and token in data:
+        yield from walk(data[token], rest)
+
+# Function to build the values of the requested prefixes out of an ijson event stream, yielding (path, value)
+# as soon as each value is complete instead of after the whole document has been read
+def iter_paths(events, paths):
+    targets = {to_prefix(path): path for path in paths}
+    events = iter(events)
+    for prefix, event, value in events:
+        if prefix not in targets:
+            continue
+        if event in SCALAR_EVENTS:
+            yield targets[prefix], value
+        elif event in ("start_map", "start_array"):
+            yield targets[prefix], build(event, value, events)
+
+# Async counterpart of iter_paths for ijson.parse_async
+async def iter_paths_async(events, paths):
+    targets = {to_prefix(path): path for path in paths}
+    async for prefix, event, value in events:
+        if prefix not in targets:
+            continue
+        if event in SCALAR_EVENTS:
+            yield targets[prefix], value
+        elif event in ("start_map", "start_array"):
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+            while builder.containers:
+                _, event, value = await events.__anext__()
+                builder.event(event, value)
+            yield targets[prefix], builder.value
+
+# Function to consume the events of one map/array and return it as a Python object
+def build(event, value, events):
+    builder = ijson.ObjectBuilder()
+    builder.event(event, value)
+    while builder.containers:
+        _, event, value = next(events)
+        builder.event(event, value)
+    return builder.value
@@ -0,0 +1,199 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import urlsplit
+
+# Where recorded VRML responses are kept, next to the other caches
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Cache", "Fixtures")
+# Response headers worth keeping in a fixture (the cache validators), by lower-case name
+KEPT_HEADERS = {"etag": "ETag", "last-modified": "Last-Modified", "content-type": "Content-Type"}
+
+# Raised by a transport for an HTTP error status, the clients treat it like any other failed response
+class TransportError(Exception):
+    def __init__(self, status, url):
+        super().__init__(f"{status} error for url: {url}")
+        self.status = status
+
+# Raised by ReplayTransport for an injected network failure, the clients retry it like a dropped connection
+class TransportConnectionError(ConnectionError):
+    pass
+
+# What every transport hands back to the clients: the status, headers and the decoded body (or, from stream() and
+# stream_async(), the file object the body is read from while it downloads)
+class TransportResponse:
+    __slots__ = ("url", "status", "headers", "body")
+
+    def __init__(self, url, status, headers, body):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    # Function to raise TransportError for a 4xx or 5xx status
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise TransportError(self.status, self.url)
+
+# Sends requests over the client's own pooled session (requests.Session or aiohttp.ClientSession), the default
+class NetworkTransport:
+    # Only the network can stream a document while it downloads, other transports serve whole bodies and don't
+    # implement stream() / stream_async()
+    streams = True
+
+    # Function to make a GET request with a requests.Session
+    def get(self, session, url, params, headers, timeout):
+        response = session.get(url, params=params, headers=headers, timeout=timeout)
+        return TransportResponse(url, response.status_code, response.headers, response.content.decode("utf-8"))
+
+    # Function to make a GET request with an aiohttp.ClientSession
+    async def get_async(self, session, url, params, headers):
+        async with session.get(url, params=params, headers=headers) as response:
+            body = (await response.read()).decode("utf-8")
+            return TransportResponse(url, response.status, response.headers, body)
+
+    # Function to open a streamed GET with a requests.Session, the body is the (decompressed) raw socket file
+    @contextmanager
+    def stream(self, session, url, params, timeout):
+        with session.get(url, params=params, timeout=timeout, stream=True) as response:
+            response.raw.decode_content = True
+            yield TransportResponse(url, response.status_code, response.headers, response.raw)
+
+    # Function to open a streamed GET with an aiohttp.ClientSession, the body is the response's StreamReader
+    @asynccontextmanager
+    async def stream_async(self, session, url, params):
+        async with session.get(url, params=params) as response:
+            yield TransportResponse(url, response.status, response.headers, response.content)
+
+# Recorded responses, one JSON file per request keyed by the URL path and its query parameters (not the host, so
+# fixtures recorded against the real API replay against any base_url)
+class FixtureStore:
+    def __init__(self, directory=DEFAULT_FIXTURE_DIR):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.memory = {}  # file name -> fixture, each file is read once
+
+    # Function to build the file name of a request, e.g. "teams_b0nMxdjF5L-x_GuAD5v8kA2.json" or "Breachers_Matches_1a2b3c4d.json"
+    @staticmethod
+    def make_name(path, params):
+        path = urlsplit(path).path.strip("/")
+        name = "".join(character if character.isalnum() or character in "-." else "_" for character in path)
+        if params:
+            query = json.dumps(sorted((str(key), str(value)) for key, value in params.items()))
+            name += "_" + hashlib.sha1(query.encode("utf-8")).hexdigest()[:8]
+        return name + ".json"
+
+    # Function to get the recorded response of a request as a dict (status, headers, body), or None
+    def get(self, path, params):
+        name = self.make_name(path, params)
+        with self.lock:
+            if name in self.memory:
+                return self.memory[name]
+        try:
+            with open(os.path.join(self.directory, name), "r", encoding="utf-8") as fixture_file:
+                fixture = json.load(fixture_file)
+        except (OSError, ValueError):
+            return None
+        with self.lock:
+            self.memory[name] = fixture
+        return fixture
+
+    # Function to record a response (body is the raw JSON text)
+    def put(self, path, params, status, headers, body):
+        name = self.make_name(path, params)
+        fixture = {"path": urlsplit(path).path, "params": params or {}, "status": status,
+                   "headers": {KEPT_HEADERS[key.lower()]: value for key, value in (headers or {}).items() if key.lower() in KEPT_HEADERS},
+                   "body": body}
+        with self.lock:
+            if not os.path.exists(self.directory):
+                os.makedirs(self.directory)
+            with open(os.path.join(self.directory, name), "w", encoding="utf-8") as fixture_file:
+                json.dump(fixture, fixture_file)
+            self.memory[name] = fixture
+
+    # Function to record a decoded payload as a 200 response, e.g. one of the sample files in API_Tests
+    def put_json(self, path, params, data):
+        self.put(path, params, 200, {"Content-Type": "application/json"}, json.dumps(data))
+
+    def __len__(self):
+        if not os.path.isdir(self.directory):
+            return 0
+        return sum(1 for name in os.listdir(self.directory) if name.endswith(".json"))
+
+# Passes requests on to another transport (the network by default) and saves every successful response
+class RecordingTransport:
+    streams = False
+
+    def __init__(self, store, inner=None):
+        self.store = store
+        self.inner = inner or NetworkTransport()
+
+    def record(self, response, params):
+        if response.status == 200:
+            self.store.put(response.url, params, response.status, response.headers, response.body)
+        return response
+
+    # Conditional headers are dropped so the API always sends a body worth recording
+    def get(self, session, url, params, headers, timeout):
+        return self.record(self.inner.get(session, url, params, None, timeout), params)
+
+    async def get_async(self, session, url, params, headers):
+        return self.record(await self.inner.get_async(session, url, params, None), params)
+
+# Serves recorded responses without touching the network. latency (+ up to jitter) seconds are added to every
+# request, error_rate of them fail like a dropped connection and server_error_rate of them answer 503, so retries,
+# the circuit breaker and slow-API behaviour can be exercised offline. Requests that were never recorded get a 404
+class ReplayTransport:
+    streams = False
+
+    def __init__(self, store, latency=0.0, jitter=0.0, error_rate=0.0, server_error_rate=0.0, seed=None):
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.server_error_rate = server_error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.misses = 0
+
+    # Function to draw the delay and injected failure of one request
+    def plan(self):
+        with self.lock:
+            self.requests += 1
+            delay = self.latency + (self.random.random() * self.jitter if self.jitter else 0.0)
+            roll = self.random.random()
+        if roll < self.error_rate:
+            return delay, "connection"
+        if roll < self.error_rate + self.server_error_rate:
+            return delay, "server"
+        return delay, None
+
+    # Function to build the response for a request once its delay has passed
+    def respond(self, url, params, failure):
+        if failure == "connection":
+            raise TransportConnectionError(f"Injected connection failure for url: {url}")
+        if failure == "server":
+            return TransportResponse(url, 503, {}, "")
+        fixture = self.store.get(url, params)
+        if fixture is None:
+            with self.lock:
+                self.misses += 1
+            return TransportResponse(url, 404, {}, "")
+        return TransportResponse(url, fixture["status"], fixture.get("headers") or {}, fixture["body"])
+
+    def get(self, session, url, params, headers, timeout):
+        delay, failure = self.plan()
+        if delay:
+            time.sleep(delay)
+        return self.respond(url, params, failure)
+
+    async def get_async(self, session, url, params, headers):
+        delay, failure = self.plan()
+        if delay:
+            await asyncio.sleep(delay)
+        return self.respond(url, params, failure)
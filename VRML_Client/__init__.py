@@ -0,0 +1,36 @@
+import importlib
+
+# Names are imported from their module on first use, so the bot doesn't pay for `requests` (only the sync client
+# needs it) and the scripts don't pay for `aiohttp`
+EXPORTS = {
+    "BASE_URL": "Endpoints",
+    "find_exact_match": "Endpoints",
+    "ClientMetrics": "Metrics",
+    "ResponseCache": "Cache",
+    "DiskCache": "Disk_Cache",
+    "SingleFlight": "Single_Flight",
+    "TokenBucket": "Rate_Limit",
+    "CircuitBreaker": "Rate_Limit",
+    "get_rate_limiter": "Rate_Limit",
+    "get_circuit_breaker": "Rate_Limit",
+    "VRMLClient": "Client",
+    "get_client": "Client",
+    "AsyncVRMLClient": "Async_Client",
+    "NetworkTransport": "Transport",
+    "RecordingTransport": "Transport",
+    "ReplayTransport": "Transport",
+    "FixtureStore": "Transport",
+    "Match": "Models",
+    "TeamRef": "Models",
+    "Team": "Models",
+    "Player": "Models",
+}
+
+__all__ = list(EXPORTS)
+
+def __getattr__(name):
+    if name not in EXPORTS:
+        raise AttributeError(f"module 'VRML_Client' has no attribute '{name}'")
+    value = getattr(importlib.import_module(f"VRML_Client.{EXPORTS[name]}"), name)
+    globals()[name] = value
+    return value